@@ -3,134 +3,48 @@
 書き味パターン抽出: FC2記事から論理展開・感情表現・構造特徴を抽出
 
 目的: AI学習用の特徴パターンを自動抽出し、writing_patternsテーブルに格納
-使い方: python3 extract-patterns.py [--min-elo SCORE] [--limit N]
-出力: writing-corpus.db の writing_patterns テーブル
+使い方: python3 extract-patterns.py [--min-elo SCORE] [--limit N] [--jobs N] [--breakdown year|category]
+        [--pattern-budget-ms MS] [--root DIR]
+出力: writing-corpus.db の writing_patterns / writing_pattern_stats テーブル
+
+3種類のパターン辞書は PatternMatcher（lib/pattern_matcher.py）で1つにまとめてコンパイルし、
+各記事の本文を1回だけ走査する。結果は辞書ごとに extract_patterns_from_article() を
+適用したものと同一。
+
+デフォルトで条件に合う全記事を分析する。記事ごとのヒット数と位置は article_pattern_hits に
+保存し、本文ハッシュとパターン集合の版が変わらない記事は走査しない（パターンを追加した場合は
+追加分だけを走査する）。走査はバッチ単位でプロセスプールに分配する（結果は --jobs によらず同一）。
+writing_patterns と全体・年別・カテゴリ別の writing_pattern_stats は article_pattern_hits の
+SQL集計から作る。
+
+正規表現のまま照合するパターンは走査前に長い不一致入力で実測し、バックトラックで遅いものが
+あれば走査しない。走査中も記事1件あたりの処理時間が --pattern-budget-ms を超えたパターンを表示する
+（パターン辞書を編集したら scripts/bench/bench-patterns.py で確認する）。
 """
 
+import hashlib
+import json
+import os
 import sqlite3
 import re
+import sys
+import time
 from pathlib import Path
-from typing import List, Dict, Tuple
-from collections import Counter
+from typing import Iterator, List, Dict, Optional, Tuple
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 import argparse
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.corpus import open_corpus
+from lib.corpus_db import create_schema, decompress_content
+from lib.pattern_dictionaries import PATTERN_GROUPS
+from lib.pattern_matcher import PatternMatcher
+from lib.regex_bench import probe_backtracking
 
-# パターン定義
-LOGICAL_PATTERNS = {
-    "反語型": [
-        r"〜じゃないか[？?]",
-        r"〜というのはおかしいんじゃないか[？?]",
-        r"〜と思わないか[？?]",
-        r"〜なんじゃないか[？?]",
-        r"〜ではないだろうか[？?]"
-    ],
-    "極論前置き型": [
-        r"はっきり言って",
-        r"正直な話",
-        r"端的に言えば",
-        r"要するに",
-        r"結論から言うと"
-    ],
-    "段階的展開": [
-        r"まず[、,]",
-        r"次に[、,]",
-        r"最後に[、,]",
-        r"第一に",
-        r"第二に",
-        r"そして[、,]"
-    ],
-    "対比型": [
-        r"一方で[、,]",
-        r"他方で[、,]",
-        r"それに対して",
-        r"逆に[、,]",
-        r"反対に[、,]"
-    ],
-    "前提提示型": [
-        r"前提として[、,]",
-        r"そもそも[、,]",
-        r"まず前提として",
-        r"ここで重要なのは"
-    ]
-}
-
-EMOTIONAL_PATTERNS = {
-    "肯定表現": [
-        r"〜でいいじゃない[!！]",
-        r"素晴らしい",
-        r"最高だ[!！]",
-        r"これはいい[!！]",
-        r"良いもの",
-        r"気に入った"
-    ],
-    "否定表現": [
-        r"〜はクソ",
-        r"まぁ、〜だが",
-        r"残念ながら",
-        r"いまいち",
-        r"微妙",
-        r"ダメ"
-    ],
-    "驚き表現": [
-        r"マジか[!！]",
-        r"ちょ、",
-        r"おいおい[、,]",
-        r"びっくり",
-        r"驚いた",
-        r"まさか"
-    ],
-    "共感要請": [
-        r"〜だよね[？?]",
-        r"〜じゃん[!！]",
-        r"〜でしょ[？?]",
-        r"〜ですよね[？?]"
-    ],
-    "断定型": [
-        r"〜である[。.]",
-        r"〜だ[。.]",
-        r"〜に違いない",
-        r"間違いなく",
-        r"確実に"
-    ]
-}
-
-STRUCTURAL_PATTERNS = {
-    "導入部": [
-        r"^です、おはこんにちばんわ[!！]",
-        r"^さて[、,]",
-        r"^というわけで[、,]",
-        r"^今回は",
-        r"^本日は"
-    ],
-    "結論部": [
-        r"まとめると",
-        r"結論としては",
-        r"つまり[、,]",
-        r"ということで[、,]",
-        r"以上[、,]"
-    ],
-    "補足部": [
-        r"ちなみに[、,]",
-        r"余談ですが[、,]",
-        r"蛇足ながら",
-        r"ついでに言うと",
-        r"補足すると"
-    ],
-    "引用・参照": [
-        r"〜によれば[、,]",
-        r"〜の言葉を借りれば",
-        r"参考：",
-        r"引用：",
-        r"出典："
-    ],
-    "列挙型": [
-        r"[①②③④⑤⑥⑦⑧⑨⑩]",
-        r"[1-9]\.",
-        r"・",
-        r"- ",
-        r"\* "
-    ]
-}
+
+# パターン定義は lib/pattern_dictionaries.py（bench-patterns.py と共有）
+PATTERN_MATCHER = PatternMatcher(PATTERN_GROUPS)
 
 
 def extract_patterns_from_article(content: str, pattern_dict: Dict[str, List[str]]) -> Dict[str, List[str]]:
@@ -164,134 +78,552 @@ def extract_patterns_from_article(content: str, pattern_dict: Dict[str, List[str
     return results
 
 
-def analyze_corpus(db_path: Path, min_elo: int = 1500, limit: int = 100) -> Dict[str, Dict[str, Counter]]:
+def extract_all_patterns(content: str) -> Dict[str, Dict[str, List[str]]]:
+    """
+    1つの記事から全種別のパターンを1回の走査で抽出
+
+    Args:
+        content: 記事本文
+
+    Returns:
+        パターン種別 → パターン別の出現例リスト（各パターン最大5例、前後20文字を含む）
+    """
+    return PATTERN_MATCHER.extract_examples(content, max_examples=5, context_chars=20)
+
+
+# ストリーミング分析で1タスクにまとめる記事数
+ANALYSIS_BATCH_SIZE = 200
+
+# 正規表現のまま照合するパターンの、記事1件あたりの処理時間の上限（ミリ秒）
+PATTERN_BUDGET_MS = 50.0
+
+# writing_patterns に保存する例文数（パターン名ごと。重複を除き、分析順に先頭から）
+STORED_EXAMPLES = 10
+
+# 集計の切り口（dimension → 表示名）
+BREAKDOWN_DIMENSIONS = {"year": "年別", "category": "カテゴリ別"}
+
+# 分析対象の条件と並び（ELO順、同点は rowid の降順に idx_articles_elo_rating をたどる）
+SELECTED_ARTICLES = """
+    SELECT id, year, COALESCE(category, '') AS category,
+           ROW_NUMBER() OVER (ORDER BY elo_rating DESC, rowid DESC) AS rank
+    FROM articles
+    WHERE elo_rating >= :min_elo AND content IS NOT NULL AND content != ''
+    ORDER BY elo_rating DESC, rowid DESC
+    LIMIT :limit
+"""
+
+
+def pattern_key(pattern_type: str, pattern_name: str, regex: str) -> str:
+    """
+    パターン1つの版を表すキー
+
+    種別・パターン名・正規表現のどれかが変われば別のパターンとして扱う。
+
+    Args:
+        pattern_type: パターン種別
+        pattern_name: パターン名
+        regex: 正規表現
+
+    Returns:
+        16桁のハッシュ
+    """
+    return hashlib.sha1(f"{pattern_type}\t{pattern_name}\t{regex}".encode("utf-8")).hexdigest()[:16]
+
+
+# PATTERN_MATCHER.patterns と同じ並びのパターンキーと、パターン集合全体の版
+PATTERN_KEYS = [pattern_key(*pattern) for pattern in PATTERN_MATCHER.patterns]
+PATTERN_VERSION = hashlib.sha1("\n".join(sorted(set(PATTERN_KEYS))).encode("utf-8")).hexdigest()[:16]
+
+_subset_matchers: Dict[Tuple[str, ...], Tuple[PatternMatcher, List[str]]] = {}
+
+
+def matcher_for(keys: Optional[Tuple[str, ...]]) -> Tuple[PatternMatcher, List[str]]:
+    """
+    指定したパターンだけを照合する PatternMatcher を返す（プロセス内でキャッシュ）
+
+    Args:
+        keys: パターンキー（None の場合は全パターン）
+
+    Returns:
+        (PatternMatcher, その patterns と同じ並びのパターンキー)
+    """
+    if keys is None:
+        return PATTERN_MATCHER, PATTERN_KEYS
+
+    if keys not in _subset_matchers:
+        wanted = set(keys)
+        pattern_groups = {}
+        for key, (pattern_type, pattern_name, regex) in zip(PATTERN_KEYS, PATTERN_MATCHER.patterns):
+            if key in wanted:
+                pattern_groups.setdefault(pattern_type, {}).setdefault(pattern_name, []).append(regex)
+
+        matcher = PatternMatcher(pattern_groups)
+        _subset_matchers[keys] = (matcher, [pattern_key(*pattern) for pattern in matcher.patterns])
+
+    return _subset_matchers[keys]
+
+
+def scan_batch(tasks: List[Tuple], budget_ms: float = PATTERN_BUDGET_MS) -> List[Tuple]:
+    """
+    記事のバッチを走査してパターンごとのヒットを返す（プロセスプールのワーカーで実行）
+
+    Args:
+        tasks: (記事ID, content, 走査するパターンキー) のリスト。
+               content はDBの値のまま（圧縮BLOBも可）、パターンキーが None なら全パターン
+        budget_ms: 正規表現のまま照合するパターンの、記事1件あたりの処理時間の上限
+
+    Returns:
+        (記事ID, [(パターンキー, ヒット数, 位置のJSON)], [(上限を超えたパターンキー, ミリ秒)]) のリスト
+        （ヒットのないパターンは含まない）
+    """
+    results = []
+
+    for article_id, content, keys in tasks:
+        matcher, matcher_keys = matcher_for(keys)
+        timings: Dict[int, float] = {}
+        spans_by_pattern = matcher.find_all(decompress_content(content), timings)
+
+        hits = [
+            (key, len(spans), json.dumps(spans, separators=(",", ":")))
+            for key, spans in zip(matcher_keys, spans_by_pattern)
+            if spans
+        ]
+        overruns = [
+            (matcher_keys[pattern_id], seconds * 1000)
+            for pattern_id, seconds in timings.items()
+            if seconds * 1000 > budget_ms
+        ]
+        results.append((article_id, hits, overruns))
+
+    return results
+
+
+def iter_scan_results(batches: Iterator[List[Tuple]], jobs: int,
+                      budget_ms: float = PATTERN_BUDGET_MS) -> Iterator[List[Tuple]]:
+    """
+    バッチを走査し、結果を投入順に返す
+
+    jobs > 1 の場合はプロセスプールに分配する。未完了のバッチは jobs * 2 個までに抑え、
+    読み出し済みの本文がメモリに溜まらないようにする。
+
+    Args:
+        batches: scan_batch() に渡すタスクのリストを返すイテレータ
+        jobs: 並列プロセス数
+        budget_ms: scan_batch() に渡す処理時間の上限
+
+    Yields:
+        scan_batch() の結果
+    """
+    if jobs <= 1:
+        for tasks in batches:
+            yield scan_batch(tasks, budget_ms)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+
+        while True:
+            while len(pending) < jobs * 2:
+                tasks = next(batches, None)
+                if tasks is None:
+                    break
+                pending.append(executor.submit(scan_batch, tasks, budget_ms))
+
+            if not pending:
+                break
+
+            yield pending.popleft().result()
+
+
+def sync_pattern_definitions(conn: sqlite3.Connection):
+    """現在のパターン定義を pattern_definitions / pattern_sets に登録"""
+    with conn:
+        conn.execute("DELETE FROM pattern_definitions")
+        conn.executemany("""
+            INSERT OR IGNORE INTO pattern_definitions (pattern_key, position, pattern_type, pattern_name, pattern)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(key, position) + pattern for position, (key, pattern)
+              in enumerate(zip(PATTERN_KEYS, PATTERN_MATCHER.patterns))])
+        conn.execute(
+            "INSERT OR IGNORE INTO pattern_sets (pattern_version, pattern_keys) VALUES (?, ?)",
+            (PATTERN_VERSION, json.dumps(sorted(set(PATTERN_KEYS))))
+        )
+
+
+def plan_scans(conn: sqlite3.Connection, min_elo: int, limit: Optional[int]) -> Tuple[List[Tuple], int]:
+    """
+    分析対象の記事ごとに、走査が必要なパターンを決める
+
+    本文ハッシュとパターン集合の版が前回と同じ記事は走査しない。本文が同じで
+    パターンだけ変わった記事は、前回の集合にないパターンだけを走査する。
+
+    Args:
+        conn: データベース接続
+        min_elo: 最小ELOレーティング
+        limit: 分析対象記事数上限（None の場合は全件）
+
+    Returns:
+        ([(記事ID, 本文ハッシュ, 走査するパターンキー)], 分析対象の記事数)。
+        パターンキーは None なら全パターン、空なら走査不要（版の更新のみ）
+    """
+    pattern_sets = {
+        version: set(json.loads(keys))
+        for version, keys in conn.execute("SELECT pattern_version, pattern_keys FROM pattern_sets")
+    }
+    current_keys = set(PATTERN_KEYS)
+
+    plan = []
+    selected = 0
+
+    for article_id, content_hash, scanned_hash, scanned_version in conn.execute(f"""
+        SELECT a.id, a.content_hash, s.content_hash, s.pattern_version
+        FROM ({SELECTED_ARTICLES}) AS selected
+        JOIN articles a ON a.id = selected.id
+        LEFT JOIN article_pattern_state s ON s.article_id = a.id
+    """, {"min_elo": min_elo, "limit": -1 if limit is None else limit}):
+        selected += 1
+
+        if content_hash is None or scanned_hash != content_hash or scanned_version not in pattern_sets:
+            plan.append((article_id, content_hash, None))
+        elif scanned_version != PATTERN_VERSION:
+            plan.append((article_id, content_hash, tuple(sorted(current_keys - pattern_sets[scanned_version]))))
+
+    return plan, selected
+
+
+def update_pattern_hits(conn: sqlite3.Connection, min_elo: int = 1500, limit: Optional[int] = None,
+                        jobs: int = 1, budget_ms: float = PATTERN_BUDGET_MS) -> Dict:
+    """
+    article_pattern_hits を分析対象の記事について最新にする
+
+    Args:
+        conn: データベース接続（corpus_db.connect() で開いたもの）
+        min_elo: 最小ELOレーティング
+        limit: 分析対象記事数上限（None の場合は全件）
+        jobs: 並列プロセス数
+        budget_ms: パターン1つ・記事1件あたりの処理時間の上限（超えたものを overruns に集める）
+
+    Returns:
+        selected / full / partial / skipped の件数と、
+        overruns（パターンキー → (超過した記事数, 最悪ミリ秒, その記事ID)）
+    """
+    sync_pattern_definitions(conn)
+
+    with conn:
+        # 削除・ID変更された記事の行を消す
+        conn.execute("DELETE FROM article_pattern_state WHERE article_id NOT IN (SELECT id FROM articles)")
+        conn.execute("DELETE FROM article_pattern_hits WHERE article_id NOT IN (SELECT id FROM articles)")
+
+    plan, selected = plan_scans(conn, min_elo, limit)
+    counts = {
+        "selected": selected,
+        "full": sum(1 for _, _, keys in plan if keys is None),
+        "partial": sum(1 for _, _, keys in plan if keys is not None),
+        "skipped": selected - len(plan),
+        "overruns": {}
+    }
+    print(f"分析対象: {selected}件の記事（ELO >= {min_elo}）")
+    content_hashes = {article_id: content_hash for article_id, content_hash, _ in plan}
+    full_scans = {article_id for article_id, _, keys in plan if keys is None}
+
+    def batches() -> Iterator[List[Tuple]]:
+        for i in range(0, len(plan), ANALYSIS_BATCH_SIZE):
+            batch = plan[i:i + ANALYSIS_BATCH_SIZE]
+            needs_content = [article_id for article_id, _, keys in batch if keys is None or keys]
+            contents = dict(conn.execute(
+                f"SELECT id, content FROM articles WHERE id IN ({', '.join('?' * len(needs_content))})",
+                needs_content
+            )) if needs_content else {}
+            yield [(article_id, contents.get(article_id), keys) for article_id, _, keys in batch]
+
+    processed = 0
+    for i, results in enumerate(iter_scan_results(batches(), jobs, budget_ms), 1):
+        with conn:
+            for article_id, hits, overruns in results:
+                for key, elapsed_ms in overruns:
+                    count, worst_ms, worst_article = counts["overruns"].get(key, (0, 0.0, None))
+                    if elapsed_ms > worst_ms:
+                        worst_ms, worst_article = elapsed_ms, article_id
+                    counts["overruns"][key] = (count + 1, worst_ms, worst_article)
+
+                if article_id in full_scans:
+                    conn.execute("DELETE FROM article_pattern_hits WHERE article_id = ?", (article_id,))
+                else:
+                    # 定義から外れたパターンのヒットを消す
+                    conn.execute("""
+                        DELETE FROM article_pattern_hits
+                        WHERE article_id = ? AND pattern_key NOT IN (SELECT pattern_key FROM pattern_definitions)
+                    """, (article_id,))
+
+                conn.executemany("""
+                    INSERT OR REPLACE INTO article_pattern_hits (article_id, pattern_key, hit_count, offsets)
+                    VALUES (?, ?, ?, ?)
+                """, [(article_id,) + hit for hit in hits])
+                conn.execute("""
+                    INSERT OR REPLACE INTO article_pattern_state (article_id, content_hash, pattern_version)
+                    VALUES (?, ?, ?)
+                """, (article_id, content_hashes[article_id], PATTERN_VERSION))
+
+        processed += len(results)
+        if i % 5 == 0:
+            print(f"  処理中... {processed}/{len(plan)}")
+
+    return counts
+
+
+def aggregate_patterns(conn: sqlite3.Connection, min_elo: int = 1500, limit: Optional[int] = None) -> Dict:
+    """
+    article_pattern_hits を全体・年別・カテゴリ別に集計
+
+    出現回数はパターン名ごとに記事あたり最大5回（例文の上限）で数える。
+
+    Args:
+        conn: データベース接続
+        min_elo: 最小ELOレーティング
+        limit: 分析対象記事数上限（None の場合は全件）
+
+    Returns:
+        scanned / occurrences / articles（Counter）の集計。
+        occurrences / articles のキーは (dimension, key, パターン種別, パターン名)、
+        同じ切り口の中ではパターンの定義順
+    """
+    params = {"min_elo": min_elo, "limit": -1 if limit is None else limit}
+    summary = {"scanned": Counter(), "occurrences": Counter(), "articles": Counter()}
+
+    for dimension, key, count in conn.execute(f"""
+        WITH selected AS ({SELECTED_ARTICLES})
+        SELECT 'total', '', COUNT(*) FROM selected
+        UNION ALL
+        SELECT 'year', year, COUNT(*) FROM selected GROUP BY year
+        UNION ALL
+        SELECT 'category', category, COUNT(*) FROM selected GROUP BY category
+    """, params):
+        if count:
+            summary["scanned"][(dimension, key)] = count
+
+    for dimension, key, pattern_type, pattern_name, occurrences, articles in conn.execute(f"""
+        WITH selected AS ({SELECTED_ARTICLES}),
+        name_hits AS (
+            SELECT s.year, s.category, d.pattern_type, d.pattern_name,
+                   MIN(SUM(h.hit_count), 5) AS occurrences, MIN(d.position) AS position
+            FROM selected s
+            JOIN article_pattern_hits h ON h.article_id = s.id
+            JOIN pattern_definitions d ON d.pattern_key = h.pattern_key
+            GROUP BY s.id, d.pattern_type, d.pattern_name
+        )
+        SELECT dimension, key, pattern_type, pattern_name, occurrences, articles FROM (
+            SELECT 'total' AS dimension, '' AS key, pattern_type, pattern_name,
+                   SUM(occurrences) AS occurrences, COUNT(*) AS articles, MIN(position) AS position
+            FROM name_hits GROUP BY pattern_type, pattern_name
+            UNION ALL
+            SELECT 'year', year, pattern_type, pattern_name, SUM(occurrences), COUNT(*), MIN(position)
+            FROM name_hits GROUP BY year, pattern_type, pattern_name
+            UNION ALL
+            SELECT 'category', category, pattern_type, pattern_name, SUM(occurrences), COUNT(*), MIN(position)
+            FROM name_hits GROUP BY category, pattern_type, pattern_name
+        )
+        ORDER BY dimension, key, position
+    """, params):
+        summary["occurrences"][(dimension, key, pattern_type, pattern_name)] = occurrences
+        summary["articles"][(dimension, key, pattern_type, pattern_name)] = articles
+
+    return summary
+
+
+def collect_examples(conn: sqlite3.Connection, min_elo: int = 1500,
+                     limit: Optional[int] = None) -> Dict[Tuple[str, str], List[str]]:
+    """
+    保存済みのヒット位置から例文を組み立てる
+
+    分析順（ELO順）に、記事ごと・パターン名ごとに最大5例（前後20文字）を取り、
+    重複を除いて STORED_EXAMPLES 件まで集める。本文を読むのは例文に使う記事だけ。
+
+    Args:
+        conn: データベース接続
+        min_elo: 最小ELOレーティング
+        limit: 分析対象記事数上限（None の場合は全件）
+
+    Returns:
+        (パターン種別, パターン名) → 例文リスト
+    """
+    examples: Dict[Tuple[str, str], List[str]] = {}
+    taken: Counter = Counter()
+    content_cache: Dict[str, str] = {}
+
+    rows = conn.execute(f"""
+        WITH selected AS ({SELECTED_ARTICLES})
+        SELECT s.id, d.pattern_type, d.pattern_name, h.offsets
+        FROM selected s
+        JOIN article_pattern_hits h ON h.article_id = s.id
+        JOIN pattern_definitions d ON d.pattern_key = h.pattern_key
+        ORDER BY s.rank, d.position
+    """, {"min_elo": min_elo, "limit": -1 if limit is None else limit})
+
+    for article_id, pattern_type, pattern_name, offsets in rows:
+        name = (pattern_type, pattern_name)
+        collected = examples.setdefault(name, [])
+        if len(collected) >= STORED_EXAMPLES or taken[(article_id, name)] >= 5:
+            continue
+
+        if article_id not in content_cache:
+            # 行は記事順に並ぶので、キャッシュは直前の記事だけ持てばよい
+            content_cache.clear()
+            content_cache[article_id] = decompress_content(
+                conn.execute("SELECT content FROM articles WHERE id = ?", (article_id,)).fetchone()[0]
+            )
+        content = content_cache[article_id]
+
+        spans = json.loads(offsets)[:5 - taken[(article_id, name)]]
+        taken[(article_id, name)] += len(spans)
+        add_examples(collected, [content[max(0, start - 20):end + 20].strip() for start, end in spans])
+
+    return examples
+
+
+def add_examples(collected: List[str], examples: List[str]):
+    """重複を除いて STORED_EXAMPLES 件まで例文を追加"""
+    for example in examples:
+        if len(collected) >= STORED_EXAMPLES:
+            break
+        if example not in collected:
+            collected.append(example)
+
+
+def check_pattern_safety(budget_ms: float = PATTERN_BUDGET_MS) -> List[str]:
+    """
+    正規表現のまま照合するパターンを、一致しない長い入力で実測する（走査前の確認）
+
+    バックトラックで止まらなくなるパターンがあれば、走査を始める前に見つける。
+    詳しい計測は scripts/bench/bench-patterns.py で行う。
+
+    Args:
+        budget_ms: 入力1つあたりの処理時間の上限
+
+    Returns:
+        問題のあるパターンの説明のリスト
+    """
+    problems = []
+
+    for pattern_id, regex in PATTERN_MATCHER.regex_patterns():
+        problem = probe_backtracking(regex, budget_ms=budget_ms)["problem"]
+        if problem:
+            pattern_type, pattern_name, _ = PATTERN_MATCHER.patterns[pattern_id]
+            problems.append(f"{pattern_type} > {pattern_name}: {regex}（{problem}）")
+
+    return problems
+
+
+def analyze_corpus(db_path: Path, min_elo: int = 1500, limit: Optional[int] = None, jobs: int = 1,
+                   budget_ms: float = PATTERN_BUDGET_MS) -> Dict:
     """
     コーパス全体からパターンを抽出・集計
 
+    article_pattern_hits を最新にしてから、SQLで集計する。
+
     Args:
         db_path: データベースパス
         min_elo: 最小ELOレーティング
-        limit: 分析対象記事数上限
+        limit: 分析対象記事数上限（None の場合は全件）
+        jobs: 並列プロセス数
+        budget_ms: パターン1つ・記事1件あたりの処理時間の上限
 
     Returns:
-        パターン種別ごとの集計結果
+        集計結果（aggregate_patterns() の結果に examples を加えたもの）
     """
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-
-    query = """
-        SELECT id, title, content
-        FROM articles
-        WHERE elo_rating >= ? AND content IS NOT NULL AND content != ''
-        ORDER BY elo_rating DESC
-        LIMIT ?
+    with open_corpus(db_path).writer() as conn:
+        # 旧スキーマのDBにも article_pattern_hits 等を追加する
+        create_schema(conn)
+
+        started = time.perf_counter()
+        counts = update_pattern_hits(conn, min_elo, limit, jobs, budget_ms)
+        print(f"走査: 全パターン {counts['full']}件 / 追加パターンのみ {counts['partial']}件 / "
+              f"変更なし {counts['skipped']}件（{time.perf_counter() - started:.2f}秒）")
+
+        patterns_by_key = dict(zip(PATTERN_KEYS, PATTERN_MATCHER.patterns))
+        for key, (count, worst_ms, worst_article) in counts["overruns"].items():
+            pattern_type, pattern_name, regex = patterns_by_key[key]
+            print(f"⚠️  処理時間の上限（{budget_ms:g}ms）超過: {pattern_type} > {pattern_name}: {regex} "
+                  f"{count}件、最悪 {worst_ms:.1f}ms（{worst_article}）")
+
+        summary = aggregate_patterns(conn, min_elo, limit)
+        summary["examples"] = collect_examples(conn, min_elo, limit)
+
+    return summary
+
+
+def pattern_counters(summary: Dict, dimension: str = "total", key="") -> Dict[str, Counter]:
     """
+    集計結果からパターン種別ごとの出現回数を取り出す
 
-    cursor = conn.execute(query, (min_elo, limit))
-    articles = cursor.fetchall()
-
-    print(f"分析対象: {len(articles)}件の記事（ELO >= {min_elo}）")
-
-    # パターン別の集計
-    logical_counter = Counter()
-    emotional_counter = Counter()
-    structural_counter = Counter()
-
-    # 例文の収集
-    logical_examples = {}
-    emotional_examples = {}
-    structural_examples = {}
-
-    for i, article in enumerate(articles, 1):
-        content = article['content']
-
-        # 論理展開パターン
-        logical_matches = extract_patterns_from_article(content, LOGICAL_PATTERNS)
-        for pattern_name, examples in logical_matches.items():
-            logical_counter[pattern_name] += len(examples)
-            if pattern_name not in logical_examples:
-                logical_examples[pattern_name] = []
-            logical_examples[pattern_name].extend(examples)
-
-        # 感情表現パターン
-        emotional_matches = extract_patterns_from_article(content, EMOTIONAL_PATTERNS)
-        for pattern_name, examples in emotional_matches.items():
-            emotional_counter[pattern_name] += len(examples)
-            if pattern_name not in emotional_examples:
-                emotional_examples[pattern_name] = []
-            emotional_examples[pattern_name].extend(examples)
-
-        # 構造特徴パターン
-        structural_matches = extract_patterns_from_article(content, STRUCTURAL_PATTERNS)
-        for pattern_name, examples in structural_matches.items():
-            structural_counter[pattern_name] += len(examples)
-            if pattern_name not in structural_examples:
-                structural_examples[pattern_name] = []
-            structural_examples[pattern_name].extend(examples)
-
-        if i % 20 == 0:
-            print(f"  処理中... {i}/{len(articles)}")
-
-    conn.close()
-
-    return {
-        "論理展開": {"counter": logical_counter, "examples": logical_examples},
-        "感情表現": {"counter": emotional_counter, "examples": emotional_examples},
-        "構造特徴": {"counter": structural_counter, "examples": structural_examples}
-    }
+    Args:
+        summary: analyze_corpus() の結果
+        dimension: total / year / category
+        key: 年・カテゴリ（total の場合は空文字列）
 
+    Returns:
+        パターン種別 → Counter（パターン名 → 出現回数）
+    """
+    counters = {pattern_type: Counter() for pattern_type in PATTERN_GROUPS}
 
-def save_patterns_to_db(db_path: Path, analysis_results: Dict[str, Dict[str, Counter]]):
+    for (row_dimension, row_key, pattern_type, pattern_name), count in summary["occurrences"].items():
+        if row_dimension == dimension and row_key == key:
+            counters[pattern_type][pattern_name] = count
+
+    return counters
+
+
+def save_patterns_to_db(db_path: Path, summary: Dict):
     """
-    抽出したパターンをデータベースに保存
+    集計結果を writing_patterns / writing_pattern_stats に保存
 
     Args:
         db_path: データベースパス
-        analysis_results: 分析結果
+        summary: analyze_corpus() の結果
     """
-    conn = sqlite3.connect(db_path)
+    with open_corpus(db_path).writer() as conn:
 
-    # 既存データをクリア
-    conn.execute("DELETE FROM writing_patterns")
+        # 既存データをクリア
+        conn.execute("DELETE FROM writing_patterns")
+        conn.execute("DELETE FROM writing_pattern_stats")
 
-    for pattern_type, data in analysis_results.items():
-        counter = data['counter']
-        examples = data['examples']
+        for pattern_type, counter in pattern_counters(summary).items():
+            for pattern_name, count in counter.items():
+                # 例文を区切り文字で連結して保存（重複を除き最大10例）
+                examples_json = '\n---\n'.join(summary["examples"].get((pattern_type, pattern_name), []))
 
-        for pattern_name, count in counter.items():
-            # 例文をJSON形式で保存（最大10例）
-            example_list = list(set(examples.get(pattern_name, [])))[:10]
-            examples_json = '\n---\n'.join(example_list)
+                # パターンの正規表現を取得
+                pattern_regex = '|'.join(PATTERN_GROUPS[pattern_type].get(pattern_name, []))
 
-            # パターンの正規表現を取得
-            if pattern_type == "論理展開":
-                pattern_regex = '|'.join(LOGICAL_PATTERNS.get(pattern_name, []))
-            elif pattern_type == "感情表現":
-                pattern_regex = '|'.join(EMOTIONAL_PATTERNS.get(pattern_name, []))
-            else:
-                pattern_regex = '|'.join(STRUCTURAL_PATTERNS.get(pattern_name, []))
+                conn.execute("""
+                    INSERT INTO writing_patterns (pattern_type, pattern_name, pattern, examples)
+                    VALUES (?, ?, ?, ?)
+                """, (pattern_type, pattern_name, pattern_regex, examples_json))
 
-            conn.execute("""
-                INSERT INTO writing_patterns (pattern_type, pattern_name, pattern, examples)
-                VALUES (?, ?, ?, ?)
-            """, (pattern_type, pattern_name, pattern_regex, examples_json))
+                print(f"  保存: {pattern_type} > {pattern_name} ({count}回出現)")
 
-            print(f"  保存: {pattern_type} > {pattern_name} ({count}回出現)")
+        conn.executemany("""
+            INSERT INTO writing_pattern_stats
+                (dimension, key, pattern_type, pattern_name, occurrences, articles, scanned_articles)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (dimension, key, pattern_type, pattern_name, count,
+             summary["articles"][(dimension, key, pattern_type, pattern_name)],
+             summary["scanned"][(dimension, key)])
+            for (dimension, key, pattern_type, pattern_name), count in summary["occurrences"].items()
+        ])
 
-    conn.commit()
-    conn.close()
+        conn.commit()
 
-    print(f"\n✅ パターンをデータベースに保存しました")
+    print(f"\n✅ パターンをデータベースに保存しました（集計 {len(summary['occurrences'])}行）")
 
 
-def print_summary(analysis_results: Dict[str, Dict[str, Counter]]):
+def print_summary(summary: Dict):
     """分析結果のサマリーを表示"""
 
     print("\n📊 抽出パターンサマリー\n")
 
-    for pattern_type, data in analysis_results.items():
-        counter = data['counter']
-
+    for pattern_type, counter in pattern_counters(summary).items():
         print(f"## {pattern_type}")
 
         if counter:
@@ -303,17 +635,48 @@ def print_summary(analysis_results: Dict[str, Dict[str, Counter]]):
         print()
 
 
+def print_breakdown(summary: Dict, dimension: str, top: int = 3):
+    """
+    年別・カテゴリ別のパターン集計を表示
+
+    Args:
+        summary: analyze_corpus() の結果
+        dimension: year / category
+        top: パターン種別ごとに表示する上位件数
+    """
+    print(f"📊 {BREAKDOWN_DIMENSIONS[dimension]}パターン集計\n")
+
+    keys = [key for row_dimension, key in summary["scanned"] if row_dimension == dimension]
+
+    for key in sorted(keys, key=str):
+        print(f"## {key or '（カテゴリなし）'}（{summary['scanned'][(dimension, key)]}件）")
+
+        for pattern_type, counter in pattern_counters(summary, dimension, key).items():
+            top_patterns = " / ".join(f"{name} {count}回" for name, count in counter.most_common(top))
+            print(f"  {pattern_type}: {top_patterns or '（該当パターンなし）'}")
+
+        print()
+
+
 def main():
     parser = argparse.ArgumentParser(description="書き味パターン抽出")
 
     parser.add_argument("--min-elo", type=int, default=1500, help="最小ELOレーティング（デフォルト: 1500）")
-    parser.add_argument("--limit", type=int, default=100, help="分析対象記事数上限（デフォルト: 100）")
-    parser.add_argument("--summary-only", action="store_true", help="サマリーのみ表示（DBに保存しない）")
+    parser.add_argument("--limit", type=int, help="分析対象記事数上限（デフォルト: 全件）")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="並列プロセス数（デフォルト: CPU数、1 = 逐次処理）")
+    parser.add_argument("--breakdown", choices=sorted(BREAKDOWN_DIMENSIONS),
+                        help="年別・カテゴリ別の集計も表示する")
+    parser.add_argument("--summary-only", action="store_true",
+                        help="サマリーのみ表示（writing_patterns / writing_pattern_stats に保存しない）")
+    parser.add_argument("--pattern-budget-ms", type=float, default=PATTERN_BUDGET_MS,
+                        help=f"パターン1つ・記事1件あたりの処理時間の上限（デフォルト: {PATTERN_BUDGET_MS:g}ms）")
+    parser.add_argument("--root", help="プロジェクトルート（合成コーパスでの計測用）")
 
     args = parser.parse_args()
 
     # データベースパス
-    project_root = Path(__file__).parent.parent.parent
+    project_root = Path(args.root) if args.root else Path(__file__).parent.parent.parent
     db_path = project_root / "data" / "corpus" / "writing-corpus.db"
 
     if not db_path.exists():
@@ -321,17 +684,28 @@ def main():
         print("   先に migrate-to-sqlite.py を実行してください")
         return
 
+    # バックトラックで止まらなくなるパターンがあれば走査しない
+    problems = check_pattern_safety(args.pattern_budget_ms)
+    if problems:
+        for problem in problems:
+            print(f"❌ 遅いパターン: {problem}")
+        print("   scripts/bench/bench-patterns.py で確認し、パターンを修正してください")
+        return
+
     print("書き味パターン抽出を開始します...\n")
 
     # コーパス分析
-    analysis_results = analyze_corpus(db_path, min_elo=args.min_elo, limit=args.limit)
+    summary = analyze_corpus(db_path, min_elo=args.min_elo, limit=args.limit, jobs=args.jobs,
+                             budget_ms=args.pattern_budget_ms)
 
     # サマリー表示
-    print_summary(analysis_results)
+    print_summary(summary)
+    if args.breakdown:
+        print_breakdown(summary, args.breakdown)
 
     # データベースに保存
     if not args.summary_only:
-        save_patterns_to_db(db_path, analysis_results)
+        save_patterns_to_db(db_path, summary)
     else:
         print("（--summary-only が指定されたため、データベースには保存しません）")
 
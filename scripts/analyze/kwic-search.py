@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+用例検索（KWIC）: 書き味パターン・語句の出現を前後の文脈付きで一覧表示
+
+目的: 記事作成・レビュー時に、パターンや語句の実際の使われ方をコーパスから引く
+使い方: python3 kwic-search.py (--pattern NAME [--type TYPE] | --phrase TEXT | --list-patterns)
+            [--window N] [--category C] [--year Y] [--min-elo N] [--max-elo N]
+            [--page N] [--per-page N] [--no-total] [--sentence] [--json] [--root DIR]
+出力: 標準出力（KWIC一覧、--json でJSON）
+
+パターンの用例は extract-patterns.py が保存した出現位置（article_pattern_hits）から、
+語句の用例は trigram 索引（articles_trigram、migrate-to-sqlite.py --trigram で作成）で
+絞り込んだ記事から組み立てる（索引がなければ全記事を照合する。lib/concordance.py）。
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.concordance import TRIGRAM_MIN_CHARS, list_patterns, pattern_kwic, phrase_kwic
+from lib.corpus_db import connect, create_schema
+
+
+def format_line(line: dict, window: int) -> str:
+    """KWICの1行を表示用の文字列にする（改行は空白に置き換え、キーワードの位置を揃える）"""
+    left = line["left"].replace("\n", " ").rjust(window, "　")
+    right = line["right"].replace("\n", " ")
+    return (
+        f"{line['article_id']}  ELO{line['elo_rating']}  "
+        f"{left}【{line['keyword']}】{right}"
+    )
+
+
+def print_result(query: str, result: dict, window: int, sentence: bool = False):
+    """検索結果を表示"""
+    total = result["total"]
+    lines = result["lines"]
+
+    if not lines:
+        print(f"「{query}」: {total}件（表示範囲に用例なし、{result['elapsed_ms']:.1f}ms）")
+        return
+
+    first = result["offset"] + 1
+    scope = f"{total}件中 " if total is not None else ""
+    print(f"「{query}」: {scope}{first}–{first + len(lines) - 1}件目（{result['elapsed_ms']:.1f}ms）")
+    if result.get("indexed") is False:
+        if len(query) < TRIGRAM_MIN_CHARS:
+            print("⚠️  3文字未満の語句のため trigram 索引を使わずに検索しました")
+        else:
+            print("⚠️  trigram 索引がないため全記事を照合しました（migrate-to-sqlite.py --trigram で作成）")
+    print()
+
+    for line in lines:
+        print(format_line(line, window))
+        if sentence:
+            print(f"    └ {line['sentence']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用例検索（KWIC）")
+
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument("--pattern", help="パターン名（例: 極論前置き型）")
+    query.add_argument("--phrase", help="任意の語句")
+    query.add_argument("--list-patterns", action="store_true", help="検索できるパターンの一覧を表示")
+
+    parser.add_argument("--type", help="パターン種別（論理展開 / 感情表現 / 構造特徴）")
+    parser.add_argument("--window", type=int, default=20, help="前後に表示する文字数（デフォルト: 20）")
+    parser.add_argument("--category", help="カテゴリで絞り込む")
+    parser.add_argument("--year", type=int, help="年で絞り込む")
+    parser.add_argument("--min-elo", type=int, help="最小ELOレーティング")
+    parser.add_argument("--max-elo", type=int, help="最大ELOレーティング")
+    parser.add_argument("--page", type=int, default=1, help="ページ番号（デフォルト: 1）")
+    parser.add_argument("--per-page", type=int, default=20, help="1ページの件数（デフォルト: 20）")
+    parser.add_argument("--no-total", action="store_true",
+                        help="語句検索で総数を数えず、表示範囲が埋まった時点で打ち切る（頻出語句のページ送り用）")
+    parser.add_argument("--sentence", action="store_true",
+                        help="出現を含む文も表示（文の位置は segment-articles.py の保存結果を使う）")
+    parser.add_argument("--json", action="store_true", help="JSONで出力")
+    parser.add_argument("--root", help="プロジェクトルート（合成コーパスでの計測用）")
+
+    args = parser.parse_args()
+
+    # データベースパス
+    project_root = Path(args.root) if args.root else Path(__file__).parent.parent.parent
+    db_path = project_root / "data" / "corpus" / "writing-corpus.db"
+
+    if not db_path.exists():
+        print(f"❌ データベースが見つかりません: {db_path}")
+        print("   先に migrate-to-sqlite.py を実行してください")
+        return
+
+    if args.page < 1 or args.per_page < 1:
+        parser.error("--page と --per-page は1以上を指定してください")
+
+    conn = connect(db_path)
+    create_schema(conn)
+
+    try:
+        if args.list_patterns:
+            patterns = list_patterns(conn)
+            if args.json:
+                print(json.dumps([
+                    {"pattern_type": pattern_type, "pattern_name": pattern_name, "occurrences": occurrences}
+                    for pattern_type, pattern_name, occurrences in patterns
+                ], ensure_ascii=False, indent=2))
+            elif not patterns:
+                print("⚠️  パターンの出現位置がありません。先に extract-patterns.py を実行してください")
+            else:
+                for pattern_type, pattern_name, occurrences in patterns:
+                    print(f"{pattern_type} > {pattern_name}: {occurrences}件")
+            return
+
+        filters = {
+            "category": args.category,
+            "year": args.year,
+            "min_elo": args.min_elo,
+            "max_elo": args.max_elo
+        }
+        offset = (args.page - 1) * args.per_page
+
+        if args.pattern:
+            query_text = args.pattern
+            result = pattern_kwic(conn, args.pattern, pattern_type=args.type, window=args.window,
+                                  offset=offset, limit=args.per_page, sentences=args.sentence, **filters)
+        else:
+            query_text = args.phrase
+            result = phrase_kwic(conn, args.phrase, window=args.window, offset=offset, limit=args.per_page,
+                                 count_total=not args.no_total, sentences=args.sentence, **filters)
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps({"query": query_text, **result}, ensure_ascii=False, indent=2))
+    else:
+        print_result(query_text, result, args.window, args.sentence)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+書き味ルール検査: patterns.json の検出ルールで原稿をまとめて検査
+
+目的: note / zenn の原稿を保存のたびに検査し、NGワード・見出しの付け方などを行・列付きで示す
+使い方: python3 lint-style.py PATH... [--platform note|zenn] [--min-severity info|warning|error]
+            [--rules PATH] [--json]
+        （PATH はファイルかディレクトリ（配下の *.md）、- で標準入力）
+出力: 標準出力（「パス:行:列: 重要度 ルールID 「該当箇所」 説明」、--json でJSON）
+
+ルールは1回だけ読み込んで1つの照合器にコンパイルし（lib/style_lint.py）、全原稿に使う。
+--platform を省略した場合はパスに含まれる note / zenn から判断する。error が1件でもあれば終了コード 1。
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.style_lint import SEVERITY_LEVELS, load_ruleset
+from lib.style_rules import STYLE_PATTERNS_PATH
+
+
+# 重要度ごとの表示
+SEVERITY_MARKS = {"error": "❌", "warning": "⚠️", "info": "ℹ️"}
+
+# パスから判断するプラットフォーム
+PLATFORMS = ("note", "zenn")
+
+
+def iter_drafts(paths: List[str]) -> Iterator[Tuple[str, str]]:
+    """
+    検査する原稿を (表示用パス, 本文) で返す
+
+    Args:
+        paths: ファイル・ディレクトリ・-（標準入力）
+
+    Yields:
+        (表示用パス, 本文)
+    """
+    for path in paths:
+        if path == "-":
+            yield "<stdin>", sys.stdin.read()
+            continue
+
+        target = Path(path)
+        files = sorted(target.rglob("*.md")) if target.is_dir() else [target]
+        for file_path in files:
+            with open(file_path, "r", encoding="utf-8") as f:
+                yield str(file_path), f.read()
+
+
+def guess_platform(path: str) -> Optional[str]:
+    """パスの要素から note / zenn を判断（判断できなければ None）"""
+    parts = Path(path).parts
+    return next((platform for platform in PLATFORMS if platform in parts), None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="書き味ルール検査")
+
+    parser.add_argument("paths", nargs="+", help="原稿ファイル・ディレクトリ（- で標準入力）")
+    parser.add_argument("--platform", help="プラットフォーム（note / zenn。省略時はパスから判断）")
+    parser.add_argument("--min-severity", choices=list(SEVERITY_LEVELS), default="info",
+                        help="表示する最低の重要度（デフォルト: info）")
+    parser.add_argument("--rules", help="patterns.json のパス（デフォルト: data/corpus/style_patterns/patterns.json）")
+    parser.add_argument("--json", action="store_true", help="JSONで出力")
+
+    args = parser.parse_args()
+
+    rules_path = Path(args.rules) if args.rules else Path(__file__).parent.parent.parent / STYLE_PATTERNS_PATH
+    if not rules_path.exists():
+        print(f"❌ ルールファイルが見つかりません: {rules_path}")
+        return
+
+    started = time.perf_counter()
+    ruleset = load_ruleset(rules_path)
+    compiled_ms = (time.perf_counter() - started) * 1000
+
+    results = []
+    started = time.perf_counter()
+    for path, text in iter_drafts(args.paths):
+        platform = args.platform or guess_platform(path)
+        results.append({"path": path, "findings": ruleset.lint(text, platform, args.min_severity)})
+    linted_ms = (time.perf_counter() - started) * 1000
+
+    counts = {severity: 0 for severity in SEVERITY_LEVELS}
+    for result in results:
+        for finding in result["findings"]:
+            counts[finding["severity"]] = counts.get(finding["severity"], 0) + 1
+
+    if args.json:
+        print(json.dumps({"version": ruleset.version, "results": results}, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            for finding in result["findings"]:
+                mark = SEVERITY_MARKS.get(finding["severity"], "")
+                match = f" 「{finding['match'].strip()}」" if finding["match"].strip() else ""
+                print(f"{result['path']}:{finding['line']}:{finding['column']}: {mark} {finding['severity']} "
+                      f"{finding['rule']}{match} {finding['message']}")
+
+        summary = " / ".join(f"{severity} {counts[severity]}" for severity in reversed(list(SEVERITY_LEVELS)))
+        print(f"\n📊 {len(results)}件の原稿を検査: {summary}"
+              f"（ルール {ruleset.version}、コンパイル {compiled_ms:.1f}ms / 検査 {linted_ms:.1f}ms）")
+
+    if counts["error"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,42 @@
 FC2記事をリライト判断基準に基づいてスコアリングする
 
 目的: metadata.jsonの全記事にrewrite_scoreを付与
-使い方: python3 score-articles.py
-出力: metadata.jsonを更新、候補リストJSONを生成
+使い方: python3 score-articles.py [--db] [--no-json-export] [--engine auto|numpy|python] [--root DIR]
+出力: メタデータストアの該当レコードを更新（metadata.jsonも再出力）、候補リストJSONを生成
+
+スコアリングは score_articles_batch() で列単位にまとめて計算する（NumPyがあれば配列演算、
+なければ純Python）。結果は記事ごとの score_article() と同一。
+
+リスク軸はタイトル判定に加え、本文を RISK_KEYWORDS のオートマトン（lib/aho_corasick.py）で
+1回走査して減点する。キーワードごとの出現回数は監査用に rewrite_status.risk_hits
+（--db では articles.risk_hits）へ保存する。
+
+--db を指定すると metadata.json を経由せず writing-corpus.db の articles を直接採点し、
+スコアが変わった行だけを UPDATE する。候補リストもDBへのクエリから生成する。
+同じ採点結果をメタデータストア（と metadata.json）にも書き戻すので、
+その後の migrate-to-sqlite.py --incremental でスコアが戻ることはない。
 """
 
+import argparse
 import json
 import re
+import sqlite3
+import sys
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib import corpus_db
+from lib.aho_corasick import KeywordAutomaton
+from lib.article_parser import split_frontmatter
+from lib.metadata_store import MetadataStore
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 # カテゴリ別基準スコア（経験則ベース）
@@ -33,6 +60,47 @@ CATEGORY_BASE_SCORES = {
     None: {"時代性": 10, "普遍性": 8, "エンタメ性": 8, "リライト工数": 8, "リスク": 7}
 }
 
+# 評価軸（detail_scores のキー順）
+SCORE_AXES = ("時代性", "普遍性", "エンタメ性", "リライト工数", "リスク")
+
+# タイトルに含まれるとリスク減点するキーワード
+TITLE_RISK_KEYWORDS = ["政治", "速報", "通知", "募集", "告知"]
+
+# 本文に含まれるとリスク減点するキーワード（分類 → キーワード）
+RISK_KEYWORDS = {
+    "政治": [
+        "政治", "選挙", "政権", "政党", "自民党", "民主党", "首相", "総理", "内閣", "国会",
+        "原発", "憲法", "右翼", "左翼", "与党", "野党"
+    ],
+    "個人情報": [
+        "本名", "住所", "電話番号", "メールアドレス", "勤務先", "生年月日", "実家", "最寄り駅"
+    ],
+    "医療": [
+        "精神病", "精神科", "心療内科", "うつ病", "鬱病", "統合失調症", "発達障害",
+        "入院", "通院", "服薬", "処方", "診断", "手術", "病院", "自殺"
+    ]
+}
+
+# 本文リスクの減点: 出現した分類ごとに1点、同じ分類の出現が合計この回数以上なら2点
+RISK_HEAVY_HITS = 3
+
+RISK_CATEGORY_BY_KEYWORD = {
+    keyword: risk_category for risk_category, keywords in RISK_KEYWORDS.items() for keyword in keywords
+}
+RISK_AUTOMATON = KeywordAutomaton(RISK_CATEGORY_BY_KEYWORD)
+
+# カテゴリで決まるリライトタイプ（ここにないカテゴリは年代で判定）
+REWRITE_TYPE_BY_CATEGORY = {
+    "考察": "哲学昇華型",
+    "TRPG": "哲学昇華型",
+    "ＴＲＰＧ": "哲学昇華型",
+    "東方二次創作": "文化史抽出型",
+    "東方二次創作ゲームレビュー": "文化史抽出型",
+    "レビュー": "文化史抽出型",
+    "徒然": "タイムカプセル型",
+    "報告": "タイムカプセル型"
+}
+
 
 def calculate_base_score(article: Dict) -> Dict[str, int]:
     """
@@ -94,31 +162,68 @@ def adjust_score_by_year(scores: Dict[str, int], year: int) -> Dict[str, int]:
     return scores
 
 
+def scan_risk_hits(content: str) -> List[Dict]:
+    """
+    本文のリスクキーワードを1回の走査で数える
+
+    Args:
+        content: 記事本文
+
+    Returns:
+        出現したキーワードの category / keyword / count（RISK_KEYWORDS の順）
+    """
+    counts = RISK_AUTOMATON.count(content)
+
+    return [
+        {"category": RISK_CATEGORY_BY_KEYWORD[keyword], "keyword": keyword, "count": counts[keyword]}
+        for keyword in RISK_AUTOMATON.keywords
+        if keyword in counts
+    ]
+
+
+def body_risk_penalty(risk_hits: List[Dict]) -> int:
+    """
+    本文リスクの減点を算出
+
+    Args:
+        risk_hits: scan_risk_hits() の結果
+
+    Returns:
+        減点（分類ごとに1点、出現が RISK_HEAVY_HITS 回以上の分類は2点）
+    """
+    totals = {}
+    for hit in risk_hits:
+        totals[hit["category"]] = totals.get(hit["category"], 0) + hit["count"]
+
+    return sum(2 if total >= RISK_HEAVY_HITS else 1 for total in totals.values())
+
+
 def detect_risk_patterns(article: Dict, content: str = None) -> int:
     """
-    リスクパターンを検出（簡易版）
+    リスクパターンを検出
 
     Args:
         article: 記事メタデータ
-        content: 記事本文（オプション）
+        content: 記事本文（オプション。指定時は本文のリスクキーワードで減点）
 
     Returns:
         リスクスコア（0-10点、高いほど安全）
     """
     title = article.get("title", "")
 
-    # タイトルベースの簡易判定
-    risk_keywords = ["政治", "速報", "通知", "募集", "告知"]
-
-    for keyword in risk_keywords:
-        if keyword in title:
-            return 6  # 若干リスク減点
+    if any(keyword in title for keyword in TITLE_RISK_KEYWORDS):
+        # タイトルベースの簡易判定
+        risk = 6  # 若干リスク減点
+    elif article.get("year") == 2023 and "Hello world" in title:
+        # 2023年のHello world!は明確な削除対象
+        risk = 10  # リスクはないが価値もない
+    else:
+        risk = 8  # デフォルト
 
-    # 2023年のHello world!は明確な削除対象
-    if article.get("year") == 2023 and "Hello world" in title:
-        return 10  # リスクはないが価値もない
+    if content:
+        risk = max(0, risk - body_risk_penalty(scan_risk_hits(content)))
 
-    return 8  # デフォルト
+    return risk
 
 
 def calculate_total_score(scores: Dict[str, int]) -> int:
@@ -152,29 +257,26 @@ def determine_rewrite_type(article: Dict, total_score: int) -> str:
     year = article.get("year", 2010)
 
     # カテゴリベースの判定
-    if category in ["考察", "TRPG", "ＴＲＰＧ"]:
-        return "哲学昇華型"
-    elif category in ["東方二次創作", "東方二次創作ゲームレビュー", "レビュー"]:
-        return "文化史抽出型"
-    elif category in ["徒然", "報告"]:
+    if category in REWRITE_TYPE_BY_CATEGORY:
+        return REWRITE_TYPE_BY_CATEGORY[category]
+
+    # 年代で判定
+    if year <= 2010:
         return "タイムカプセル型"
     else:
-        # 年代で判定
-        if year <= 2010:
-            return "タイムカプセル型"
-        else:
-            return "文化史抽出型"
+        return "文化史抽出型"
 
 
-def score_article(article: Dict) -> Dict:
+def score_article(article: Dict, content: str = None) -> Dict:
     """
     1つの記事をスコアリング
 
     Args:
         article: 記事メタデータ
+        content: 記事本文（オプション。指定時は本文のリスク判定も行う）
 
     Returns:
-        スコア情報を含む辞書
+        スコア情報を含む辞書（risk_hits は本文を指定した場合のみ）
     """
     # 基準スコア取得
     scores = calculate_base_score(article)
@@ -183,8 +285,9 @@ def score_article(article: Dict) -> Dict:
     scores = adjust_score_by_word_count(scores, article.get("word_count", 0))
     scores = adjust_score_by_year(scores, article.get("year", 2010))
 
-    # リスク判定
-    scores["リスク"] = detect_risk_patterns(article)
+    # リスク判定（本文は1回だけ走査し、出現回数も返す）
+    risk_hits = scan_risk_hits(content) if content is not None else None
+    scores["リスク"] = max(0, detect_risk_patterns(article) - body_risk_penalty(risk_hits or []))
 
     # 総合スコア
     total_score = calculate_total_score(scores)
@@ -195,16 +298,199 @@ def score_article(article: Dict) -> Dict:
     return {
         "total_score": total_score,
         "detail_scores": scores,
-        "rewrite_type": rewrite_type
+        "rewrite_type": rewrite_type,
+        "risk_hits": risk_hits
     }
 
 
-def classify_articles(articles: List[Dict]) -> Dict[str, List[str]]:
+def load_score_columns(articles: Iterable[Dict], project_root: Optional[Path] = None) -> Dict[str, List]:
+    """
+    スコアリングに使う列を記事から取り出す
+
+    project_root を指定すると元ファイルの本文を1件ずつ読んでリスクキーワードを数える
+    （本文そのものは保持しない）。元ファイルがない記事の risk_hits は None。
+
+    Args:
+        articles: 全記事リスト（MetadataStore も可）
+        project_root: source_path の基準ディレクトリ（オプション）
+
+    Returns:
+        id / category / word_count / year / title（と risk_hits）の列
+    """
+    columns = {"id": [], "category": [], "word_count": [], "year": [], "title": []}
+    if project_root is not None:
+        columns["risk_hits"] = []
+
+    for article in articles:
+        columns["id"].append(article["id"])
+        columns["category"].append(article.get("category"))
+        columns["word_count"].append(article.get("word_count", 0))
+        columns["year"].append(article.get("year"))
+        columns["title"].append(article.get("title", ""))
+
+        if project_root is not None:
+            source_file = project_root / article["corpus_metadata"]["source_path"]
+            if source_file.exists():
+                _, body = split_frontmatter(source_file.read_text(encoding="utf-8"))
+                columns["risk_hits"].append(scan_risk_hits(body))
+            else:
+                columns["risk_hits"].append(None)
+
+    return columns
+
+
+def title_risk_scores(titles: List[str], years: List[Optional[int]]) -> List[int]:
+    """detect_risk_patterns() のタイトル判定を全記事分まとめて行う"""
+    keyword_pattern = re.compile("|".join(re.escape(keyword) for keyword in TITLE_RISK_KEYWORDS))
+
+    risks = []
+    for title, year in zip(titles, years):
+        if keyword_pattern.search(title):
+            risks.append(6)
+        elif year == 2023 and "Hello world" in title:
+            risks.append(10)
+        else:
+            risks.append(8)
+
+    return risks
+
+
+def score_articles_batch(columns: Dict[str, List], engine: str = "auto") -> List[Dict]:
+    """
+    全記事を列単位でまとめてスコアリング
+
+    カテゴリごとの基準スコアを表引きし、文字数・年代の調整を列全体に適用する。
+    結果は各記事に score_article() を適用したものと同一
+    （year が None の記事は year なしと同様に 2010 として扱う）。
+
+    Args:
+        columns: load_score_columns() の結果
+        engine: auto（NumPyがあれば使う）/ numpy / python
+
+    Returns:
+        記事順の total_score / detail_scores / rewrite_type / risk_hits
+    """
+    if engine == "auto":
+        engine = "numpy" if np is not None else "python"
+    if engine == "numpy" and np is None:
+        raise RuntimeError("NumPy がインストールされていません（--engine python を使ってください）")
+
+    # カテゴリを通し番号にし、基準スコア（リスク以外の4軸）とリライトタイプを表にする
+    category_index = {}
+    base_table = []
+    type_table = []
+    codes = []
+    for category in columns["category"]:
+        code = category_index.get(category)
+        if code is None:
+            code = category_index[category] = len(base_table)
+            base = CATEGORY_BASE_SCORES.get(category, CATEGORY_BASE_SCORES[None])
+            base_table.append([base[axis] for axis in SCORE_AXES[:4]])
+            type_table.append(REWRITE_TYPE_BY_CATEGORY.get(category))
+        codes.append(code)
+
+    years = [2010 if year is None else year for year in columns["year"]]
+    risks = title_risk_scores(columns["title"], columns["year"])
+    risk_hits_column = columns.get("risk_hits") or [None] * len(codes)
+    risks = [
+        risk if risk_hits is None else max(0, risk - body_risk_penalty(risk_hits))
+        for risk, risk_hits in zip(risks, risk_hits_column)
+    ]
+
+    if engine == "numpy":
+        axis_columns = _adjust_scores_numpy(codes, base_table, columns["word_count"], years, risks)
+    else:
+        axis_columns = _adjust_scores_python(codes, base_table, columns["word_count"], years, risks)
+
+    era_axis, universality_axis, entertainment_axis, workload_axis, risk_axis = SCORE_AXES
+
+    results = []
+    for code, year, risk_hits, era, universality, entertainment, workload, risk in zip(
+            codes, years, risk_hits_column, *axis_columns):
+        total_score = era + universality + entertainment + workload + risk
+
+        if total_score < 70:
+            rewrite_type = None
+        elif type_table[code] is not None:
+            rewrite_type = type_table[code]
+        else:
+            rewrite_type = "タイムカプセル型" if year <= 2010 else "文化史抽出型"
+
+        results.append({
+            "total_score": total_score,
+            "detail_scores": {
+                era_axis: era,
+                universality_axis: universality,
+                entertainment_axis: entertainment,
+                workload_axis: workload,
+                risk_axis: risk
+            },
+            "rewrite_type": rewrite_type,
+            "risk_hits": risk_hits
+        })
+
+    return results
+
+
+def _adjust_scores_numpy(codes, base_table, word_counts, years, risks) -> List[List[int]]:
+    """文字数・年代の調整をNumPyの配列演算で行い、5軸の列を返す"""
+    base = np.array(base_table, dtype=np.int64)[np.array(codes, dtype=np.intp)]
+    era, universality, entertainment, workload = base.T
+    word_count = np.array(word_counts, dtype=np.int64)
+    year = np.array(years, dtype=np.int64)
+
+    # adjust_score_by_word_count
+    short = word_count < 300
+    long = word_count > 2000
+    entertainment = np.where(short, np.maximum(0, entertainment - 4),
+                             np.where(long, np.minimum(20, entertainment + 2), entertainment))
+    workload = np.where(short, np.maximum(0, workload - 3),
+                        np.where(long, np.maximum(0, workload - 2), workload))
+
+    # adjust_score_by_year
+    anomaly = year == 2023
+    old = ~anomaly & (year <= 2009)
+    era = np.where(anomaly, 0, np.where(old, np.minimum(30, era + 3), era))
+    universality = np.where(anomaly, 0, universality)
+    entertainment = np.where(anomaly, 0, entertainment)
+
+    return [era.tolist(), universality.tolist(), entertainment.tolist(), workload.tolist(), risks]
+
+
+def _adjust_scores_python(codes, base_table, word_counts, years, risks) -> List[List[int]]:
+    """_adjust_scores_numpy() と同じ調整を純Pythonで行う"""
+    axis_columns = [[], [], [], [], risks]
+    era_column, universality_column, entertainment_column, workload_column, _ = axis_columns
+
+    for code, word_count, year in zip(codes, word_counts, years):
+        era, universality, entertainment, workload = base_table[code]
+
+        if word_count < 300:
+            entertainment = max(0, entertainment - 4)
+            workload = max(0, workload - 3)
+        elif word_count > 2000:
+            entertainment = min(20, entertainment + 2)
+            workload = max(0, workload - 2)
+
+        if year == 2023:
+            era = universality = entertainment = 0
+        elif year <= 2009:
+            era = min(30, era + 3)
+
+        era_column.append(era)
+        universality_column.append(universality)
+        entertainment_column.append(entertainment)
+        workload_column.append(workload)
+
+    return axis_columns
+
+
+def classify_articles(articles: Iterable[Dict]) -> Dict[str, List[str]]:
     """
     記事をスコア別に分類
 
     Args:
-        articles: 全記事リスト
+        articles: 全記事リスト（MetadataStore も可）
 
     Returns:
         分類結果辞書
@@ -238,54 +524,110 @@ def classify_articles(articles: List[Dict]) -> Dict[str, List[str]]:
     }
 
 
-def main():
-    """メイン処理"""
-    project_root = Path(__file__).parent.parent.parent
-    metadata_file = project_root / "data" / "corpus" / "metadata.json"
-    processed_dir = project_root / "data" / "processed"
-
-    # 出力ディレクトリ作成
-    processed_dir.mkdir(parents=True, exist_ok=True)
+# 候補リストの分類（classify_articles() と同じ境界）
+CANDIDATE_BANDS = {
+    "rewrite": "rewrite_score >= 70",
+    "review": "rewrite_score >= 50 AND rewrite_score < 70",
+    "archive": "rewrite_score >= 30 AND rewrite_score < 50",
+    "deletion": "rewrite_score < 30"
+}
 
-    # metadata.json読み込み
-    with metadata_file.open('r', encoding='utf-8') as f:
-        metadata = json.load(f)
 
-    articles = metadata["articles"]
+def score_database(conn: sqlite3.Connection, engine: str = "auto",
+                   store: Optional[MetadataStore] = None) -> Dict[str, int]:
+    """
+    articles を直接採点し、スコアが変わった行だけを更新
 
-    print(f"スコアリング開始: {len(articles)}件")
+    採点に使う列・現在のスコア・本文を1回のSELECTで走査する。本文はその場で
+    リスクキーワードを数えて捨てるため、全件の本文をメモリに載せない。
 
-    # 全記事をスコアリング
-    for i, article in enumerate(articles, 1):
-        score_info = score_article(article)
+    Args:
+        conn: データベース接続（corpus_db.connect() で開いたもの）
+        engine: score_articles_batch() の実装
+        store: 同じ採点結果を書き戻すメタデータストア（差分移行でDBのスコアが戻らないようにする）
 
-        # metadata更新
-        article["rewrite_status"]["rewrite_score"] = score_info["total_score"]
-        article["rewrite_status"]["rewrite_type"] = score_info["rewrite_type"]
-        article["rewrite_status"]["detail_scores"] = score_info["detail_scores"]
+    Returns:
+        scored / updated / store_updated の件数
+    """
+    columns = {"id": [], "category": [], "word_count": [], "year": [], "title": [], "risk_hits": []}
+    current = []
+
+    cursor = conn.execute("""
+        SELECT id, category, word_count, year, title, content,
+               rewrite_score, rewrite_type, detail_scores, risk_hits
+        FROM articles
+    """)
+    for row in cursor:
+        columns["id"].append(row[0])
+        columns["category"].append(row[1])
+        columns["word_count"].append(row[2])
+        columns["year"].append(row[3])
+        columns["title"].append(row[4])
+        columns["risk_hits"].append(scan_risk_hits(corpus_db.decompress_content(row[5]) or ""))
+        current.append(row[6:])
+
+    results = score_articles_batch(columns, engine)
+
+    updates = []
+    store_updated = 0
+    for article_id, stored, score_info in zip(columns["id"], current, results):
+        if store is not None and article_id in store:
+            store_updated += store.patch(article_id, {
+                "rewrite_status": {
+                    "rewrite_score": score_info["total_score"],
+                    "rewrite_type": score_info["rewrite_type"],
+                    "detail_scores": score_info["detail_scores"],
+                    "risk_hits": score_info["risk_hits"]
+                }
+            })
+
+        values = (
+            score_info["total_score"],
+            score_info["rewrite_type"],
+            corpus_db.encode_detail_scores(score_info["detail_scores"]),
+            corpus_db.encode_risk_hits(score_info["risk_hits"])
+        )
+        if stored != values:
+            updates.append(values + (article_id,))
+
+    with conn:
+        conn.executemany("""
+            UPDATE articles
+            SET rewrite_score = ?, rewrite_type = ?, detail_scores = ?, risk_hits = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, updates)
+
+    return {"scored": len(columns["id"]), "updated": len(updates), "store_updated": store_updated}
+
+
+def classify_database(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """
+    articles をスコア別に分類（classify_articles() のDB版、並びは metadata と同じ file_path 順）
 
-        if i % 100 == 0:
-            print(f"処理中... {i}/{len(articles)}")
+    Args:
+        conn: データベース接続
 
-    print(f"\nスコアリング完了: {len(articles)}件")
+    Returns:
+        分類結果辞書
+    """
+    return {
+        name: [row[0] for row in conn.execute(f"SELECT id FROM articles WHERE {condition} ORDER BY file_path")]
+        for name, condition in CANDIDATE_BANDS.items()
+    }
 
-    # 分類
-    classification = classify_articles(articles)
 
+def report_classification(classification: Dict[str, List[str]]):
+    """分類結果を表示"""
     print(f"\n📊 分類結果:")
     print(f"  ✅ リライト確定: {len(classification['rewrite'])}件")
     print(f"  ⏸️  保留: {len(classification['review'])}件")
     print(f"  📦 アーカイブ: {len(classification['archive'])}件")
     print(f"  🗑️  削除候補: {len(classification['deletion'])}件")
 
-    # metadata.json保存
-    metadata["generated_at"] = datetime.now().isoformat()
-    with metadata_file.open('w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
 
-    print(f"\n✅ metadata.json を更新しました")
-
-    # 候補リスト保存
+def save_candidate_lists(processed_dir: Path, classification: Dict[str, List[str]]):
+    """候補リストJSONを保存"""
     candidates_files = {
         "rewrite-candidates.json": classification["rewrite"],
         "review-candidates.json": classification["review"],
@@ -300,5 +642,108 @@ def main():
         print(f"  - {filename}: {len(article_ids)}件")
 
 
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="FC2記事のリライトスコアリング")
+
+    parser.add_argument("--db", action="store_true",
+                        help="writing-corpus.db を直接採点する（結果はメタデータストアにも書き戻す）")
+    parser.add_argument("--no-json-export", action="store_true",
+                        help="メタデータストアのみ更新し、互換用の metadata.json を書き出さない")
+    parser.add_argument("--engine", choices=["auto", "numpy", "python"], default="auto",
+                        help="一括スコアリングの実装（デフォルト: NumPyがあれば numpy）")
+    parser.add_argument("--root", help="プロジェクトルート（合成コーパスでの計測用）")
+
+    args = parser.parse_args()
+
+    project_root = Path(args.root) if args.root else Path(__file__).parent.parent.parent
+    corpus_dir = project_root / "data" / "corpus"
+    processed_dir = project_root / "data" / "processed"
+
+    # 出力ディレクトリ作成
+    processed_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.db:
+        db_path = corpus_dir / "writing-corpus.db"
+        if not db_path.exists():
+            print(f"❌ データベースが見つかりません: {db_path}")
+            print("   先に migrate-to-sqlite.py を実行してください")
+            return
+
+        store = MetadataStore.open(corpus_dir)
+        conn = corpus_db.connect(db_path)
+        try:
+            corpus_db.create_schema(conn)
+
+            started = time.perf_counter()
+            counts = score_database(conn, args.engine, store)
+            print(f"スコアリング完了: {counts['scored']}件（更新 {counts['updated']}件、"
+                  f"{time.perf_counter() - started:.2f}秒）")
+
+            classification = classify_database(conn)
+        finally:
+            conn.close()
+
+        report_classification(classification)
+
+        # 差分移行でDBのスコアが metadata の古い値に戻らないよう、ストアにも同じ結果を残す
+        if counts["store_updated"]:
+            store.update_header(generated_at=datetime.now().isoformat())
+            store.flush()
+            if not args.no_json_export:
+                store.export_json()
+            print(f"\n✅ メタデータストアにも反映しました（{counts['store_updated']}件）")
+        store.close()
+        save_candidate_lists(processed_dir, classification)
+        return
+
+    # メタデータストアを開く（全件はメモリに載せない）
+    store = MetadataStore.open(corpus_dir)
+
+    print(f"スコアリング開始: {len(store)}件")
+
+    # 全記事を一括でスコアリング
+    started = time.perf_counter()
+    columns = load_score_columns(store, project_root)
+    results = score_articles_batch(columns, args.engine)
+    engine = args.engine if args.engine != "auto" else ("numpy" if np is not None else "python")
+    print(f"スコア計算: {len(results)}件（{engine}、{time.perf_counter() - started:.2f}秒）")
+
+    # 値が変わったレコードだけ書き換える
+    updated_count = 0
+    for i, (article_id, score_info) in enumerate(zip(columns["id"], results), 1):
+        changed = store.patch(article_id, {
+            "rewrite_status": {
+                "rewrite_score": score_info["total_score"],
+                "rewrite_type": score_info["rewrite_type"],
+                "detail_scores": score_info["detail_scores"],
+                "risk_hits": score_info["risk_hits"]
+            }
+        })
+        updated_count += changed
+
+        if i % 100 == 0:
+            print(f"処理中... {i}/{len(store)}")
+
+    print(f"\nスコアリング完了: {len(store)}件（更新 {updated_count}件）")
+
+    # 分類
+    classification = classify_articles(store)
+
+    report_classification(classification)
+
+    # メタデータ保存
+    store.update_header(generated_at=datetime.now().isoformat())
+    store.flush()
+
+    if not args.no_json_export:
+        store.export_json()
+        print(f"\n✅ metadata.json を更新しました")
+    store.close()
+
+    # 候補リスト保存
+    save_candidate_lists(processed_dir, classification)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+文・段落の分割: 記事本文の文・段落の位置を求めて text_segments に保存
+
+目的: 文頭・段落単位で見る分析が本文を毎回分割し直さないよう、分割結果を本文ハッシュごとに1回だけ作る
+使い方: python3 segment-articles.py [--force] [--limit N] [--root DIR]
+出力: writing-corpus.db の text_segments（本文ハッシュ → 文・段落の位置のJSON）
+
+保存済みで分割規則の版（lib/segmenter.py の SEGMENTER_VERSION）が同じ本文は読まない。
+どの記事からも参照されなくなった本文ハッシュの行は削除する。
+読み出しは lib/segmenter.py の load_segments() / article_segments()。
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.corpus_db import connect, create_schema, decompress_content
+from lib.segmenter import SEGMENTER_VERSION, encode_spans, segment_text
+
+
+# 1トランザクションで保存する本文の数
+SEGMENT_BATCH_SIZE = 500
+
+
+def update_segments(conn: sqlite3.Connection, force: bool = False, limit: Optional[int] = None) -> Dict:
+    """
+    text_segments を articles の本文について最新にする
+
+    Args:
+        conn: データベース接続
+        force: 保存済みの本文も分割し直す
+        limit: 分割する本文数上限（None の場合は全件）
+
+    Returns:
+        pending / segmented / pruned / sentences / paragraphs の件数
+    """
+    with conn:
+        pruned = conn.execute("""
+            DELETE FROM text_segments
+            WHERE content_hash NOT IN (SELECT content_hash FROM articles WHERE content_hash IS NOT NULL)
+        """).rowcount
+
+    # 分割が必要な本文ハッシュと、それを読む記事（同じ本文の記事は1件だけ読む）
+    pending = conn.execute(f"""
+        SELECT a.content_hash, MIN(a.rowid)
+        FROM articles a
+        LEFT JOIN text_segments t ON t.content_hash = a.content_hash AND t.segmenter_version = ?
+        WHERE a.content_hash IS NOT NULL AND a.content != ''{'' if force else ' AND t.content_hash IS NULL'}
+        GROUP BY a.content_hash
+        ORDER BY MIN(a.rowid)
+        LIMIT ?
+    """, (SEGMENTER_VERSION, -1 if limit is None else limit)).fetchall()
+
+    counts = {"pending": len(pending), "segmented": 0, "pruned": pruned, "sentences": 0, "paragraphs": 0}
+
+    for i in range(0, len(pending), SEGMENT_BATCH_SIZE):
+        batch = pending[i:i + SEGMENT_BATCH_SIZE]
+        rows = []
+        for content_hash, content in conn.execute(f"""
+            SELECT content_hash, content FROM articles WHERE rowid IN ({', '.join('?' * len(batch))})
+        """, [rowid for _, rowid in batch]):
+            sentences, paragraphs = segment_text(decompress_content(content) or "")
+            rows.append((content_hash, SEGMENTER_VERSION, encode_spans(sentences), encode_spans(paragraphs)))
+            counts["sentences"] += len(sentences)
+            counts["paragraphs"] += len(paragraphs)
+
+        with conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO text_segments (content_hash, segmenter_version, sentences, paragraphs)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+
+        counts["segmented"] += len(rows)
+        if (i // SEGMENT_BATCH_SIZE + 1) % 10 == 0:
+            print(f"  処理中... {counts['segmented']}/{len(pending)}")
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文・段落の分割: 記事本文の文・段落の位置を保存")
+
+    parser.add_argument("--force", action="store_true", help="保存済みの本文も分割し直す")
+    parser.add_argument("--limit", type=int, help="分割する本文数上限（デフォルト: 全件）")
+    parser.add_argument("--root", help="プロジェクトルート（合成コーパスでの計測用）")
+
+    args = parser.parse_args()
+
+    # データベースパス
+    project_root = Path(args.root) if args.root else Path(__file__).parent.parent.parent
+    db_path = project_root / "data" / "corpus" / "writing-corpus.db"
+
+    if not db_path.exists():
+        print(f"❌ データベースが見つかりません: {db_path}")
+        print("   先に migrate-to-sqlite.py を実行してください")
+        return
+
+    conn = connect(db_path)
+    create_schema(conn)
+
+    started = time.perf_counter()
+    try:
+        counts = update_segments(conn, force=args.force, limit=args.limit)
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ 文・段落の分割: {counts['segmented']}件（削除 {counts['pruned']}件、{elapsed:.1f}秒）")
+    if counts["segmented"]:
+        print(f"📊 1件あたり 文 {counts['sentences'] / counts['segmented']:.1f} / "
+              f"段落 {counts['paragraphs'] / counts['segmented']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+パターン辞書の正規表現を計測し、遅いパターン・無意味なパターンを見つける
+
+目的: 手で編集するパターン辞書（extract-patterns.py の lib/pattern_dictionaries.py と
+      data/corpus/style_patterns/patterns.json）を出荷前に確認する
+使い方: python3 bench-patterns.py [--source all|dictionaries|style] [--limit N]
+            [--budget-ms MS] [--probe-budget-ms MS] [--probe-timeout SEC] [--frequent-ratio R]
+            [--json] [--root DIR]
+出力: 標準出力（パターンごとのヒット数・出現記事数・記事あたりの平均／最悪時間と判定、--json でJSON）
+
+判定:
+    ❌ バックトラック: 一致しない入力での実測が予算超過・時間切れ・超線形（コーパスでの計測は省く）
+    ❌ 予算超過: 記事1件あたりの最悪時間が --budget-ms を超えた
+    ⚠️ 構文リスク: 量指定子の入れ子など、構文上バックトラックの恐れがある
+    ⚠️ 未一致: 計測した記事のどれにもマッチしない
+    ⚠️ 高頻度: 計測した記事の --frequent-ratio 以上にマッチする
+❌ が1つでもあれば終了コード 1。合成コーパス（本文に辞書の語句・箇条書き・見出しを混ぜたもの）で確かめる場合:
+    python3 scripts/bench/generate-synthetic-corpus.py --root /tmp/synthetic-corpus --count 100000
+    python3 scripts/export/migrate-to-sqlite.py --bulk --root /tmp/synthetic-corpus
+    python3 scripts/bench/bench-patterns.py --root /tmp/synthetic-corpus
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.corpus_db import connect, create_schema, decompress_content
+from lib.pattern_dictionaries import PATTERN_GROUPS
+from lib.regex_bench import probe_backtracking, static_risks, time_patterns
+from lib.style_rules import STYLE_PATTERNS_PATH, load_style_rules
+
+
+# パターン辞書の出典
+SOURCES = ("dictionaries", "style")
+
+
+def collect_patterns(project_root: Path, source: str) -> List[Dict]:
+    """
+    計測するパターンを集める
+
+    Args:
+        project_root: プロジェクトルート（patterns.json の場所）
+        source: all / dictionaries / style
+
+    Returns:
+        source / group / name / regex の辞書のリスト（定義順）
+    """
+    patterns = []
+
+    if source in ("all", "dictionaries"):
+        for pattern_type, pattern_dict in PATTERN_GROUPS.items():
+            for pattern_name, regexes in pattern_dict.items():
+                for regex in regexes:
+                    patterns.append({"source": "dictionaries", "group": pattern_type,
+                                     "name": pattern_name, "regex": regex})
+
+    if source in ("all", "style"):
+        style_path = project_root / STYLE_PATTERNS_PATH
+        if not style_path.exists():
+            # 合成コーパスのルートには patterns.json がないのでリポジトリのものを使う
+            style_path = Path(__file__).resolve().parent.parent.parent / STYLE_PATTERNS_PATH
+        for rule in load_style_rules(style_path)["rules"]:
+            for regex in rule["regexes"]:
+                patterns.append({"source": "style", "group": rule["group"],
+                                 "name": rule["name"], "regex": regex})
+
+    return patterns
+
+
+def iter_articles(db_path: Path, limit: Optional[int]) -> Iterator[Tuple[str, str]]:
+    """計測に使う記事の (ID, 本文) を rowid 順に返す"""
+    conn = connect(db_path)
+    create_schema(conn)
+
+    try:
+        for article_id, content in conn.execute(
+            "SELECT id, content FROM articles WHERE content IS NOT NULL AND content != '' ORDER BY rowid LIMIT ?",
+            (-1 if limit is None else limit,)
+        ):
+            yield article_id, decompress_content(content)
+    finally:
+        conn.close()
+
+
+def judge(pattern: Dict, scanned: int, budget_ms: float, frequent_ratio: float) -> List[str]:
+    """計測結果から判定（❌ / ⚠️ 付きの説明）のリストを作る"""
+    verdicts = []
+
+    if pattern["probe"]["problem"]:
+        verdicts.append(f"❌ バックトラック: {pattern['probe']['problem']}")
+    for risk in pattern["risks"]:
+        verdicts.append(f"⚠️ 構文リスク: {risk}")
+
+    timing = pattern.get("timing")
+    if timing is None:
+        return verdicts
+
+    if timing["worst_ms"] > budget_ms:
+        verdicts.append(f"❌ 予算超過: {timing['worst_ms']:.2f}ms（{timing['worst_article']}、予算 {budget_ms:g}ms）")
+    if scanned and timing["hits"] == 0:
+        if "〜" in pattern["regex"]:
+            # 「〜」は省略の意味ではなく文字どおりの波ダッシュとして照合される
+            verdicts.append("⚠️ 未一致（「〜」は文字そのものとして照合される）")
+        else:
+            verdicts.append("⚠️ 未一致")
+    elif scanned and timing["articles"] / scanned >= frequent_ratio:
+        verdicts.append(f"⚠️ 高頻度: {timing['articles'] / scanned:.0%}の記事にマッチ")
+
+    return verdicts
+
+
+def print_report(patterns: List[Dict], scanned: int, elapsed: float):
+    """計測結果を最悪時間の順に表示"""
+    print(f"\n📊 パターン計測（{len(patterns)}パターン × {scanned}記事、{elapsed:.1f}秒）\n")
+    print(f"{'最悪µs':>8} {'平均µs':>8} {'ヒット':>8} {'記事':>6}  パターン")
+
+    def worst(pattern: Dict) -> float:
+        return pattern["timing"]["worst_ms"] if pattern.get("timing") else float("inf")
+
+    for pattern in sorted(patterns, key=worst, reverse=True):
+        timing = pattern.get("timing")
+        label = f"{pattern['group']} > {pattern['name']}: {pattern['regex']}"
+
+        if timing:
+            average_us = timing["total_ms"] * 1000 / scanned if scanned else 0
+            print(f"{timing['worst_ms'] * 1000:>8.1f} {average_us:>8.1f} {timing['hits']:>8} {timing['articles']:>6}  {label}")
+        else:
+            print(f"{'-':>8} {'-':>8} {'-':>8} {'-':>6}  {label}")
+
+        for verdict in pattern["verdicts"]:
+            print(f"{'':>34}{verdict}")
+
+    errors = sum(1 for pattern in patterns if any(v.startswith("❌") for v in pattern["verdicts"]))
+    warnings = sum(1 for pattern in patterns if any(v.startswith("⚠️") for v in pattern["verdicts"]))
+
+    print()
+    if errors:
+        print(f"❌ 要修正: {errors}パターン")
+    if warnings:
+        print(f"⚠️  要確認: {warnings}パターン")
+    if not errors and not warnings:
+        print("✅ 問題のあるパターンはありません")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="パターン辞書の正規表現を計測")
+
+    parser.add_argument("--source", choices=("all",) + SOURCES, default="all",
+                        help="計測するパターン辞書（デフォルト: all）")
+    parser.add_argument("--limit", type=int, help="計測に使う記事数上限（デフォルト: 全件）")
+    parser.add_argument("--budget-ms", type=float, default=5.0,
+                        help="記事1件・パターン1つあたりの処理時間の上限（デフォルト: 5ms）")
+    parser.add_argument("--probe-budget-ms", type=float, default=50.0,
+                        help="バックトラック実測の入力1つあたりの上限（デフォルト: 50ms）")
+    parser.add_argument("--probe-timeout", type=float, default=1.0,
+                        help="バックトラック実測を打ち切る秒数（デフォルト: 1秒）")
+    parser.add_argument("--frequent-ratio", type=float, default=0.5,
+                        help="高頻度とみなす出現記事の割合（デフォルト: 0.5）")
+    parser.add_argument("--json", action="store_true", help="JSONで出力")
+    parser.add_argument("--root", help="プロジェクトルート（合成コーパスでの計測用）")
+
+    args = parser.parse_args()
+
+    # データベースパス
+    project_root = Path(args.root) if args.root else Path(__file__).parent.parent.parent
+    db_path = project_root / "data" / "corpus" / "writing-corpus.db"
+
+    if not db_path.exists():
+        print(f"❌ データベースが見つかりません: {db_path}")
+        print("   先に migrate-to-sqlite.py を実行してください")
+        return
+
+    patterns = collect_patterns(project_root, args.source)
+
+    # 構文と実測でバックトラックを確かめ、問題のあるパターンはコーパスで計測しない
+    for pattern in patterns:
+        pattern["risks"] = static_risks(pattern["regex"])
+        pattern["probe"] = probe_backtracking(pattern["regex"], budget_ms=args.probe_budget_ms,
+                                              timeout=args.probe_timeout)
+
+    safe = [pattern for pattern in patterns if not pattern["probe"]["problem"]]
+
+    started = time.perf_counter()
+    scanned, timings = time_patterns([pattern["regex"] for pattern in safe], iter_articles(db_path, args.limit),
+                                     flags=re.MULTILINE)
+    elapsed = time.perf_counter() - started
+
+    for pattern, timing in zip(safe, timings):
+        pattern["timing"] = timing
+    for pattern in patterns:
+        pattern["verdicts"] = judge(pattern, scanned, args.budget_ms, args.frequent_ratio)
+
+    if args.json:
+        print(json.dumps({"scanned": scanned, "elapsed": elapsed, "patterns": patterns},
+                         ensure_ascii=False, indent=2))
+    else:
+        print_report(patterns, scanned, elapsed)
+
+    if any(verdict.startswith("❌") for pattern in patterns for verdict in pattern["verdicts"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+計測用の合成コーパスを生成する
+
+目的: migrate-to-sqlite.py --bulk 等の効果を10万件規模で確認する
+使い方: python3 generate-synthetic-corpus.py --root /tmp/synthetic-corpus [--count 100000] [--seed 0] [--jobs N]
+出力: <root>/data/raw/fc2_extracted/ の記事ファイルと <root>/data/corpus/metadata.json
+
+出力先は実コーパスと同じディレクトリ構成なので、各スクリプトの --root に渡して計測できる。
+    python3 scripts/export/migrate-to-sqlite.py --bulk --root /tmp/synthetic-corpus
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from extract.metadata_extractor import extract_files, generate_statistics
+from lib.metadata_store import MetadataStore
+from lib.synthetic import corpus_summary, write_synthetic_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="計測用の合成コーパスを生成")
+
+    parser.add_argument("--root", required=True, help="出力先のルートディレクトリ")
+    parser.add_argument("--count", type=int, default=100000, help="記事数（デフォルト: 100000）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード（デフォルト: 0）")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="メタデータ抽出のプロセス数（デフォルト: CPU数）")
+
+    args = parser.parse_args()
+
+    root = Path(args.root).resolve()
+    fc2_dir = root / "data" / "raw" / "fc2_extracted"
+    corpus_dir = root / "data" / "corpus"
+
+    if root.exists() and any(root.iterdir()):
+        if not (fc2_dir.exists() or corpus_dir.exists()):
+            print(f"❌ 合成コーパス以外のファイルがあるディレクトリには出力できません: {root}")
+            return
+        shutil.rmtree(fc2_dir, ignore_errors=True)
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    print(f"合成コーパス生成: {root}（{args.count}件、seed={args.seed}）")
+
+    started = time.perf_counter()
+    paths = write_synthetic_corpus(fc2_dir, args.count, args.seed)
+    summary = corpus_summary(paths)
+    print(f"✅ 記事ファイル書き出し: {summary['articles']}件 / {summary['bytes'] / 1024 / 1024:.1f} MB"
+          f"（{time.perf_counter() - started:.2f}秒）")
+
+    started = time.perf_counter()
+    articles = [result["article"] for result in extract_files(paths, fc2_dir, jobs=args.jobs) if "article" in result]
+
+    header = {
+        "generated_at": datetime.now().isoformat(),
+        "version": "1.0",
+        "articles": None,
+        "statistics": generate_statistics(articles),
+        "errors": []
+    }
+
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    store = MetadataStore(corpus_dir)
+    store.write_all(articles, header)
+    store.export_json()
+    store.close()
+
+    print(f"✅ メタデータ生成: {len(articles)}件（{time.perf_counter() - started:.2f}秒）")
+    print(f"\n計測例: python3 scripts/export/migrate-to-sqlite.py --bulk --root {root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,181 +3,95 @@
 metadata.jsonからSQLiteデータベースへ移行する
 
 目的: ファイルベースの管理から高速検索可能なDB化
-使い方: python3 migrate-to-sqlite.py
+使い方: python3 migrate-to-sqlite.py [--incremental | --bulk [--jobs N]] [--compress zlib|lzma] [--trigram] [--root DIR]
 出力: data/corpus/writing-corpus.db
+
+--incremental を指定すると既存DBを削除せず、metadata と元ファイルの
+ハッシュを既存行と比較して、変わった行だけを書き換える。
+ELO評価（elo_rating）と elo_comparisons はDB側の値を保持する。
+
+全件再構築（--incremental なし）は writing-corpus.db.tmp に作ってから置き換える。
+DBは WAL モードなので、他のプロセス（corpus-server.py・watch-raw-to-db.py など）が
+開いている間は置き換えずに終了する（古い -wal / -shm が新しいDBに付くのを防ぐ）。
+
+--bulk は全件再構築用の高速経路。元ファイルをスレッドプールで読み込み、
+1トランザクションの executemany で投入してから、インデックス作成と
+articles_fts の 'rebuild' をまとめて行う。工程ごとの所要時間を表示する。
+
+--compress を指定すると本文を zlib / lzma で圧縮して保存する（DB作成時に決まり、
+差分移行では既存DBの形式を引き継ぐ）。読み出し側は corpus_db.decompress_content() を使う。
+
+--trigram を指定すると語句の用例検索（kwic-search.py --phrase）用の trigram 索引
+（articles_trigram）も作る。本文と同程度の容量を使うため既定では作らない
+（差分移行では作成済みの索引をそのまま追従させる）。
 """
 
+import argparse
+import os
 import sqlite3
-import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from extract.metadata_extractor import cached_sha256, load_manifest
+from lib import corpus_db
+from lib.article_parser import parse_article
+from lib.corpus_db import ARTICLE_COLUMNS, DB_OWNED_COLUMNS, article_row
+from lib.metadata_store import MetadataStore
 
 
-def create_schema(conn: sqlite3.Connection):
+def create_schema(conn: sqlite3.Connection, codec: Optional[str] = None) -> str:
     """データベーススキーマを作成"""
+    codec = corpus_db.create_schema(conn, codec)
+    print(f"✅ スキーマ作成完了（本文圧縮: {codec}）")
+    return codec
 
-    # articlesテーブル
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS articles (
-            id TEXT PRIMARY KEY,
-            title TEXT NOT NULL,
-            date DATE NOT NULL,
-            year INTEGER NOT NULL,
-            category TEXT,
-            word_count INTEGER,
-            file_path TEXT NOT NULL,
-            content TEXT,
-
-            -- AI学習用メタデータ
-            quality_score REAL,
-            elo_rating INTEGER DEFAULT 1500,
-            sampled BOOLEAN DEFAULT 0,
-            reference_article BOOLEAN DEFAULT 0,
-
-            -- note.comリライト用メタデータ
-            rewrite_status TEXT DEFAULT 'pending',
-            rewrite_score REAL,
-            rewrite_type TEXT,
-            note_article_path TEXT,
-            rewrite_date DATE,
-            deletion_reason TEXT,
-            archived_reason TEXT,
-
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    # tagsテーブル
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS tags (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL
-        )
-    """)
-
-    # article_tagsテーブル（多対多）
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS article_tags (
-            article_id TEXT,
-            tag_id INTEGER,
-            FOREIGN KEY (article_id) REFERENCES articles(id),
-            FOREIGN KEY (tag_id) REFERENCES tags(id),
-            PRIMARY KEY (article_id, tag_id)
-        )
-    """)
-
-    # writing_patternsテーブル
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS writing_patterns (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            pattern_type TEXT NOT NULL,
-            pattern_name TEXT NOT NULL,
-            pattern TEXT,
-            examples TEXT
-        )
-    """)
-
-    # elo_comparisonsテーブル
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS elo_comparisons (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            article_a TEXT NOT NULL,
-            article_b TEXT NOT NULL,
-            winner TEXT,
-            context TEXT,
-            confidence TEXT,
-            compared_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (article_a) REFERENCES articles(id),
-            FOREIGN KEY (article_b) REFERENCES articles(id)
-        )
-    """)
-
-    # 全文検索用FTS5テーブル
-    conn.execute("""
-        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
-            title,
-            category,
-            content,
-            content='articles',
-            content_rowid='rowid'
-        )
-    """)
-
-    # インデックス作成
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_year ON articles(year)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_category ON articles(category)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_rewrite_status ON articles(rewrite_status)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_rewrite_score ON articles(rewrite_score)")
 
-    conn.commit()
-    print("✅ スキーマ作成完了")
+def load_article_source(file_path: Path) -> Tuple[str, Optional[str]]:
+    """記事ファイルから本文と元ファイルのハッシュを読み込む"""
+    try:
+        parsed = parse_article(file_path)
+        return parsed["body"].strip(), parsed["sha256"]
+    except Exception as e:
+        print(f"⚠️ 読み込みエラー: {file_path} - {e}")
+        return "", None
 
 
 def load_article_content(file_path: Path) -> str:
     """記事ファイルから本文を読み込む"""
-    try:
-        content = file_path.read_text(encoding='utf-8')
-        # frontmatterを除去
-        import re
-        content = re.sub(r'^---\n.*?\n---\n', '', content, flags=re.DOTALL)
-        return content.strip()
-    except Exception as e:
-        print(f"⚠️ 読み込みエラー: {file_path} - {e}")
-        return ""
+    return load_article_source(file_path)[0]
+
 
+def source_hash(file_path: Path, manifest_entry: Optional[Dict]) -> Optional[str]:
+    """元ファイルのハッシュを取得（抽出マニフェストの size / mtime が一致すればファイルは読まない）"""
+    return cached_sha256(file_path, manifest_entry)
 
-def migrate_articles(conn: sqlite3.Connection, metadata: dict, base_dir: Path):
-    """articlesテーブルにデータを移行"""
 
-    articles = metadata['articles']
+def migrate_articles(conn: sqlite3.Connection, articles, base_dir: Path):
+    """articlesテーブルにデータを移行（articles は MetadataStore も可）"""
+
     print(f"\n記事データ移行開始: {len(articles)}件")
 
+    codec = corpus_db.content_codec(conn)
+
     for i, article in enumerate(articles, 1):
         # ファイルパスから本文を読み込む
         file_path = base_dir / article['corpus_metadata']['source_path']
-        content = load_article_content(file_path) if file_path.exists() else ""
-
-        # corpus_metadata
-        corpus_meta = article['corpus_metadata']
-
-        # rewrite_status
-        rewrite_status = article['rewrite_status']
-
-        conn.execute("""
-            INSERT OR REPLACE INTO articles (
-                id, title, date, year, category, word_count, file_path, content,
-                quality_score, elo_rating, sampled, reference_article,
-                rewrite_status, rewrite_score, rewrite_type, note_article_path,
-                rewrite_date, deletion_reason, archived_reason
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            article['id'],
-            article['title'],
-            article['date'],
-            article['year'],
-            article.get('category'),
-            article['word_count'],
-            corpus_meta['source_path'],
-            content,
-            corpus_meta.get('quality_score'),
-            corpus_meta.get('elo_rating', 1500),
-            1 if corpus_meta.get('sampled') else 0,
-            1 if corpus_meta.get('reference_article') else 0,
-            rewrite_status['status'],
-            rewrite_status.get('rewrite_score'),
-            rewrite_status.get('rewrite_type'),
-            rewrite_status.get('note_article_path'),
-            rewrite_status.get('rewrite_date'),
-            rewrite_status.get('deletion_reason'),
-            rewrite_status.get('archived_reason')
-        ))
-
-        # 全文検索テーブルにも挿入
-        conn.execute("""
-            INSERT INTO articles_fts(rowid, title, category, content)
-            SELECT rowid, title, category, content FROM articles WHERE id = ?
-        """, (article['id'],))
+        content, content_hash = load_article_source(file_path) if file_path.exists() else ("", None)
+
+        row = article_row(article, corpus_db.compress_content(content, codec), content_hash)
+
+        # articles_fts はトリガーで更新される
+        conn.execute(f"""
+            INSERT OR REPLACE INTO articles ({', '.join(ARTICLE_COLUMNS)})
+            VALUES ({', '.join('?' * len(ARTICLE_COLUMNS))})
+        """, tuple(row[column] for column in ARTICLE_COLUMNS))
 
         if i % 100 == 0:
             print(f"  処理中... {i}/{len(articles)}")
@@ -187,84 +101,338 @@ def migrate_articles(conn: sqlite3.Connection, metadata: dict, base_dir: Path):
     print(f"✅ 記事データ移行完了: {len(articles)}件")
 
 
-def create_statistics_view(conn: sqlite3.Connection):
-    """統計情報用のビューを作成"""
-
-    conn.execute("""
-        CREATE VIEW IF NOT EXISTS v_statistics AS
-        SELECT
-            COUNT(*) as total,
-            COUNT(CASE WHEN rewrite_status = 'pending' THEN 1 END) as pending,
-            COUNT(CASE WHEN rewrite_status = 'in_progress' THEN 1 END) as in_progress,
-            COUNT(CASE WHEN rewrite_status = 'completed' THEN 1 END) as completed,
-            COUNT(CASE WHEN rewrite_status = 'deleted' THEN 1 END) as deleted,
-            COUNT(CASE WHEN rewrite_status = 'archived' THEN 1 END) as archived,
-            COUNT(CASE WHEN rewrite_score >= 70 THEN 1 END) as rewrite_candidates,
-            COUNT(CASE WHEN rewrite_score >= 50 AND rewrite_score < 70 THEN 1 END) as review_candidates,
-            COUNT(CASE WHEN rewrite_score >= 30 AND rewrite_score < 50 THEN 1 END) as archive_candidates,
-            COUNT(CASE WHEN rewrite_score < 30 THEN 1 END) as deletion_candidates,
-            AVG(elo_rating) as avg_elo,
-            COUNT(CASE WHEN sampled = 1 THEN 1 END) as sampled_count,
-            COUNT(CASE WHEN reference_article = 1 THEN 1 END) as reference_count
-        FROM articles
-    """)
-
-    conn.execute("""
-        CREATE VIEW IF NOT EXISTS v_category_stats AS
-        SELECT
-            COALESCE(category, '未分類') as category,
-            COUNT(*) as count,
-            AVG(rewrite_score) as avg_rewrite_score,
-            AVG(word_count) as avg_word_count
-        FROM articles
-        GROUP BY category
-        ORDER BY count DESC
-    """)
-
-    conn.execute("""
-        CREATE VIEW IF NOT EXISTS v_year_stats AS
-        SELECT
-            year,
-            COUNT(*) as count,
-            AVG(rewrite_score) as avg_rewrite_score
-        FROM articles
-        GROUP BY year
-        ORDER BY year
-    """)
+BULK_BATCH_SIZE = 500
+
+
+def bulk_migrate_articles(conn: sqlite3.Connection, articles, base_dir: Path, jobs: int,
+                          codec: Optional[str] = None) -> Dict[str, float]:
+    """
+    空のDBに全記事を一括ロード
+
+    ロード中はジャーナルと fsync を止めるため、途中で失敗したDBは作り直すこと。
+    インデックス・トリガーはデータ投入後に作成し、articles_fts は 'rebuild'、
+    article_stats は GROUP BY の集計で一括構築する。
+
+    Args:
+        conn: データベース接続（テーブル作成前）
+        articles: 記事メタデータ（MetadataStore も可）
+        base_dir: プロジェクトルート
+        jobs: 元ファイル読み込み（と圧縮）のスレッド数
+        codec: 本文圧縮形式（None の場合は none）
+
+    Returns:
+        工程名 → 所要秒数
+    """
+    timings = {}
+
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")
+    codec = corpus_db.create_tables(conn, codec)
+
+    print(f"\n記事データ一括ロード開始: {len(articles)}件（読み込みスレッド: {jobs}、本文圧縮: {codec}）")
+
+    def load_rows(batch: List[Dict]) -> List[Tuple]:
+        rows = []
+        for article in batch:
+            file_path = base_dir / article['corpus_metadata']['source_path']
+            content, content_hash = load_article_source(file_path) if file_path.exists() else ("", None)
+            # zlib / lzma は GIL を解放するため、圧縮も読み込みスレッドで並列に行う
+            row = article_row(article, corpus_db.compress_content(content, codec), content_hash)
+            rows.append(tuple(row[column] for column in ARTICLE_COLUMNS))
+        return rows
+
+    started = time.perf_counter()
+    loaded = 0
+    insert_sql = f"""
+        INSERT OR REPLACE INTO articles ({', '.join(ARTICLE_COLUMNS)})
+        VALUES ({', '.join('?' * len(ARTICLE_COLUMNS))})
+    """
+
+    with conn, ThreadPoolExecutor(max_workers=jobs) as pool:
+        iterator = iter(articles)
+        pending = deque()
+
+        # 読み込みを先行させつつ、未挿入のバッチは jobs * 2 個までに抑える
+        while True:
+            while len(pending) < jobs * 2:
+                batch = list(islice(iterator, BULK_BATCH_SIZE))
+                if not batch:
+                    break
+                pending.append(pool.submit(load_rows, batch))
+
+            if not pending:
+                break
+
+            # 投入順にバッチを取り出すため、挿入順（rowid）は逐次処理と同じ
+            rows = pending.popleft().result()
+            conn.executemany(insert_sql, rows)
+            loaded += len(rows)
+            if loaded % 10000 < BULK_BATCH_SIZE:
+                print(f"  処理中... {loaded}/{len(articles)}")
+
+    timings["読み込み・挿入"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with conn:
+        corpus_db.create_indexes(conn)
+    timings["インデックス作成"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with conn:
+        corpus_db.create_fts_triggers(conn)
+        corpus_db.rebuild_fts(conn)
+    timings["全文検索索引"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with conn:
+        corpus_db.create_stats_triggers(conn)
+        corpus_db.rebuild_stats(conn)
+    timings["集計テーブル"] = time.perf_counter() - started
+
+    # 一括ロード用の設定を通常の書き込み設定（WAL）に戻す
+    corpus_db.enable_wal(conn)
+
+    print(f"✅ 記事データ一括ロード完了: {loaded}件")
+
+    return timings
+
+
+def print_timings(timings: Dict[str, float], article_count: int):
+    """工程ごとの所要時間を表示"""
+    total = sum(timings.values())
+
+    print("\n⏱️ 所要時間:")
+    for name, seconds in timings.items():
+        print(f"  {name}: {seconds:.2f}秒")
+    print(f"  合計: {total:.2f}秒（{article_count / total if total else 0:.0f}件/秒）")
+
+
+def upsert_articles(conn: sqlite3.Connection, articles, base_dir: Path, manifest: Dict[str, Dict]) -> Dict[str, int]:
+    """
+    既存DBと比較し、変更のあった記事だけを書き換える（非破壊の差分移行）
+
+    本文は content_hash（元ファイルのsha256）が変わった記事だけ読み込む。
+    metadata にない記事は、元ファイルも消えている場合だけ削除する（watch-raw-to-db.py が
+    metadata より先にDBへ入れた記事を消さないため）。articles_fts はトリガーで追従する。
+
+    Args:
+        conn: データベース接続
+        articles: 記事メタデータ（MetadataStore も可）
+        base_dir: プロジェクトルート
+        manifest: source_path → extract-manifest.json のエントリ
+
+    Returns:
+        inserted / updated / unchanged / deleted / kept の件数
+    """
+    compare_columns = [
+        column for column in ARTICLE_COLUMNS
+        if column not in ("id", "content") and column not in DB_OWNED_COLUMNS
+    ]
+
+    codec = corpus_db.content_codec(conn)
+
+    stored = {}
+    for row in conn.execute(f"SELECT id, {', '.join(compare_columns)} FROM articles"):
+        stored[row[0]] = dict(zip(compare_columns, row[1:]))
+
+    print(f"\n差分移行開始: {len(articles)}件（既存 {len(stored)}件）")
+
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "kept": 0}
+    seen = set()
+
+    with conn:
+        for article in articles:
+            seen.add(article['id'])
+            source_path = article['corpus_metadata']['source_path']
+            file_path = base_dir / source_path
+
+            row = article_row(article, None, source_hash(file_path, manifest.get(source_path)))
+            old = stored.get(article['id'])
+
+            if old is None:
+                content, _ = load_article_source(file_path) if file_path.exists() else ("", None)
+                row["content"] = corpus_db.compress_content(content, codec)
+                conn.execute(f"""
+                    INSERT INTO articles ({', '.join(ARTICLE_COLUMNS)})
+                    VALUES ({', '.join('?' * len(ARTICLE_COLUMNS))})
+                """, tuple(row[column] for column in ARTICLE_COLUMNS))
+                counts["inserted"] += 1
+                continue
+
+            changed = [column for column in compare_columns if old[column] != row[column]]
+            if not changed:
+                counts["unchanged"] += 1
+                continue
+
+            if "content_hash" in changed:
+                content, _ = load_article_source(file_path) if file_path.exists() else ("", None)
+                row["content"] = corpus_db.compress_content(content, codec)
+                changed.append("content")
+
+            assignments = ", ".join(f"{column} = ?" for column in changed)
+            conn.execute(
+                f"UPDATE articles SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                tuple(row[column] for column in changed) + (article['id'],)
+            )
+            counts["updated"] += 1
+
+        for article_id in sorted(stored.keys() - seen):
+            file_path = stored[article_id]["file_path"]
+            if file_path and (base_dir / file_path).exists():
+                counts["kept"] += 1
+                continue
+            conn.execute("DELETE FROM articles WHERE id = ?", (article_id,))
+            counts["deleted"] += 1
+
+    print(
+        f"✅ 差分移行完了: 追加 {counts['inserted']}件 / 更新 {counts['updated']}件 / "
+        f"変更なし {counts['unchanged']}件 / 削除 {counts['deleted']}件"
+    )
+    if counts["kept"]:
+        print(f"  ⚠️ metadata にないが元ファイルが残っている記事 {counts['kept']}件は削除せず保持しました")
+
+    return counts
 
+
+def create_statistics_view(conn: sqlite3.Connection):
+    """統計情報用のビューを作成（集計は article_stats をトリガーで更新）"""
+    corpus_db.create_stat_views(conn)
     conn.commit()
     print("✅ 統計ビュー作成完了")
 
 
+def database_files(db_file: Path) -> List[Path]:
+    """DB本体と付随ファイル（-wal / -shm / -journal）"""
+    return [db_file] + [db_file.with_name(db_file.name + suffix) for suffix in ("-wal", "-shm", "-journal")]
+
+
+def database_in_use(db_file: Path) -> bool:
+    """
+    他の接続が db_file を開いているか
+
+    WAL から DELETE モードへの切り替えは他の接続がないときだけ成功する。成功した場合は
+    WAL の内容が本体に書き戻され、閉じるときに -wal / -shm も消える。
+
+    Args:
+        db_file: データベースファイルパス
+
+    Returns:
+        開いている接続があれば True（壊れていて開けないDBは False）
+    """
+    if not db_file.exists():
+        return False
+
+    conn = sqlite3.connect(db_file, timeout=0)
+    try:
+        conn.execute("PRAGMA journal_mode = DELETE").fetchone()
+    except sqlite3.OperationalError as e:
+        return "locked" in str(e)
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        conn.close()
+    return False
+
+
+def replace_database(build_file: Path, db_file: Path):
+    """
+    一時ファイルに作ったDBで db_file を置き換える（古い -wal / -shm は消す）
+
+    Args:
+        build_file: 作成済みのDB（接続は閉じていること）
+        db_file: 置き換え先
+    """
+    for path in database_files(db_file)[1:]:
+        if path.exists():
+            path.unlink()
+    os.replace(build_file, db_file)
+
+
 def main():
     """メイン処理"""
-    project_root = Path(__file__).parent.parent.parent
+    parser = argparse.ArgumentParser(description="metadata.jsonからSQLiteデータベースへ移行")
+
+    parser.add_argument("--incremental", action="store_true",
+                        help="既存DBを削除せず、変更のあった行だけを書き換える")
+    parser.add_argument("--bulk", action="store_true",
+                        help="全件再構築を一括ロードで行う（工程ごとの所要時間を表示）")
+    parser.add_argument("--jobs", type=int, default=min(8, os.cpu_count() or 1),
+                        help="--bulk の読み込みスレッド数（デフォルト: CPU数、最大8）")
+    parser.add_argument("--compress", choices=["zlib", "lzma"],
+                        help="本文を圧縮して保存する（差分移行では既存DBと同じ形式のみ指定可）")
+    parser.add_argument("--trigram", action="store_true",
+                        help="語句の用例検索用の trigram 索引を作る（本文と同程度の容量を使う）")
+    parser.add_argument("--root", help="プロジェクトルート（合成コーパスでの計測用）")
+
+    args = parser.parse_args()
+
+    if args.incremental and args.bulk:
+        parser.error("--incremental と --bulk は同時に指定できません")
+
+    project_root = Path(args.root) if args.root else Path(__file__).parent.parent.parent
     metadata_file = project_root / "data" / "corpus" / "metadata.json"
     db_file = project_root / "data" / "corpus" / "writing-corpus.db"
 
-    # 既存DBを削除（クリーンな状態から開始）
-    if db_file.exists():
-        db_file.unlink()
-        print(f"既存DBを削除: {db_file}")
-
-    # metadata.json読み込み
-    print(f"\nmetadata.json読み込み: {metadata_file}")
-    with metadata_file.open('r', encoding='utf-8') as f:
-        metadata = json.load(f)
+    # 全件再構築は一時ファイルに作り、完了してから既存DBと置き換える
+    build_file = db_file if args.incremental else db_file.with_name(db_file.name + ".tmp")
+    if not args.incremental:
+        if database_in_use(db_file):
+            print(f"❌ 他のプロセスがDBを開いています: {db_file}")
+            print("   corpus-server.py / watch-raw-to-db.py などを止めてから再実行するか、--incremental を使ってください")
+            sys.exit(1)
+        for path in database_files(build_file):
+            if path.exists():
+                path.unlink()
+
+    # メタデータストアを開く（記事はストリーミングで読み込む）
+    print(f"\nメタデータ読み込み: {metadata_file}")
+    store = MetadataStore.open(metadata_file.parent)
 
     # データベース作成
-    print(f"\nSQLiteデータベース作成: {db_file}")
-    conn = sqlite3.connect(db_file)
+    print(f"\nSQLiteデータベース{'更新' if args.incremental else '作成'}: {db_file}")
+    conn = corpus_db.connect(build_file)
 
-    try:
-        # スキーマ作成
-        create_schema(conn)
+    started = time.perf_counter()
+    timings = None
+    completed = False
 
+    try:
         # データ移行
-        migrate_articles(conn, metadata, project_root)
+        if args.bulk:
+            timings = bulk_migrate_articles(conn, store, project_root, max(1, args.jobs), args.compress)
+        elif args.incremental:
+            try:
+                create_schema(conn, args.compress)
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            fc2_dir = project_root / "data" / "raw" / "fc2_extracted"
+            manifest = {
+                (fc2_dir / relative_path).relative_to(project_root).as_posix(): entry
+                for relative_path, entry in load_manifest(metadata_file.parent / "extract-manifest.json").items()
+            }
+            upsert_articles(conn, store, project_root, manifest)
+        else:
+            create_schema(conn, args.compress or "none")
+            migrate_articles(conn, store, project_root)
+
+        # 用例検索用の trigram 索引（任意）
+        if args.trigram:
+            trigram_started = time.perf_counter()
+            with conn:
+                created = corpus_db.create_trigram_index(conn)
+            if timings is not None:
+                timings["trigram索引"] = time.perf_counter() - trigram_started
+            if created:
+                print("✅ trigram 索引作成完了")
 
         # 統計ビュー作成
+        view_started = time.perf_counter()
         create_statistics_view(conn)
+        if timings is not None:
+            timings["統計ビュー作成"] = time.perf_counter() - view_started
+            print_timings(timings, len(store))
 
         # 統計情報表示
         print("\n📊 移行後の統計情報:")
@@ -286,11 +454,25 @@ def main():
             print(f"  サンプリング済み: {stats[11]}件")
             print(f"  参照記事: {stats[12]}件")
 
-        print(f"\n✅ 移行完了: {db_file}")
-        print(f"データベースサイズ: {db_file.stat().st_size / 1024 / 1024:.2f} MB")
+        completed = True
 
     finally:
         conn.close()
+        store.close()
+
+    if not completed:
+        return
+
+    if not args.incremental:
+        # 作成中に他のプロセスが開いた場合も置き換えない（一時ファイルは次回の実行で消す）
+        if database_in_use(db_file):
+            print(f"❌ 他のプロセスがDBを開いたため置き換えませんでした: {db_file}（作成したDB: {build_file}）")
+            sys.exit(1)
+        replace_database(build_file, db_file)
+        print(f"\n既存DBを置き換え: {db_file}")
+
+    print(f"\n✅ 移行完了: {db_file}（{time.perf_counter() - started:.2f}秒）")
+    print(f"データベースサイズ: {db_file.stat().st_size / 1024 / 1024:.2f} MB")
 
 
 if __name__ == "__main__":
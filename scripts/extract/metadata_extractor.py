@@ -7,15 +7,23 @@ FC2記事からメタデータを抽出してmetadata.jsonを生成する
 - コーパス用メタデータ（quality_score, elo_rating等）
 - リライト状態（status, score等）
 
-使い方: python3 metadata_extractor.py
-出力: data/corpus/metadata.json
+使い方: python3 metadata_extractor.py [--incremental] [--jobs N] [--no-json-export]
+出力: data/corpus/metadata.{ndjson,index.json,header.json}（メタデータストア）,
+      data/corpus/metadata.json（互換用エクスポート）, data/corpus/extract-manifest.json
 """
 
+import argparse
+import hashlib
 import json
-import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib import article_parser
+from lib.metadata_store import MetadataStore
 
 
 def extract_frontmatter(content: str) -> Dict[str, any]:
@@ -28,27 +36,8 @@ def extract_frontmatter(content: str) -> Dict[str, any]:
     Returns:
         frontmatter辞書（title, date, original_id）
     """
-    frontmatter_match = re.match(r'^---\n(.*?)\n---\n', content, re.DOTALL)
-    if not frontmatter_match:
-        return {}
-
-    frontmatter_text = frontmatter_match.group(1)
-    frontmatter = {}
-
-    for line in frontmatter_text.split('\n'):
-        if ':' in line:
-            key, value = line.split(':', 1)
-            key = key.strip()
-            value = value.strip().strip('"\'')
-
-            if key == 'date':
-                frontmatter[key] = value
-            elif key == 'original_id':
-                frontmatter[key] = int(value) if value.isdigit() else value
-            else:
-                frontmatter[key] = value
-
-    return frontmatter
+    frontmatter_text, _ = article_parser.split_frontmatter(content)
+    return article_parser.parse_frontmatter(frontmatter_text)
 
 
 def extract_category(title: str) -> Optional[str]:
@@ -61,8 +50,7 @@ def extract_category(title: str) -> Optional[str]:
     Returns:
         カテゴリ名（【】なしの文字列）、なければNone
     """
-    category_match = re.search(r'【(.+?)】', title)
-    return category_match.group(1) if category_match else None
+    return article_parser.extract_category(title)
 
 
 def count_words(content: str) -> int:
@@ -75,13 +63,8 @@ def count_words(content: str) -> int:
     Returns:
         文字数
     """
-    # frontmatterを除去
-    body = re.sub(r'^---\n.*?\n---\n', '', content, flags=re.DOTALL)
-
-    # 空白・改行を除いた文字数
-    body_cleaned = re.sub(r'\s+', '', body)
-
-    return len(body_cleaned)
+    _, body = article_parser.split_frontmatter(content)
+    return article_parser.count_chars(body)
 
 
 def generate_article_id(date_str: str, original_id: any) -> str:
@@ -100,19 +83,22 @@ def generate_article_id(date_str: str, original_id: any) -> str:
     return f"fc2_{date_str}_{id_num}"
 
 
-def extract_article_metadata(file_path: Path, base_dir: Path) -> Dict:
+def extract_article_metadata(file_path: Path, base_dir: Path, parsed: Optional[Dict] = None) -> Dict:
     """
     1つのFC2記事からメタデータを抽出
 
     Args:
         file_path: 記事ファイルのパス
         base_dir: data/raw/fc2_extracted/のパス
+        parsed: parse_article() の結果（省略時はファイルを読み込んで解析）
 
     Returns:
         記事メタデータ辞書
     """
-    content = file_path.read_text(encoding='utf-8')
-    frontmatter = extract_frontmatter(content)
+    if parsed is None:
+        parsed = article_parser.parse_article(file_path)
+
+    frontmatter = parsed["frontmatter"]
 
     title = frontmatter.get('title', file_path.stem)
     date_str = str(frontmatter.get('date', ''))
@@ -125,8 +111,8 @@ def extract_article_metadata(file_path: Path, base_dir: Path) -> Dict:
         relative_path = file_path
 
     article_id = generate_article_id(date_str, original_id)
-    category = extract_category(title)
-    word_count = count_words(content)
+    category = parsed["category"]
+    word_count = parsed["char_count"]
 
     # 年を抽出
     year = int(date_str.split('-')[0]) if date_str and '-' in date_str else None
@@ -161,34 +147,250 @@ def extract_article_metadata(file_path: Path, base_dir: Path) -> Dict:
     }
 
 
-def generate_statistics(articles: List[Dict]) -> Dict:
+def extract_chunk(file_paths: List[str], base_dir: str) -> List[Dict]:
+    """
+    複数の記事ファイルからメタデータを抽出（プロセスプールのワーカー用）
+
+    例外はワーカー内で捕捉し、ファイル単位のエラーとして返す。
+    マニフェスト用のフィンガープリントも同じ読み込みから算出する。
+
+    Args:
+        file_paths: 記事ファイルのパスリスト
+        base_dir: data/raw/fc2_extracted/のパス
+
+    Returns:
+        入力順の結果リスト（{"article": ..., "fingerprint": ...} または {"error": ...}）
+    """
+    results = []
+
+    for file_path in file_paths:
+        try:
+            md_file = Path(file_path)
+            stat = md_file.stat()
+            parsed = article_parser.parse_article(md_file)
+            results.append({
+                "article": extract_article_metadata(md_file, Path(base_dir), parsed),
+                "fingerprint": {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": parsed["sha256"]}
+            })
+        except Exception as e:
+            results.append({"error": str(e)})
+
+    return results
+
+
+def extract_files(md_files: List[Path], base_dir: Path, jobs: int = 1, chunk_size: Optional[int] = None) -> List[Dict]:
+    """
+    記事ファイル群からメタデータを抽出
+
+    jobs > 1 の場合はチャンク単位でプロセスプールに分配する。
+    結果は入力順に並ぶため、逐次処理と同一の出力になる。
+
+    Args:
+        md_files: 記事ファイルのパスリスト（ソート済み）
+        base_dir: data/raw/fc2_extracted/のパス
+        jobs: 並列プロセス数
+        chunk_size: 1タスクあたりのファイル数（省略時は自動）
+
+    Returns:
+        入力順の結果リスト（extract_chunk() と同形式）
+    """
+    paths = [str(md_file) for md_file in md_files]
+
+    if jobs <= 1 or len(paths) <= 1:
+        results = []
+        for i, path in enumerate(paths, 1):
+            results.extend(extract_chunk([path], str(base_dir)))
+            if i % 100 == 0:
+                print(f"処理中... {i}/{len(paths)}")
+        return results
+
+    if chunk_size is None:
+        # ワーカーあたり4チャンク程度に分割して負荷を均す
+        chunk_size = max(1, -(-len(paths) // (jobs * 4)))
+
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for chunk_results in executor.map(extract_chunk, chunks, [str(base_dir)] * len(chunks)):
+            results.extend(chunk_results)
+            print(f"処理中... {len(results)}/{len(paths)}")
+
+    return results
+
+
+def fingerprint_file(file_path: Path) -> Dict:
+    """
+    ファイルの変更検出用フィンガープリントを取得
+
+    Args:
+        file_path: 記事ファイルのパス
+
+    Returns:
+        size, mtime_ns, sha256 を含む辞書
+    """
+    stat = file_path.stat()
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": hashlib.sha256(file_path.read_bytes()).hexdigest()
+    }
+
+
+def cached_sha256(file_path: Path, manifest_entry: Optional[Dict]) -> Optional[str]:
+    """
+    元ファイルの sha256 を取得
+
+    マニフェストの size / mtime が一致すればその sha256 を使い、ファイルは読まない。
+
+    Args:
+        file_path: 記事ファイルのパス
+        manifest_entry: extract-manifest.json の該当エントリ
+
+    Returns:
+        sha256（ファイルがなければNone）
+    """
+    if not file_path.exists():
+        return None
+
+    stat = file_path.stat()
+    if (manifest_entry and manifest_entry.get("sha256")
+            and manifest_entry["size"] == stat.st_size and manifest_entry["mtime_ns"] == stat.st_mtime_ns):
+        return manifest_entry["sha256"]
+
+    return hashlib.sha256(file_path.read_bytes()).hexdigest()
+
+
+def load_manifest(manifest_file: Path) -> Dict[str, Dict]:
+    """
+    抽出マニフェストを読み込む
+
+    Args:
+        manifest_file: マニフェストファイルのパス
+
+    Returns:
+        相対パス → フィンガープリントの辞書（なければ空）
+    """
+    if not manifest_file.exists():
+        return {}
+
+    with manifest_file.open('r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    return manifest.get("files", {})
+
+
+def save_manifest(manifest_file: Path, files: Dict[str, Dict]):
+    """
+    抽出マニフェストを保存
+
+    Args:
+        manifest_file: マニフェストファイルのパス
+        files: 相対パス → フィンガープリントの辞書
+    """
+    manifest = {
+        "generated_at": datetime.now().isoformat(),
+        "version": "1.0",
+        "files": dict(sorted(files.items()))
+    }
+
+    with manifest_file.open('w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def detect_changes(md_files: List[Path], base_dir: Path, manifest: Dict[str, Dict]) -> Dict:
+    """
+    マニフェストと比較して新規・変更・削除ファイルを検出
+
+    size と mtime が一致するファイルはハッシュ計算を省略する。
+    mtime だけが変わったファイルはハッシュで内容を比較する。
+
+    Args:
+        md_files: 現在の記事ファイル一覧
+        base_dir: data/raw/fc2_extracted/のパス
+        manifest: 前回のマニフェスト
+
+    Returns:
+        changed（要再抽出の相対パス集合）, removed（削除された相対パスリスト）,
+        files（更新後のマニフェスト）, touched（フィンガープリントのみ更新したか）
+    """
+    changed = set()
+    files = {}
+    touched = False
+
+    for md_file in md_files:
+        relative_path = md_file.relative_to(base_dir).as_posix()
+        entry = manifest.get(relative_path)
+        stat = md_file.stat()
+
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            files[relative_path] = entry
+            continue
+
+        current = fingerprint_file(md_file)
+        files[relative_path] = current
+
+        if entry and entry["sha256"] == current["sha256"]:
+            touched = True
+        else:
+            changed.add(relative_path)
+
+    removed = sorted(set(manifest) - set(files))
+
+    return {"changed": changed, "removed": removed, "files": files, "touched": touched}
+
+
+def merge_downstream_fields(article: Dict, previous: Dict) -> Dict:
+    """
+    再抽出した記事に、下流スクリプトが書き込んだフィールドを引き継ぐ
+
+    rewrite_status（score-articles.py）と corpus_metadata の評価系フィールド
+    （sync-elo-to-corpus.py の elo_rating 等）は元ファイルから再生成できないため保持する。
+
+    Args:
+        article: 再抽出した記事メタデータ
+        previous: 既存の記事メタデータ
+
+    Returns:
+        マージ後の記事メタデータ
+    """
+    article["rewrite_status"] = previous["rewrite_status"]
+
+    for key, value in previous["corpus_metadata"].items():
+        if key != "source_path":
+            article["corpus_metadata"][key] = value
+
+    return article
+
+
+def generate_statistics(articles: Iterable[Dict]) -> Dict:
     """
     統計情報を生成
 
     Args:
-        articles: 記事リスト
+        articles: 記事リスト（MetadataStore も可。1回だけ走査する）
 
     Returns:
         統計情報辞書
     """
-    total = len(articles)
-
-    # 状態別カウント
+    total = 0
     status_counts = {}
+    year_counts = {}
+    category_counts = {}
+
     for article in articles:
+        total += 1
+
+        # 状態別カウント
         status = article["rewrite_status"]["status"]
         status_counts[status] = status_counts.get(status, 0) + 1
 
-    # 年別カウント
-    year_counts = {}
-    for article in articles:
+        # 年別カウント
         year = article.get("year")
         if year:
             year_counts[year] = year_counts.get(year, 0) + 1
 
-    # カテゴリ別カウント
-    category_counts = {}
-    for article in articles:
+        # カテゴリ別カウント
         category = article.get("category", "未分類")
         category_counts[category] = category_counts.get(category, 0) + 1
 
@@ -202,11 +404,23 @@ def generate_statistics(articles: List[Dict]) -> Dict:
 
 def main():
     """メイン処理"""
+    parser = argparse.ArgumentParser(description="FC2記事からメタデータを抽出")
+
+    parser.add_argument("--incremental", action="store_true",
+                        help="マニフェストと比較し、新規・変更ファイルのみ再抽出する")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="並列抽出のプロセス数（デフォルト: 1 = 逐次処理）")
+    parser.add_argument("--no-json-export", action="store_true",
+                        help="メタデータストアのみ更新し、互換用の metadata.json を書き出さない")
+
+    args = parser.parse_args()
+
     # パス設定
     project_root = Path(__file__).parent.parent.parent
     fc2_dir = project_root / "data" / "raw" / "fc2_extracted"
     output_dir = project_root / "data" / "corpus"
     output_file = output_dir / "metadata.json"
+    manifest_file = output_dir / "extract-manifest.json"
 
     # 出力ディレクトリ作成
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -218,43 +432,106 @@ def main():
     md_files = sorted(fc2_dir.glob("**/*.md"))
     print(f"\n検出したFC2記事: {len(md_files)}件")
 
+    # 変更検出
+    if args.incremental:
+        changes = detect_changes(md_files, fc2_dir, load_manifest(manifest_file))
+        changed = changes["changed"]
+        manifest_files = changes["files"]
+
+        print(f"  新規・変更: {len(changed)}件 / 削除: {len(changes['removed'])}件")
+
+        if not changed and not changes["removed"] and (MetadataStore(output_dir).exists() or output_file.exists()):
+            if changes["touched"]:
+                save_manifest(manifest_file, manifest_files)
+            print("\n✅ 変更なし: metadata.json は最新です")
+            return
+
+        store = MetadataStore.open(output_dir)
+        source_ids = store.source_paths()
+    else:
+        changed = None
+        manifest_files = {}
+        store = MetadataStore(output_dir)
+        source_ids = {}
+
+    # 再抽出が必要なファイルを選別（既存メタデータを流用できないもの）
+    targets = []
+    for md_file in md_files:
+        relative_path = md_file.relative_to(fc2_dir).as_posix()
+        if (changed is None or relative_path in changed
+                or f"data/raw/fc2_extracted/{relative_path}" not in source_ids):
+            targets.append(md_file)
+
     # メタデータ抽出
+    results = extract_files(targets, fc2_dir, jobs=args.jobs)
+
     articles = []
     errors = []
 
-    for i, md_file in enumerate(md_files, 1):
-        try:
-            article = extract_article_metadata(md_file, fc2_dir)
+    for md_file, result in zip(targets, results):
+        relative_path = md_file.relative_to(fc2_dir).as_posix()
+        previous_id = source_ids.get(f"data/raw/fc2_extracted/{relative_path}")
+
+        if "error" in result:
+            errors.append({"file": str(md_file), "error": result["error"]})
+            print(f"エラー: {md_file} - {result['error']}")
+            # 一致しないフィンガープリントを残し、次回の差分抽出で再試行させる
+            manifest_files[relative_path] = {"size": -1, "mtime_ns": -1, "sha256": None}
+            if previous_id:
+                store.delete(previous_id)
+            continue
+
+        article = result["article"]
+
+        if changed is None:
             articles.append(article)
+            manifest_files[relative_path] = result["fingerprint"]
+            continue
 
-            if i % 100 == 0:
-                print(f"処理中... {i}/{len(md_files)}")
-        except Exception as e:
-            errors.append({"file": str(md_file), "error": str(e)})
-            print(f"エラー: {md_file} - {e}")
+        # 差分抽出: 変更のあった記事だけストアに書き込む
+        if previous_id:
+            article = merge_downstream_fields(article, store.get(previous_id))
+            if previous_id != article["id"]:
+                store.delete(previous_id)
+        store.put(article)
+
+    if changed is not None:
+        for relative_path in changes["removed"]:
+            previous_id = source_ids.get(f"data/raw/fc2_extracted/{relative_path}")
+            if previous_id in store:
+                store.delete(previous_id)
 
-    print(f"\n抽出完了: {len(articles)}件")
+    print(f"\n抽出完了: {len(articles) if changed is None else len(store)}件")
 
     if errors:
         print(f"エラー件数: {len(errors)}件")
 
-    # 統計情報生成
-    statistics = generate_statistics(articles)
+    # 統計情報生成（差分抽出ではストアをストリーミング走査）
+    statistics = generate_statistics(articles if changed is None else store)
 
-    # メタデータJSON生成
-    metadata = {
+    header = {
         "generated_at": datetime.now().isoformat(),
         "version": "1.0",
-        "articles": articles,
+        "articles": None,
         "statistics": statistics,
         "errors": errors
     }
 
     # 出力
-    with output_file.open('w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    if changed is None:
+        store.write_all(articles, header)
+    else:
+        store.update_header(**header)
+
+    if not args.no_json_export:
+        store.export_json()
+    store.close()
+
+    save_manifest(manifest_file, manifest_files)
 
-    print(f"\n✅ metadata.json を生成しました: {output_file}")
+    print(f"\n✅ メタデータを生成しました: {store.record_path}")
+    if not args.no_json_export:
+        print(f"   互換用 metadata.json: {output_file}")
     print(f"\n📊 統計情報:")
     print(f"  総記事数: {statistics['total']}件")
     print(f"  年別:")
@@ -0,0 +1,7 @@
+"""
+scripts/ 配下の各スクリプトで共有するモジュール群
+
+使い方: 各スクリプトで scripts/ を sys.path に追加してから import する
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from lib.article_parser import parse_article
+"""
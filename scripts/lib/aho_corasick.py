@@ -0,0 +1,127 @@
+"""
+複数キーワードの一括照合（Aho–Corasick法）
+
+目的: キーワード数に関係なく、本文を1回走査するだけで全キーワードの
+      出現位置・出現回数を得る（score-articles.py のリスク判定などで共有）
+
+失敗遷移はオートマトン構築時に解決済み（DFA化）なので、照合は1文字につき
+辞書引き1回。キーワードの先頭文字が現れるまでは正規表現の文字クラスで読み飛ばす。
+"""
+
+import re
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class KeywordAutomaton:
+    """キーワード集合から作る照合オートマトン"""
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Args:
+            keywords: 照合するキーワード（空文字列は無視、重複は1つにまとめる）
+        """
+        self.keywords: List[str] = []
+        seen = set()
+        for keyword in keywords:
+            if keyword and keyword not in seen:
+                seen.add(keyword)
+                self.keywords.append(keyword)
+
+        # トライ木: 状態ごとの遷移表と、その状態で終わるキーワード番号
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Tuple[int, ...]] = [()]
+
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append(())
+                state = next_state
+            outputs[state] += (index,)
+
+        # 幅優先で失敗遷移を求め、遷移表に畳み込む（ルートへ戻る遷移は持たない）
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        pending = deque(goto[0].values())
+
+        while pending:
+            state = pending.popleft()
+            fallback = delta[fail[state]]
+            transitions = dict(fallback)
+
+            for char, child in goto[state].items():
+                fail[child] = fallback.get(char, 0)
+                transitions[char] = child
+                pending.append(child)
+
+            outputs[state] += outputs[fail[state]]
+            delta[state] = transitions
+
+        self._delta = delta
+        self._outputs = outputs
+        self._lengths = [len(keyword) for keyword in self.keywords]
+
+        first_chars = "".join(sorted(goto[0]))
+        self._first_char = re.compile(f"[{re.escape(first_chars)}]") if first_chars else None
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """
+        全キーワードの出現を列挙（重なり・包含も含む）
+
+        Args:
+            text: 照合対象のテキスト
+
+        Yields:
+            (開始位置, 終了位置, キーワード)。終了位置の昇順、同じ終了位置では長いキーワードが先
+        """
+        if self._first_char is None:
+            return
+
+        delta = self._delta
+        outputs = self._outputs
+        lengths = self._lengths
+        keywords = self.keywords
+        search_first = self._first_char.search
+
+        state = 0
+        position = 0
+        length = len(text)
+
+        while position < length:
+            if state == 0:
+                # ルートではキーワードの先頭文字まで一気に読み飛ばす
+                match = search_first(text, position)
+                if match is None:
+                    return
+                position = match.start()
+
+            state = delta[state].get(text[position], 0)
+            position += 1
+
+            for index in outputs[state]:
+                yield position - lengths[index], position, keywords[index]
+
+    def count(self, text: str) -> Dict[str, int]:
+        """
+        キーワードごとの出現回数を数える（1回以上出現したものだけ）
+
+        「精神病」と「精神」のように包含関係にあるキーワードはそれぞれ数える。
+
+        Args:
+            text: 照合対象のテキスト
+
+        Returns:
+            キーワード → 出現回数
+        """
+        counts: Dict[str, int] = {}
+        for _, _, keyword in self.iter_matches(text):
+            counts[keyword] = counts.get(keyword, 0) + 1
+        return counts
@@ -0,0 +1,147 @@
+"""
+記事ファイルの1パス解析
+
+目的: frontmatter / 本文 / 文字数 / カテゴリを1回の読み込みで取得し、
+      metadata_extractor.py と migrate-to-sqlite.py で共有する
+
+frontmatter と本文は区切り文字の位置（オフセット）で分割し、
+本文全体に正規表現をかけない。
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+FRONTMATTER_OPEN = "---\n"
+FRONTMATTER_CLOSE = "\n---\n"
+
+CATEGORY_PATTERN = re.compile(r'【(.+?)】')
+
+
+def split_frontmatter(text: str) -> Tuple[Optional[str], str]:
+    """
+    frontmatterと本文をオフセットで分割
+
+    `^---\\n(.*?)\\n---\\n`（DOTALL）と同じ範囲を切り出す。
+
+    Args:
+        text: ファイル全体の内容
+
+    Returns:
+        (frontmatterテキスト, 本文)。frontmatterがなければ (None, text)
+    """
+    if not text.startswith(FRONTMATTER_OPEN):
+        return None, text
+
+    start = len(FRONTMATTER_OPEN)
+    end = text.find(FRONTMATTER_CLOSE, start)
+    if end == -1:
+        return None, text
+
+    return text[start:end], text[end + len(FRONTMATTER_CLOSE):]
+
+
+def parse_frontmatter(frontmatter_text: Optional[str]) -> Dict[str, any]:
+    """
+    frontmatterテキストを辞書に変換
+
+    Args:
+        frontmatter_text: frontmatterテキスト（区切り線を除く）
+
+    Returns:
+        frontmatter辞書（title, date, original_id）
+    """
+    if frontmatter_text is None:
+        return {}
+
+    frontmatter = {}
+
+    for line in frontmatter_text.split('\n'):
+        if ':' in line:
+            key, value = line.split(':', 1)
+            key = key.strip()
+            value = value.strip().strip('"\'')
+
+            if key == 'original_id':
+                frontmatter[key] = int(value) if value.isdigit() else value
+            else:
+                frontmatter[key] = value
+
+    return frontmatter
+
+
+def extract_category(title: str) -> Optional[str]:
+    """
+    タイトルから【カテゴリ】を抽出
+
+    Args:
+        title: 記事タイトル
+
+    Returns:
+        カテゴリ名（【】なしの文字列）、なければNone
+    """
+    category_match = CATEGORY_PATTERN.search(title)
+    return category_match.group(1) if category_match else None
+
+
+def count_chars(body: str) -> int:
+    """
+    空白・改行を除いた文字数をカウント
+
+    str.split() の空白判定は正規表現の \\s と同じ（Unicode空白）。
+
+    Args:
+        body: 本文
+
+    Returns:
+        文字数
+    """
+    return sum(len(chunk) for chunk in body.split())
+
+
+def parse_article_text(text: str, default_title: str = "") -> Dict:
+    """
+    記事テキストを1パスで解析
+
+    Args:
+        text: ファイル全体の内容
+        default_title: frontmatterにtitleがない場合のタイトル
+
+    Returns:
+        frontmatter, body, char_count, category を含む辞書
+    """
+    frontmatter_text, body = split_frontmatter(text)
+    frontmatter = parse_frontmatter(frontmatter_text)
+    title = frontmatter.get('title', default_title)
+
+    return {
+        "frontmatter": frontmatter,
+        "body": body,
+        "char_count": count_chars(body),
+        "category": extract_category(title)
+    }
+
+
+def parse_article(file_path: Path) -> Dict:
+    """
+    記事ファイルを1回だけ読み込んで解析
+
+    Args:
+        file_path: 記事ファイルのパス
+
+    Returns:
+        frontmatter, body, char_count, category, sha256（ファイル内容のハッシュ）を含む辞書
+    """
+    raw = file_path.read_bytes()
+    text = raw.decode('utf-8')
+
+    # Path.read_text() と同じく改行を \n に揃える
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+    parsed = parse_article_text(text, default_title=file_path.stem)
+    parsed["sha256"] = hashlib.sha256(raw).hexdigest()
+
+    return parsed
@@ -0,0 +1,296 @@
+"""
+用例検索（KWIC: Key Word In Context）
+
+目的: 書き味パターンや任意の語句の用例を、本文を全件走査せずに前後の文脈付きで返す
+      （kwic-search.py と、記事作成プロンプト向けの呼び出しで共有）
+
+- パターン: extract-patterns.py が article_pattern_hits に保存した全出現の位置を使う
+  （本文が走査時から変わった記事は除く。extract-patterns.py の再実行で追従する）
+- 語句: articles_trigram（trigram索引）で候補記事を絞り込み、候補の本文だけから位置を求める
+  （索引は任意で migrate-to-sqlite.py --trigram で作る。索引がないDBと3文字未満の語句は、
+  絞り込み条件に合う記事の本文を照合する）
+
+用例は ELO の高い順（同点は rowid の降順）、記事内では出現位置の順に並ぶ。
+"""
+
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from lib.corpus_db import decompress_content, has_trigram_index
+from lib.segmenter import containing_span, load_segments, segment_text
+
+
+# 用例の並び（extract-patterns.py の分析順と同じ）
+KWIC_ORDER = "a.elo_rating DESC, a.rowid DESC"
+
+# 用例がこの数以上のパターンは、ELO の索引順に記事をたどって用例を拾う（pattern_kwic）
+INDEX_ORDER_MIN_HITS = 1000
+
+# trigram 索引で絞り込める語句の最小文字数
+TRIGRAM_MIN_CHARS = 3
+
+
+def article_filters(category: Optional[str] = None, year: Optional[int] = None,
+                    min_elo: Optional[int] = None, max_elo: Optional[int] = None) -> Tuple[str, List]:
+    """
+    記事の絞り込み条件を組み立てる
+
+    Args:
+        category: カテゴリ
+        year: 年
+        min_elo: 最小ELOレーティング
+        max_elo: 最大ELOレーティング
+
+    Returns:
+        (" AND ..." 形式の条件, パラメータ)
+    """
+    clauses = []
+    params = []
+
+    for clause, value in (("a.category = ?", category), ("a.year = ?", year),
+                          ("a.elo_rating >= ?", min_elo), ("a.elo_rating <= ?", max_elo)):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+
+def trigram_query(phrase: str) -> str:
+    """
+    語句を含む記事の候補を trigram 索引で引く MATCH 式（語句の3文字組すべてを AND）
+
+    detail='none' の索引は語句（位置の連続）を照合できず、LIKE は候補ごとに本文を読み直すため、
+    3文字組の AND で候補を絞り、出現は呼び出し側で本文から確かめる。
+
+    Args:
+        phrase: 3文字以上の語句
+
+    Returns:
+        FTS5 の MATCH 式
+    """
+    trigrams = dict.fromkeys(phrase[i:i + 3] for i in range(len(phrase) - 2))
+    return " AND ".join('"' + trigram.replace('"', '""') + '"' for trigram in trigrams)
+
+
+def kwic_line(article: Tuple, text: str, start: int, end: int, window: int,
+              sentences: Optional[List[Tuple[int, int]]] = None) -> Dict:
+    """
+    1つの出現を KWIC の1行にする
+
+    Args:
+        article: (id, title, year, category, elo_rating)
+        text: 本文
+        start: 出現の開始位置
+        end: 出現の終了位置
+        window: 前後に含める文字数
+        sentences: 本文の文の位置（指定すると出現を含む文を sentence に入れる）
+
+    Returns:
+        記事情報と left / keyword / right（と sentence）
+    """
+    article_id, title, year, category, elo_rating = article
+
+    line = {
+        "article_id": article_id,
+        "title": title,
+        "year": year,
+        "category": category,
+        "elo_rating": elo_rating,
+        "start": start,
+        "end": end,
+        "left": text[max(0, start - window):start],
+        "keyword": text[start:end],
+        "right": text[end:end + window]
+    }
+
+    if sentences is not None:
+        span = containing_span(sentences, start)
+        line["sentence"] = text[span[0]:span[1]] if span else text[start:end]
+
+    return line
+
+
+def sentence_spans(conn: sqlite3.Connection, texts: Dict[str, Tuple[Optional[str], str]]) -> Dict[str, List]:
+    """
+    記事の文の位置（text_segments に保存済みならそれを、なければ本文から求める）
+
+    Args:
+        conn: データベース接続
+        texts: 記事ID → (本文ハッシュ, 本文)
+
+    Returns:
+        記事ID → 文の位置
+    """
+    cached = load_segments(conn, [content_hash for content_hash, _ in texts.values()])
+    return {
+        article_id: cached[content_hash][0] if content_hash in cached else segment_text(text)[0]
+        for article_id, (content_hash, text) in texts.items()
+    }
+
+
+def pattern_kwic(conn: sqlite3.Connection, pattern_name: str, pattern_type: Optional[str] = None,
+                 window: int = 20, offset: int = 0, limit: int = 20, sentences: bool = False, **filters) -> Dict:
+    """
+    書き味パターンの用例を返す
+
+    Args:
+        conn: データベース接続
+        pattern_name: パターン名（例: 極論前置き型）
+        pattern_type: パターン種別（同名のパターンを区別する場合）
+        window: 前後に含める文字数
+        offset: 先頭から読み飛ばす用例数
+        limit: 返す用例数
+        sentences: 出現を含む文（lib/segmenter.py の分割）も返す
+        **filters: article_filters() の条件
+
+    Returns:
+        total（用例の総数）/ offset / lines / elapsed_ms
+    """
+    started = time.perf_counter()
+    where, filter_params = article_filters(**filters)
+
+    # 結合順は {join} で切り替える。CROSS JOIN はパターンの出現から引く（用例の少ないパターン向け）。
+    # JOIN のままだと ELO の索引順に記事をたどってページが埋まった時点で止まる（用例の多いパターン向け）が、
+    # 用例の少ないパターンでは全記事をたどることになる
+    source = """
+        FROM pattern_definitions d
+        {join} article_pattern_hits h ON h.pattern_key = d.pattern_key
+        JOIN articles a ON a.id = h.article_id
+        JOIN article_pattern_state s ON s.article_id = a.id AND s.content_hash IS a.content_hash
+        WHERE d.pattern_name = ? AND (? IS NULL OR d.pattern_type = ?){where}
+    """
+    params = [pattern_name, pattern_type, pattern_type] + filter_params
+
+    total = conn.execute(
+        f"SELECT COALESCE(SUM(h.hit_count), 0) {source.format(join='CROSS JOIN', where=where)}", params
+    ).fetchone()[0]
+    join = "JOIN" if total >= INDEX_ORDER_MIN_HITS else "CROSS JOIN"
+
+    occurrences = conn.execute(f"""
+        SELECT a.id, json_extract(o.value, '$[0]') AS start, json_extract(o.value, '$[1]') AS end
+        {source.format(join=join, where=where).replace("WHERE", ", json_each(h.offsets) o WHERE", 1)}
+        ORDER BY {KWIC_ORDER}, start, end
+        LIMIT ? OFFSET ?
+    """, params + [limit, offset]).fetchall()
+
+    articles = {}
+    article_ids = list(dict.fromkeys(article_id for article_id, _, _ in occurrences))
+    if article_ids:
+        for row in conn.execute(f"""
+            SELECT id, title, year, category, elo_rating, content, content_hash
+            FROM articles WHERE id IN ({', '.join('?' * len(article_ids))})
+        """, article_ids):
+            articles[row[0]] = (row[:5], decompress_content(row[5]) or "", row[6])
+
+    spans = sentence_spans(conn, {
+        article_id: (content_hash, text) for article_id, (_, text, content_hash) in articles.items()
+    }) if sentences else {}
+
+    lines = [
+        kwic_line(articles[article_id][0], articles[article_id][1], start, end, window, spans.get(article_id))
+        for article_id, start, end in occurrences
+    ]
+
+    return {
+        "total": total,
+        "offset": offset,
+        "lines": lines,
+        "elapsed_ms": (time.perf_counter() - started) * 1000
+    }
+
+
+def phrase_kwic(conn: sqlite3.Connection, phrase: str, window: int = 20, offset: int = 0,
+                limit: int = 20, count_total: bool = True, sentences: bool = False, **filters) -> Dict:
+    """
+    任意の語句の用例を返す（出現は左から重ならないように数える）
+
+    Args:
+        conn: データベース接続
+        phrase: 語句
+        window: 前後に含める文字数
+        offset: 先頭から読み飛ばす用例数
+        limit: 返す用例数
+        count_total: False なら表示範囲が埋まった時点で打ち切る（total は None。
+                     総数には候補記事すべての本文が要るため、頻出語句のページ送り用）
+        sentences: 出現を含む文（lib/segmenter.py の分割）も返す
+        **filters: article_filters() の条件
+
+    Returns:
+        total（用例の総数）/ offset / lines / elapsed_ms / indexed（trigram索引を使ったか）
+    """
+    if not phrase:
+        raise ValueError("語句が空です")
+
+    started = time.perf_counter()
+    where, filter_params = article_filters(**filters)
+
+    indexed = len(phrase) >= TRIGRAM_MIN_CHARS and has_trigram_index(conn)
+    if indexed:
+        candidates = "a.rowid IN (SELECT rowid FROM articles_trigram WHERE articles_trigram MATCH ?)"
+        params = [trigram_query(phrase)] + filter_params
+    else:
+        # 索引がないDBと短い語句は、絞り込み条件に合う全記事が候補（本文の照合は下のループで1回だけ）
+        candidates = "a.content != ''"
+        params = filter_params
+
+    # 並べ替えは rowid だけで行い、本文は1件ずつ読む（打ち切り時に残りの本文を読まない）
+    rowids = [rowid for rowid, in conn.execute(f"""
+        SELECT a.rowid FROM articles a
+        WHERE {candidates}{where}
+        ORDER BY {KWIC_ORDER}
+    """, params)]
+
+    total = 0
+    lines = []
+
+    for rowid in rowids:
+        row = conn.execute("""
+            SELECT id, title, year, category, elo_rating, content, content_hash FROM articles WHERE rowid = ?
+        """, (rowid,)).fetchone()
+        text = decompress_content(row[5]) or ""
+        count = text.count(phrase)
+
+        # 表示範囲にかかる記事だけ出現位置を求める
+        if count and total + count > offset and len(lines) < limit:
+            position = text.find(phrase)
+            index = total
+            spans = sentence_spans(conn, {row[0]: (row[6], text)})[row[0]] if sentences else None
+            while position != -1 and len(lines) < limit:
+                if index >= offset:
+                    lines.append(kwic_line(row[:5], text, position, position + len(phrase), window, spans))
+                index += 1
+                position = text.find(phrase, position + len(phrase))
+
+        total += count
+        if not count_total and len(lines) >= limit:
+            total = None
+            break
+
+    return {
+        "total": total,
+        "offset": offset,
+        "lines": lines,
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+        "indexed": indexed
+    }
+
+
+def list_patterns(conn: sqlite3.Connection) -> List[Tuple[str, str, int]]:
+    """
+    用例を検索できるパターンの一覧
+
+    Args:
+        conn: データベース接続
+
+    Returns:
+        (パターン種別, パターン名, 用例数) のリスト（定義順）
+    """
+    return conn.execute("""
+        SELECT d.pattern_type, d.pattern_name, COALESCE(SUM(h.hit_count), 0)
+        FROM pattern_definitions d
+        LEFT JOIN article_pattern_hits h ON h.pattern_key = d.pattern_key
+        GROUP BY d.pattern_type, d.pattern_name
+        ORDER BY MIN(d.position)
+    """).fetchall()
@@ -0,0 +1,153 @@
+"""
+writing-corpus.db への接続の共有（読み取り専用接続のプールと書き込み用接続）
+
+目的: 記事作成ジョブから何百回も呼ばれるサンプリングなどが、呼び出しのたびに接続を開き直さず、
+      同期スクリプトが書き込み中でも待たされずに読めるようにする
+      （smart-sampler.py・sync-elo-to-corpus.py・extract-patterns.py・常駐サーバーで共有）
+
+- 読み取りは mode=ro（URI）で開いた接続をプールから貸し出す。DBは WAL モードなので書き込み中も読める
+- 書き込みは corpus_db.connect()（WAL・busy_timeout・recursive_triggers）で開いた1本の接続をロックで順番に使う
+- どちらも busy_timeout / mmap_size / cache_size を設定し、接続を使い回すので
+  同じSQL文字列のコンパイル結果（sqlite3 の文キャッシュ）も再利用される
+
+使い方:
+    with open_corpus(db_path).reader() as conn:
+        rows = conn.execute("SELECT ...").fetchall()
+"""
+
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from queue import Empty, LifoQueue
+from typing import Dict, Iterator, List
+
+from lib.corpus_db import STATEMENT_CACHE_SIZE, apply_pragmas, connect, register_functions
+
+
+# 読み取り専用接続の保持数（これを超えて同時に借りた分は返却時に閉じる）
+READER_POOL_SIZE = 4
+
+# プロセス内で共有する Corpus（DBパス → Corpus）
+_corpora: Dict[Path, "Corpus"] = {}
+_corpora_lock = threading.Lock()
+
+
+class Corpus:
+    """writing-corpus.db への接続をまとめて持つ"""
+
+    def __init__(self, db_path: Path, pool_size: int = READER_POOL_SIZE):
+        """
+        Args:
+            db_path: データベースファイルパス
+            pool_size: 読み取り専用接続の保持数
+        """
+        self.db_path = Path(db_path).resolve()
+        self.pool_size = pool_size
+        self._readers: LifoQueue = LifoQueue()
+        self._writer = None
+        self._writer_lock = threading.RLock()
+
+    def _open_reader(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"{self.db_path.as_uri()}?mode=ro", uri=True, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        apply_pragmas(conn)
+        conn.execute("PRAGMA query_only = ON")
+        register_functions(conn)
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        読み取り専用の接続を借りる
+
+        返却時に row_factory を戻し、読み取りトランザクションを閉じる（借りた側で row_factory を変えてよい）。
+
+        Yields:
+            データベース接続
+        """
+        try:
+            conn = self._readers.get_nowait()
+        except Empty:
+            conn = self._open_reader()
+
+        try:
+            yield conn
+        finally:
+            conn.row_factory = None
+            if conn.in_transaction:
+                conn.rollback()
+            if self._readers.qsize() < self.pool_size:
+                self._readers.put(conn)
+            else:
+                conn.close()
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        書き込み用の接続を借りる（プロセス内で1本。同時に借りた側は順番待ち）
+
+        正常に抜けたら未コミットの変更をコミットし、例外ならロールバックする。
+
+        Yields:
+            データベース接続（corpus_db.connect() で開いたもの）
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = connect(self.db_path, check_same_thread=False)
+
+            conn = self._writer
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            else:
+                if conn.in_transaction:
+                    conn.commit()
+            finally:
+                conn.row_factory = None
+
+    def close(self):
+        """保持している接続をすべて閉じる"""
+        readers: List[sqlite3.Connection] = []
+        while True:
+            try:
+                readers.append(self._readers.get_nowait())
+            except Empty:
+                break
+        for conn in readers:
+            conn.close()
+
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+def open_corpus(db_path: Path) -> Corpus:
+    """
+    DBパスごとにプロセス内で共有する Corpus を返す
+
+    Args:
+        db_path: データベースファイルパス
+
+    Returns:
+        Corpus
+    """
+    key = Path(db_path).resolve()
+    with _corpora_lock:
+        if key not in _corpora:
+            _corpora[key] = Corpus(key)
+        return _corpora[key]
+
+
+@atexit.register
+def close_all():
+    """プロセス終了時に接続を閉じる（最後の接続が閉じるときに WAL がDB本体へ書き戻される）"""
+    with _corpora_lock:
+        for corpus in _corpora.values():
+            corpus.close()
+        _corpora.clear()
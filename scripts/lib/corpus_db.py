@@ -0,0 +1,873 @@
+"""
+writing-corpus.db のスキーマと articles 行の組み立て・更新を行う共有処理
+
+目的: migrate-to-sqlite.py（全件移行・差分移行）と watch-raw-to-db.py（差分反映）で
+      スキーマ・列の対応付け・upsert処理を共有する
+
+本文の圧縮保存:
+    DB作成時に content_codec（none / zlib / lzma）を選ぶと corpus_settings に記録され、
+    articles.content には圧縮済みのBLOBが入る（空文字列はそのまま）。
+    読み出しは decompress_content()（SQLでは corpus_decompress()）で平文に戻す。
+    圧縮時の articles_fts は平文ビュー articles_text を外部コンテンツとするため、
+    本文は索引以外に二重に持たない。
+
+用例検索の trigram 索引:
+    articles_trigram は語句の用例検索（lib/concordance.py）の候補絞り込み用で、作成は任意
+    （migrate-to-sqlite.py --trigram / create_trigram_index()）。本文と同程度の容量を使うため、
+    圧縮保存と併用するとDBは非圧縮のときより大きくなる。作成後は articles_fts と同じくトリガーで追従する。
+
+ランダムサンプリング:
+    articles.sample_key に記事IDのハッシュから求めた63bitの整数を持ち、索引の区間を乱数で選んで
+    読むことで、全件を並べ替えずに再現可能な等確率の無作為抽出ができる（lib/sampling.py の random_articles()）。
+
+集計テーブル:
+    article_stats に全体・カテゴリ別・年別の件数と合計値をトリガーで保持し、
+    v_statistics / v_category_stats / v_year_stats はその薄いSELECTにする。
+    記事数によらず統計の読み出しは1〜数行の参照で済む。
+"""
+
+import hashlib
+import json
+import lzma
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+
+# articles テーブルへ書き込む列（INSERT時の並び順）
+ARTICLE_COLUMNS = (
+    "id", "title", "date", "year", "category", "word_count", "file_path", "content", "content_hash",
+    "quality_score", "elo_rating", "sampled", "reference_article",
+    "rewrite_status", "rewrite_score", "rewrite_type", "detail_scores", "risk_hits",
+    "note_article_path", "rewrite_date", "deletion_reason", "archived_reason", "sample_key"
+)
+
+# 接続の設定（apply_pragmas()）。書き込み中の接続があれば busy_timeout まで待つ
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KIB = 64 * 1024
+
+# 接続ごとに保持するコンパイル済みSQL文の数（同じSQL文字列は再コンパイルしない）
+STATEMENT_CACHE_SIZE = 256
+
+# 元ファイルから再生成できる列。差分反映ではこれだけを書き換え、
+# ELO・リライト状態などDB側で更新される列は保持する
+SOURCE_COLUMNS = ("title", "date", "year", "category", "word_count", "file_path", "content", "content_hash")
+
+# DB側（sync-elo-to-corpus.py）が正とする列。metadata からの差分移行でも上書きしない
+DB_OWNED_COLUMNS = ("elo_rating",)
+
+
+# article_stats の集計項目（列名 → 1記事あたりの値。{r} は new / old / articles）
+STAT_MEASURES = (
+    ("article_count", "1"),
+    ("pending", "{r}.rewrite_status IS 'pending'"),
+    ("in_progress", "{r}.rewrite_status IS 'in_progress'"),
+    ("completed", "{r}.rewrite_status IS 'completed'"),
+    ("deleted", "{r}.rewrite_status IS 'deleted'"),
+    ("archived", "{r}.rewrite_status IS 'archived'"),
+    ("rewrite_candidates", "COALESCE({r}.rewrite_score >= 70, 0)"),
+    ("review_candidates", "COALESCE({r}.rewrite_score >= 50 AND {r}.rewrite_score < 70, 0)"),
+    ("archive_candidates", "COALESCE({r}.rewrite_score >= 30 AND {r}.rewrite_score < 50, 0)"),
+    ("deletion_candidates", "COALESCE({r}.rewrite_score < 30, 0)"),
+    ("rewrite_score_sum", "COALESCE({r}.rewrite_score, 0)"),
+    ("rewrite_score_count", "{r}.rewrite_score IS NOT NULL"),
+    ("word_count_sum", "COALESCE({r}.word_count, 0)"),
+    ("word_count_count", "{r}.word_count IS NOT NULL"),
+    ("elo_sum", "COALESCE({r}.elo_rating, 0)"),
+    ("elo_count", "{r}.elo_rating IS NOT NULL"),
+    ("high_elo", "COALESCE({r}.elo_rating >= 1550, 0)"),
+    ("medium_elo", "COALESCE({r}.elo_rating >= 1520 AND {r}.elo_rating < 1550, 0)"),
+    ("low_elo", "COALESCE({r}.elo_rating < 1520, 0)"),
+    ("sampled_count", "COALESCE({r}.sampled = 1, 0)"),
+    ("reference_count", "COALESCE({r}.reference_article = 1, 0)"),
+)
+
+# article_stats の切り口（dimension → key の式）。未分類カテゴリは '' で表す
+STAT_DIMENSIONS = (
+    ("total", "''"),
+    ("category", "COALESCE({r}.category, '')"),
+    ("year", "{r}.year"),
+)
+
+# 集計値に影響する articles の列（これ以外の UPDATE では集計トリガーを動かさない）
+STAT_SOURCE_COLUMNS = (
+    "category", "year", "word_count", "elo_rating", "sampled", "reference_article",
+    "rewrite_status", "rewrite_score"
+)
+
+# 本文の圧縮形式
+CONTENT_CODECS = ("none", "zlib", "lzma")
+
+# lzma.compress() の既定（.xz 形式）の先頭バイト列。それ以外のBLOBは zlib として扱う
+XZ_MAGIC = b"\xfd7zXZ\x00"
+
+
+def compress_content(text: Optional[str], codec: str) -> Union[str, bytes, None]:
+    """
+    本文を保存形式に変換
+
+    Args:
+        text: 本文（平文）
+        codec: none / zlib / lzma
+
+    Returns:
+        codec が none か本文が空なら平文、それ以外は圧縮済みBLOB
+    """
+    if codec == "none" or not text:
+        return text
+
+    data = text.encode("utf-8")
+    if codec == "zlib":
+        return zlib.compress(data, 9)
+    if codec == "lzma":
+        return lzma.compress(data)
+
+    raise ValueError(f"未対応の圧縮形式: {codec}")
+
+
+def decompress_content(value: Union[str, bytes, memoryview, None]) -> Optional[str]:
+    """
+    保存形式の本文を平文に戻す（平文はそのまま返す）
+
+    Args:
+        value: articles.content の値
+
+    Returns:
+        本文（平文）
+    """
+    if not isinstance(value, (bytes, memoryview)):
+        return value
+
+    data = bytes(value)
+    if data.startswith(XZ_MAGIC):
+        return lzma.decompress(data).decode("utf-8")
+    return zlib.decompress(data).decode("utf-8")
+
+
+def article_dict(row: sqlite3.Row) -> Dict:
+    """articles の行を辞書に変換（content は平文に戻す）"""
+    article = dict(row)
+    if "content" in article:
+        article["content"] = decompress_content(article["content"])
+    return article
+
+
+def register_functions(conn: sqlite3.Connection):
+    """SQL関数 corpus_decompress(content) を登録"""
+    conn.create_function("corpus_decompress", 1, decompress_content, deterministic=True)
+
+
+def get_setting(conn: sqlite3.Connection, key: str, default: Optional[str] = None) -> Optional[str]:
+    """corpus_settings の値を取得（テーブルがなければ default）"""
+    try:
+        row = conn.execute("SELECT value FROM corpus_settings WHERE key = ?", (key,)).fetchone()
+    except sqlite3.OperationalError:
+        return default
+    return row[0] if row else default
+
+
+def content_codec(conn: sqlite3.Connection) -> str:
+    """DBの本文圧縮形式（旧DBは none）"""
+    return get_setting(conn, "content_codec", "none")
+
+
+def apply_pragmas(conn: sqlite3.Connection):
+    """
+    接続ごとの設定（待ち時間・mmap・ページキャッシュ）を行う（読み取り・書き込み共通）
+
+    Args:
+        conn: データベース接続
+    """
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+
+
+def enable_wal(conn: sqlite3.Connection):
+    """
+    WAL モードにする（DBファイルに記録される）
+
+    書き込み中も読み取り専用の接続（lib/corpus.py）が待たされずに読める。
+    WAL では synchronous = NORMAL でもコミット済みのデータは壊れない。
+    """
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+
+
+def connect(db_path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    書き込み用の接続を開く
+
+    INSERT OR REPLACE で置き換えられた行にも削除トリガーが働くよう
+    recursive_triggers を有効にする。圧縮DBのトリガーが使う corpus_decompress() も登録する。
+    DBは WAL モードにし、他の接続が書き込み中なら busy_timeout まで待つ。
+
+    Args:
+        db_path: データベースファイルパス
+        check_same_thread: False なら他のスレッドからも使える（lib/corpus.py の書き込み用接続）
+
+    Returns:
+        データベース接続
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread, cached_statements=STATEMENT_CACHE_SIZE)
+    apply_pragmas(conn)
+    enable_wal(conn)
+    conn.execute("PRAGMA recursive_triggers = ON")
+    register_functions(conn)
+    return conn
+
+
+def article_row(article: Dict, content: str, content_hash: Optional[str] = None) -> Dict:
+    """
+    記事メタデータを articles テーブルの行に変換
+
+    Args:
+        article: 記事メタデータ（metadata.json の1記事）
+        content: 本文（frontmatter除去済み）
+        content_hash: 元ファイルのsha256（差分判定用）
+
+    Returns:
+        列名 → 値 の辞書
+    """
+    corpus_meta = article['corpus_metadata']
+    rewrite_status = article['rewrite_status']
+    detail_scores = rewrite_status.get('detail_scores')
+    risk_hits = rewrite_status.get('risk_hits')
+
+    return {
+        "id": article['id'],
+        "title": article['title'],
+        "date": article['date'],
+        "year": article['year'],
+        "category": article.get('category'),
+        "word_count": article['word_count'],
+        "file_path": corpus_meta['source_path'],
+        "content": content,
+        "content_hash": content_hash,
+        "quality_score": corpus_meta.get('quality_score'),
+        "elo_rating": corpus_meta.get('elo_rating', 1500),
+        "sampled": 1 if corpus_meta.get('sampled') else 0,
+        "reference_article": 1 if corpus_meta.get('reference_article') else 0,
+        "rewrite_status": rewrite_status['status'],
+        "rewrite_score": rewrite_status.get('rewrite_score'),
+        "rewrite_type": rewrite_status.get('rewrite_type'),
+        "detail_scores": encode_detail_scores(detail_scores) if detail_scores is not None else None,
+        "risk_hits": encode_risk_hits(risk_hits) if risk_hits is not None else None,
+        "note_article_path": rewrite_status.get('note_article_path'),
+        "rewrite_date": rewrite_status.get('rewrite_date'),
+        "deletion_reason": rewrite_status.get('deletion_reason'),
+        "archived_reason": rewrite_status.get('archived_reason'),
+        "sample_key": sample_key(article['id'])
+    }
+
+
+def sample_key(article_id: str) -> int:
+    """
+    記事IDからランダムサンプリング用のキー（0 以上 2^63 未満）を求める
+
+    IDだけで決まるので、DBを作り直しても同じシードで同じ記事が選ばれる。
+
+    Args:
+        article_id: 記事ID
+
+    Returns:
+        sha1(ID) の先頭63bit
+    """
+    return int.from_bytes(hashlib.sha1(article_id.encode("utf-8")).digest()[:8], "big") >> 1
+
+
+def fill_sample_keys(conn: sqlite3.Connection) -> int:
+    """
+    sample_key のない記事（列の追加前に入った記事）にキーを入れる
+
+    Args:
+        conn: データベース接続
+
+    Returns:
+        更新した記事数
+    """
+    rows = conn.execute("SELECT rowid, id FROM articles WHERE sample_key IS NULL").fetchall()
+    conn.executemany("UPDATE articles SET sample_key = ? WHERE rowid = ?",
+                     [(sample_key(article_id), rowid) for rowid, article_id in rows])
+    return len(rows)
+
+
+def encode_detail_scores(detail_scores: Dict[str, int]) -> str:
+    """detail_scores を articles.detail_scores 列の JSON 文字列にする（軸の順序は保持）"""
+    return json.dumps(detail_scores, ensure_ascii=False)
+
+
+def encode_risk_hits(risk_hits: List[Dict]) -> str:
+    """risk_hits（本文リスクキーワードの出現回数）を articles.risk_hits 列の JSON 文字列にする"""
+    return json.dumps(risk_hits, ensure_ascii=False)
+
+
+def create_schema(conn: sqlite3.Connection, codec: Optional[str] = None) -> str:
+    """
+    データベーススキーマを作成（既存DBには不足分だけ追加）
+
+    articles_fts は articles（圧縮時は平文ビュー articles_text）を外部コンテンツとする
+    FTS5 テーブルで、articles への INSERT / UPDATE / DELETE はトリガーで反映される。
+    articles_trigram は作らない（create_trigram_index() で任意に作成）。
+
+    Args:
+        conn: データベース接続（connect() で開いたもの）
+        codec: 本文圧縮形式（None の場合は既存DBの設定、新規DBは none）
+
+    Returns:
+        DBの本文圧縮形式
+    """
+    stats_missing = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'article_stats'"
+    ).fetchone() is None
+
+    codec = create_tables(conn, codec)
+    create_fts_triggers(conn)
+    create_stats_triggers(conn)
+    create_indexes(conn)
+    fill_sample_keys(conn)
+
+    # 集計テーブル導入前のDBは既存の記事から集計し直す
+    if stats_missing:
+        rebuild_stats(conn)
+
+    create_stat_views(conn)
+    conn.commit()
+    return codec
+
+
+def create_tables(conn: sqlite3.Connection, codec: Optional[str] = None) -> str:
+    """
+    テーブルを作成（インデックス・トリガーなし）
+
+    一括ロードではこの後にデータを投入し、create_indexes() / create_fts_triggers() を
+    最後に実行する。
+
+    Args:
+        conn: データベース接続
+        codec: 本文圧縮形式（None の場合は既存DBの設定、新規DBは none）
+
+    Returns:
+        DBの本文圧縮形式
+
+    Raises:
+        ValueError: 既存DBと異なる圧縮形式を指定した場合（全件再構築が必要）
+    """
+
+    # 設定テーブル（本文圧縮形式など、DB作成時に決まる値）
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS corpus_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+
+    has_articles = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles'"
+    ).fetchone() is not None
+    stored_codec = get_setting(conn, "content_codec")
+
+    if stored_codec is None:
+        # corpus_settings 導入前のDBは非圧縮
+        stored_codec = "none" if has_articles else (codec or "none")
+        conn.execute("INSERT INTO corpus_settings (key, value) VALUES ('content_codec', ?)", (stored_codec,))
+
+    if stored_codec not in CONTENT_CODECS:
+        raise ValueError(f"未対応の圧縮形式: {stored_codec}")
+    if codec is not None and codec != stored_codec:
+        raise ValueError(
+            f"既存DBの圧縮形式（{stored_codec}）と異なる形式（{codec}）は指定できません。全件再構築してください"
+        )
+
+    # articlesテーブル
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS articles (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            date DATE NOT NULL,
+            year INTEGER NOT NULL,
+            category TEXT,
+            word_count INTEGER,
+            file_path TEXT NOT NULL,
+            content TEXT,
+            content_hash TEXT,
+
+            -- AI学習用メタデータ
+            quality_score REAL,
+            elo_rating INTEGER DEFAULT 1500,
+            sampled BOOLEAN DEFAULT 0,
+            reference_article BOOLEAN DEFAULT 0,
+
+            -- note.comリライト用メタデータ
+            rewrite_status TEXT DEFAULT 'pending',
+            rewrite_score REAL,
+            rewrite_type TEXT,
+            detail_scores TEXT,
+            risk_hits TEXT,
+            note_article_path TEXT,
+            rewrite_date DATE,
+            deletion_reason TEXT,
+            archived_reason TEXT,
+
+            -- ランダムサンプリング用（sample_key()）
+            sample_key INTEGER,
+
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # tagsテーブル
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        )
+    """)
+
+    # article_tagsテーブル（多対多）
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS article_tags (
+            article_id TEXT,
+            tag_id INTEGER,
+            FOREIGN KEY (article_id) REFERENCES articles(id),
+            FOREIGN KEY (tag_id) REFERENCES tags(id),
+            PRIMARY KEY (article_id, tag_id)
+        )
+    """)
+
+    # writing_patternsテーブル
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS writing_patterns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pattern_type TEXT NOT NULL,
+            pattern_name TEXT NOT NULL,
+            pattern TEXT,
+            examples TEXT
+        )
+    """)
+
+    # writing_pattern_statsテーブル（extract-patterns.py の全体・年別・カテゴリ別集計）
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS writing_pattern_stats (
+            dimension TEXT NOT NULL,
+            key NOT NULL,
+            pattern_type TEXT NOT NULL,
+            pattern_name TEXT NOT NULL,
+            occurrences INTEGER NOT NULL,
+            articles INTEGER NOT NULL,
+            scanned_articles INTEGER NOT NULL,
+            PRIMARY KEY (dimension, key, pattern_type, pattern_name)
+        )
+    """)
+
+    # extract-patterns.py の記事ごとのパターンヒット（パターンは pattern_definitions の pattern_key）
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pattern_definitions (
+            pattern_key TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            pattern_type TEXT NOT NULL,
+            pattern_name TEXT NOT NULL,
+            pattern TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pattern_sets (
+            pattern_version TEXT PRIMARY KEY,
+            pattern_keys TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS article_pattern_state (
+            article_id TEXT PRIMARY KEY,
+            content_hash TEXT,
+            pattern_version TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS article_pattern_hits (
+            article_id TEXT NOT NULL,
+            pattern_key TEXT NOT NULL,
+            hit_count INTEGER NOT NULL,
+            offsets TEXT NOT NULL,
+            PRIMARY KEY (article_id, pattern_key)
+        )
+    """)
+
+    # 文・段落の位置のキャッシュ（lib/segmenter.py。本文ハッシュごと）
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS text_segments (
+            content_hash TEXT PRIMARY KEY,
+            segmenter_version TEXT NOT NULL,
+            sentences TEXT NOT NULL,
+            paragraphs TEXT NOT NULL
+        )
+    """)
+
+    # elo_comparisonsテーブル
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS elo_comparisons (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            article_a TEXT NOT NULL,
+            article_b TEXT NOT NULL,
+            winner TEXT,
+            context TEXT,
+            confidence TEXT,
+            compared_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (article_a) REFERENCES articles(id),
+            FOREIGN KEY (article_b) REFERENCES articles(id)
+        )
+    """)
+
+    # 全文検索用FTS5テーブル（圧縮時は平文ビューを外部コンテンツにする）
+    fts_content = "articles"
+    if stored_codec != "none":
+        conn.execute("""
+            CREATE VIEW IF NOT EXISTS articles_text AS
+            SELECT rowid, title, category, corpus_decompress(content) AS content
+            FROM articles
+        """)
+        fts_content = "articles_text"
+
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            title,
+            category,
+            content,
+            content='{fts_content}',
+            content_rowid='rowid'
+        )
+    """)
+
+    # 集計テーブル（トリガーで更新）
+    measure_columns = ",\n            ".join(f"{name} NUMERIC NOT NULL DEFAULT 0" for name, _ in STAT_MEASURES)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS article_stats (
+            dimension TEXT NOT NULL,
+            key NOT NULL,
+            {measure_columns},
+            PRIMARY KEY (dimension, key)
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO article_stats (dimension, key) VALUES ('total', '')")
+
+    # 旧スキーマのDBに列を追加
+    existing_columns = {row[1] for row in conn.execute("PRAGMA table_info(articles)")}
+    if "content_hash" not in existing_columns:
+        conn.execute("ALTER TABLE articles ADD COLUMN content_hash TEXT")
+    if "detail_scores" not in existing_columns:
+        conn.execute("ALTER TABLE articles ADD COLUMN detail_scores TEXT")
+    if "risk_hits" not in existing_columns:
+        conn.execute("ALTER TABLE articles ADD COLUMN risk_hits TEXT")
+    if "sample_key" not in existing_columns:
+        conn.execute("ALTER TABLE articles ADD COLUMN sample_key INTEGER")
+
+    return stored_codec
+
+
+def _content_expressions(conn: sqlite3.Connection):
+    """トリガー内で平文の本文を得る式（新しい行, 古い行）"""
+    if content_codec(conn) == "none":
+        return "new.content", "old.content"
+    return "corpus_decompress(new.content)", "corpus_decompress(old.content)"
+
+
+def create_fts_triggers(conn: sqlite3.Connection):
+    """articles_fts（と作成済みなら articles_trigram）をトリガーで追従させる（external content の標準パターン）"""
+    new_content, old_content = _content_expressions(conn)
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_fts(rowid, title, category, content)
+            VALUES (new.rowid, new.title, new.category, {new_content});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, title, category, content)
+            VALUES ('delete', old.rowid, old.title, old.category, {old_content});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE OF title, category, content ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, title, category, content)
+            VALUES ('delete', old.rowid, old.title, old.category, {old_content});
+            INSERT INTO articles_fts(rowid, title, category, content)
+            VALUES (new.rowid, new.title, new.category, {new_content});
+        END
+    """)
+
+    if has_trigram_index(conn):
+        create_trigram_triggers(conn)
+
+
+def has_trigram_index(conn: sqlite3.Connection) -> bool:
+    """用例検索用の trigram 索引（articles_trigram）があるか"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_trigram'"
+    ).fetchone() is not None
+
+
+def create_trigram_index(conn: sqlite3.Connection) -> bool:
+    """
+    用例検索用の trigram 索引（articles_trigram）を作成し、既存の記事から構築する
+
+    語句の3文字組で候補記事を絞るためだけに使うので位置情報は持たない（detail='none'）。
+    それでも本文と同程度の容量を使うため任意とし、作成後はトリガーで articles に追従させる。
+    トランザクションは呼び出し側で管理する。
+
+    Args:
+        conn: データベース接続（connect() で開いたもの）
+
+    Returns:
+        新たに作成した場合 True（作成済みなら何もせず False）
+    """
+    if has_trigram_index(conn):
+        return False
+
+    fts_content = "articles" if content_codec(conn) == "none" else "articles_text"
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE articles_trigram USING fts5(
+            content,
+            content='{fts_content}',
+            content_rowid='rowid',
+            tokenize='trigram',
+            detail='none'
+        )
+    """)
+    create_trigram_triggers(conn)
+    conn.execute("INSERT INTO articles_trigram(articles_trigram) VALUES ('rebuild')")
+    return True
+
+
+def create_trigram_triggers(conn: sqlite3.Connection):
+    """articles_trigram をトリガーで追従させる"""
+    new_content, old_content = _content_expressions(conn)
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS articles_trigram_ai AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_trigram(rowid, content) VALUES (new.rowid, {new_content});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS articles_trigram_ad AFTER DELETE ON articles BEGIN
+            INSERT INTO articles_trigram(articles_trigram, rowid, content) VALUES ('delete', old.rowid, {old_content});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS articles_trigram_au AFTER UPDATE OF content ON articles BEGIN
+            INSERT INTO articles_trigram(articles_trigram, rowid, content) VALUES ('delete', old.rowid, {old_content});
+            INSERT INTO articles_trigram(rowid, content) VALUES (new.rowid, {new_content});
+        END
+    """)
+
+
+def _stats_upsert(row: str, sign: str) -> str:
+    """1記事分の集計値を article_stats に加算（sign='-' で減算）する文を組み立てる"""
+    names = [name for name, _ in STAT_MEASURES]
+    values = [f"{sign}({expression.format(r=row)})" for _, expression in STAT_MEASURES]
+    updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in names)
+
+    statements = []
+    for dimension, key in STAT_DIMENSIONS:
+        statements.append(
+            f"INSERT INTO article_stats (dimension, key, {', '.join(names)}) "
+            f"VALUES ('{dimension}', {key.format(r=row)}, {', '.join(values)}) "
+            f"ON CONFLICT (dimension, key) DO UPDATE SET {updates};"
+        )
+
+    return "\n            ".join(statements)
+
+
+def create_stats_triggers(conn: sqlite3.Connection):
+    """article_stats を articles の INSERT / UPDATE / DELETE に追従させる"""
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS article_stats_ai AFTER INSERT ON articles BEGIN
+            {_stats_upsert("new", "+")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS article_stats_ad AFTER DELETE ON articles BEGIN
+            {_stats_upsert("old", "-")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS article_stats_au AFTER UPDATE OF {', '.join(STAT_SOURCE_COLUMNS)} ON articles BEGIN
+            {_stats_upsert("old", "-")}
+            {_stats_upsert("new", "+")}
+        END
+    """)
+
+
+def rebuild_stats(conn: sqlite3.Connection):
+    """article_stats を articles から集計し直す（一括ロード後・旧DBの移行用）"""
+    names = [name for name, _ in STAT_MEASURES]
+    sums = ", ".join(f"SUM({expression.format(r='articles')})" for _, expression in STAT_MEASURES)
+
+    conn.execute("DELETE FROM article_stats")
+
+    for dimension, key in STAT_DIMENSIONS:
+        conn.execute(f"""
+            INSERT INTO article_stats (dimension, key, {', '.join(names)})
+            SELECT '{dimension}', {key.format(r='articles')}, {sums}
+            FROM articles
+            GROUP BY 2
+        """)
+
+    conn.execute("INSERT OR IGNORE INTO article_stats (dimension, key) VALUES ('total', '')")
+
+
+# 統計ビュー（ビュー名 → CREATE VIEW 文）。article_stats の薄いSELECT
+STAT_VIEWS = {
+    "v_statistics": """CREATE VIEW v_statistics AS
+        SELECT
+            article_count as total,
+            pending,
+            in_progress,
+            completed,
+            deleted,
+            archived,
+            rewrite_candidates,
+            review_candidates,
+            archive_candidates,
+            deletion_candidates,
+            elo_sum * 1.0 / NULLIF(elo_count, 0) as avg_elo,
+            sampled_count,
+            reference_count
+        FROM article_stats
+        WHERE dimension = 'total'""",
+    "v_category_stats": """CREATE VIEW v_category_stats AS
+        SELECT
+            CASE WHEN key = '' THEN '未分類' ELSE key END as category,
+            article_count as count,
+            rewrite_score_sum * 1.0 / NULLIF(rewrite_score_count, 0) as avg_rewrite_score,
+            word_count_sum * 1.0 / NULLIF(word_count_count, 0) as avg_word_count
+        FROM article_stats
+        WHERE dimension = 'category' AND article_count > 0
+        ORDER BY count DESC, key""",
+    "v_year_stats": """CREATE VIEW v_year_stats AS
+        SELECT
+            key as year,
+            article_count as count,
+            rewrite_score_sum * 1.0 / NULLIF(rewrite_score_count, 0) as avg_rewrite_score
+        FROM article_stats
+        WHERE dimension = 'year' AND article_count > 0
+        ORDER BY year""",
+}
+
+
+def create_stat_views(conn: sqlite3.Connection):
+    """
+    統計ビューを作成（定義が変わったビューだけ作り直す。旧DBの全件走査ビューも置き換える）
+
+    定義が同じなら何もしないので、起動のたびに呼んでもスキーマは変わらず、
+    プール中の読み取り接続や常駐サーバーのコンパイル済みSQLも無効にならない。
+    """
+    existing = dict(conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'view' AND name IN ({', '.join('?' * len(STAT_VIEWS))})",
+        tuple(STAT_VIEWS)
+    ).fetchall())
+
+    for view, sql in STAT_VIEWS.items():
+        if existing.get(view) == sql:
+            continue
+        conn.execute(f"DROP VIEW IF EXISTS {view}")
+        conn.execute(sql)
+
+
+def create_indexes(conn: sqlite3.Connection):
+    """articles（と article_pattern_hits）のインデックスを作成"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_year ON articles(year)")
+    # カテゴリ別上位（sampling.top_articles_by_category）用。カテゴリ単独の索引はこれで代替する
+    conn.execute("DROP INDEX IF EXISTS idx_articles_category")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_articles_category_rewrite_score ON articles(category, rewrite_score DESC)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_category_elo_rating ON articles(category, elo_rating DESC)")
+    # ランダムサンプリング（sampling.random_articles）用。カテゴリ指定時は複合索引で直接たどる
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_sample_key ON articles(sample_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_category_sample_key ON articles(category, sample_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_rewrite_status ON articles(rewrite_status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_rewrite_score ON articles(rewrite_score)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_file_path ON articles(file_path)")
+    # ELOの最小・最大・上位取得用
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_elo_rating ON articles(elo_rating)")
+    # パターン別の用例検索（concordance.py）用
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_article_pattern_hits_pattern ON article_pattern_hits(pattern_key)")
+
+
+def rebuild_fts(conn: sqlite3.Connection):
+    """articles_fts（と作成済みなら articles_trigram）を articles の内容から作り直す"""
+    conn.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+    if has_trigram_index(conn):
+        conn.execute("INSERT INTO articles_trigram(articles_trigram) VALUES ('rebuild')")
+
+
+def upsert_source_rows(conn: sqlite3.Connection, rows: Iterable[Dict]) -> Dict[str, int]:
+    """
+    元ファイル由来の列だけを upsert し、articles_fts も追従させる
+
+    新規記事は全列を挿入する。既存記事は SOURCE_COLUMNS が変わった場合のみ更新する。
+    本文はDBの圧縮形式に変換して書き込む。
+    articles_fts はトリガーで更新される。トランザクションは呼び出し側で管理する。
+
+    Args:
+        conn: データベース接続
+        rows: article_row() の結果
+
+    Returns:
+        inserted / updated / unchanged の件数
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    select_columns = ", ".join(SOURCE_COLUMNS)
+    codec = content_codec(conn)
+
+    for row in rows:
+        row = dict(row, content=compress_content(row["content"], codec))
+        existing = conn.execute(
+            f"SELECT {select_columns} FROM articles WHERE id = ?", (row["id"],)
+        ).fetchone()
+
+        if existing is None:
+            placeholders = ", ".join("?" * len(ARTICLE_COLUMNS))
+            conn.execute(
+                f"INSERT INTO articles ({', '.join(ARTICLE_COLUMNS)}) VALUES ({placeholders})",
+                tuple(row[column] for column in ARTICLE_COLUMNS)
+            )
+            counts["inserted"] += 1
+            continue
+
+        old = dict(zip(SOURCE_COLUMNS, existing))
+        if all(old[column] == row[column] for column in SOURCE_COLUMNS):
+            counts["unchanged"] += 1
+            continue
+
+        assignments = ", ".join(f"{column} = ?" for column in SOURCE_COLUMNS)
+        conn.execute(
+            f"UPDATE articles SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            tuple(row[column] for column in SOURCE_COLUMNS) + (row["id"],)
+        )
+        counts["updated"] += 1
+
+    return counts
+
+
+def delete_articles(conn: sqlite3.Connection, article_ids: List[str]) -> int:
+    """
+    記事を削除（articles_fts はトリガーで追従）
+
+    Args:
+        conn: データベース接続
+        article_ids: 削除する記事ID
+
+    Returns:
+        削除件数
+    """
+    deleted = 0
+
+    for article_id in article_ids:
+        deleted += conn.execute("DELETE FROM articles WHERE id = ?", (article_id,)).rowcount
+
+    return deleted
@@ -0,0 +1,474 @@
+"""
+行区切りJSON（NDJSON）＋オフセットインデックスによるメタデータストア
+
+目的: metadata.json を丸ごと json.load / json.dump せずに、
+      記事単位の遅延読み込み・ストリーミング走査・レコード単位の書き換えを行う
+
+ファイル構成（data/corpus/）:
+- metadata.ndjson       1行1記事。各行は余白付きのスロットで、収まる更新はその場で上書き
+                        （収まらない更新・削除で空く旧スロットは、新しいインデックスを書いた後で空白にする）
+- metadata.index.json   記事順の [id, source_path, offset, capacity] と管理情報
+- metadata.header.json  generated_at / version / statistics / errors
+
+metadata.json は互換用のエクスポートとして引き続き生成する。
+ストアが存在しない、または metadata.json が外部で更新されている場合は
+metadata.json から取り込み直す。
+"""
+
+import json
+import os
+from bisect import bisect_left
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+STORE_VERSION = 1
+
+# 1スロットあたりの余白（バイト）。スコア等の追記をその場で吸収する
+SLOT_SLACK = 256
+
+RECORD_FILE = "metadata.ndjson"
+INDEX_FILE = "metadata.index.json"
+HEADER_FILE = "metadata.header.json"
+JSON_FILE = "metadata.json"
+
+
+def _encode_record(record: Dict) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _dump_indented(value, level: int) -> str:
+    """json.dump(indent=2) で level 段目に置いたときと同じ文字列を返す"""
+    return json.dumps(value, ensure_ascii=False, indent=2).replace('\n', '\n' + '  ' * level)
+
+
+def _write_atomic(path: Path, text: str):
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def _file_signature(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class MetadataStore:
+    """
+    記事メタデータのレコードストア
+
+    使い方:
+        store = MetadataStore.open(project_root / "data" / "corpus")
+        for article in store:          # ストリーミング走査
+            ...
+        store.patch(article_id, {"rewrite_status": {"rewrite_score": 72}})
+        store.flush()
+        store.export_json()            # 互換用 metadata.json
+    """
+
+    def __init__(self, corpus_dir: Path):
+        self.corpus_dir = Path(corpus_dir)
+        self.record_path = self.corpus_dir / RECORD_FILE
+        self.index_path = self.corpus_dir / INDEX_FILE
+        self.header_path = self.corpus_dir / HEADER_FILE
+        self.json_path = self.corpus_dir / JSON_FILE
+
+        self._order: List[str] = []
+        self._slots: Dict[str, List] = {}
+        self._header: Dict = {}
+        self._dead_bytes = 0
+        self._pending_blanks: List[List[int]] = []
+        self._keys: Optional[List[PurePosixPath]] = None
+        self._source_json: Optional[Dict] = None
+        self._index_dirty = False
+        self._header_dirty = False
+        self._file = None
+
+    # ------------------------------------------------------------------
+    # 読み込み・初期化
+
+    @classmethod
+    def open(cls, corpus_dir: Path) -> "MetadataStore":
+        """
+        ストアを開く（必要なら metadata.json から取り込む）
+
+        Args:
+            corpus_dir: data/corpus/ のパス
+
+        Returns:
+            MetadataStore
+        """
+        store = cls(corpus_dir)
+
+        if store.exists():
+            store._load_index()
+            if store.json_path.exists() and _file_signature(store.json_path) != store._source_json:
+                print(f"metadata.json の更新を検出したため取り込み直します: {store.json_path}")
+                store.import_json()
+        elif store.json_path.exists():
+            store.import_json()
+
+        return store
+
+    def exists(self) -> bool:
+        return self.record_path.exists() and self.index_path.exists() and self.header_path.exists()
+
+    def _load_index(self):
+        with self.index_path.open('r', encoding='utf-8') as f:
+            index = json.load(f)
+        with self.header_path.open('r', encoding='utf-8') as f:
+            self._header = json.load(f)
+
+        self._order = []
+        self._slots = {}
+        for article_id, source_path, offset, capacity in index["records"]:
+            self._order.append(article_id)
+            self._slots[article_id] = [source_path, offset, capacity]
+
+        self._keys = None
+        self._dead_bytes = index.get("dead_bytes", 0)
+        self._source_json = index.get("source_json")
+
+    def import_json(self, json_path: Optional[Path] = None):
+        """
+        metadata.json を読み込んでストアを作り直す
+
+        Args:
+            json_path: 取り込む metadata.json（省略時は data/corpus/metadata.json）
+        """
+        json_path = Path(json_path) if json_path else self.json_path
+
+        with json_path.open('r', encoding='utf-8') as f:
+            metadata = json.load(f)
+
+        # "articles" キーはエクスポート時の並び順を保つためのプレースホルダとして残す
+        header = {key: (None if key == "articles" else value) for key, value in metadata.items()}
+
+        self.write_all(metadata.get("articles", []), header)
+
+        if json_path == self.json_path:
+            self._source_json = _file_signature(self.json_path)
+            self._index_dirty = True
+            self.flush()
+
+    # ------------------------------------------------------------------
+    # 参照
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, article_id: str) -> bool:
+        return article_id in self._slots
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.iter_articles()
+
+    def ids(self) -> List[str]:
+        """記事ID一覧（記事順）"""
+        return list(self._order)
+
+    @property
+    def header(self) -> Dict:
+        """generated_at / version / statistics / errors"""
+        return {key: value for key, value in self._header.items() if key != "articles"}
+
+    def update_header(self, **fields):
+        """ヘッダ項目を更新（flush() で書き込まれる）"""
+        self._header = _normalize_header({**self._header, **fields})
+        self._header_dirty = True
+
+    def source_paths(self) -> Dict[str, str]:
+        """source_path → 記事ID の辞書"""
+        return {self._slots[article_id][0]: article_id for article_id in self._order}
+
+    def _handle(self):
+        if self._file is None:
+            if not self.record_path.exists():
+                self.corpus_dir.mkdir(parents=True, exist_ok=True)
+                self.record_path.touch()
+            self._file = self.record_path.open('r+b')
+        return self._file
+
+    def _read_slot(self, article_id: str) -> Dict:
+        _, offset, capacity = self._slots[article_id]
+        f = self._handle()
+        f.seek(offset)
+        return json.loads(f.read(capacity))
+
+    def get(self, article_id: str) -> Optional[Dict]:
+        """
+        1記事だけ読み込む
+
+        Args:
+            article_id: 記事ID
+
+        Returns:
+            記事メタデータ（存在しなければNone）
+        """
+        if article_id not in self._slots:
+            return None
+        return self._read_slot(article_id)
+
+    def iter_articles(self) -> Iterator[Dict]:
+        """記事順にストリーミングで読み込む"""
+        for article_id in list(self._order):
+            yield self._read_slot(article_id)
+
+    # ------------------------------------------------------------------
+    # 書き込み
+
+    def _write_slot(self, article_id: str, record: Dict):
+        encoded = _encode_record(record)
+        f = self._handle()
+
+        if article_id in self._slots:
+            slot = self._slots[article_id]
+            source_path, offset, capacity = slot
+            if len(encoded) <= capacity:
+                f.seek(offset)
+                f.write(encoded + b' ' * (capacity - len(encoded)))
+                if record["corpus_metadata"]["source_path"] != source_path:
+                    slot[0] = record["corpus_metadata"]["source_path"]
+                    self._keys = None
+                    self._index_dirty = True
+                return
+            self._blank_slot(article_id)
+
+        # 収まらないレコードは末尾に新しいスロットを確保する
+        capacity = len(encoded) + SLOT_SLACK
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        f.write(encoded + b' ' * SLOT_SLACK + b'\n')
+        self._slots[article_id] = [record["corpus_metadata"]["source_path"], offset, capacity]
+        self._index_dirty = True
+
+    def _blank_slot(self, article_id: str):
+        """
+        旧スロットを空き領域にする
+
+        保存済みのインデックスはまだ旧スロットを指しているため、その場では空白にせず
+        flush() で新しいインデックスを書き込んだ後に空白にする（途中で中断しても読めるインデックスが残る）。
+        """
+        _, offset, capacity = self._slots[article_id]
+        self._pending_blanks.append([offset, capacity])
+        self._dead_bytes += capacity + 1
+
+    def _sort_keys(self) -> List[PurePosixPath]:
+        """記事順に並んだ source_path（put() の挿入位置の二分探索用。挿入・削除に合わせて更新する）"""
+        if self._keys is None:
+            self._keys = [PurePosixPath(self._slots[article_id][0]) for article_id in self._order]
+        return self._keys
+
+    def put(self, record: Dict, position: Optional[int] = None):
+        """
+        記事を追加または置き換える
+
+        新規記事は position（省略時は source_path のソート順）に挿入する。
+
+        Args:
+            record: 記事メタデータ
+            position: 記事順での挿入位置
+        """
+        article_id = record["id"]
+        is_new = article_id not in self._slots
+
+        self._write_slot(article_id, record)
+
+        if is_new:
+            keys = self._sort_keys()
+            key = PurePosixPath(record["corpus_metadata"]["source_path"])
+            if position is None:
+                position = bisect_left(keys, key)
+            keys.insert(position, key)
+            self._order.insert(position, article_id)
+            self._index_dirty = True
+
+    def patch(self, article_id: str, changes: Dict) -> bool:
+        """
+        記事の一部フィールドを書き換える（入れ子の辞書はマージ）
+
+        Args:
+            article_id: 記事ID
+            changes: 変更内容（例: {"rewrite_status": {"rewrite_score": 72}}）
+
+        Returns:
+            実際に値が変わったか
+        """
+        record = self._read_slot(article_id)
+        if not _merge(record, changes):
+            return False
+
+        self._write_slot(article_id, record)
+        return True
+
+    def delete(self, article_id: str):
+        """記事を削除する"""
+        self._blank_slot(article_id)
+        del self._slots[article_id]
+        position = self._order.index(article_id)
+        del self._order[position]
+        if self._keys is not None:
+            del self._keys[position]
+        self._index_dirty = True
+
+    def write_all(self, articles: Iterable[Dict], header: Dict):
+        """
+        ストア全体を書き直す（フルの再抽出・コンパクション用）
+
+        Args:
+            articles: 記事メタデータ（記事順）
+            header: generated_at / version / statistics / errors
+        """
+        self.close()
+        self.corpus_dir.mkdir(parents=True, exist_ok=True)
+
+        order = []
+        slots = {}
+        tmp_path = self.record_path.with_name(self.record_path.name + ".tmp")
+
+        with tmp_path.open('wb') as f:
+            for record in articles:
+                encoded = _encode_record(record)
+                slots[record["id"]] = [record["corpus_metadata"]["source_path"], f.tell(), len(encoded) + SLOT_SLACK]
+                order.append(record["id"])
+                f.write(encoded + b' ' * SLOT_SLACK + b'\n')
+
+        os.replace(tmp_path, self.record_path)
+
+        self._order = order
+        self._slots = slots
+        self._keys = None
+        self._dead_bytes = 0
+        self._pending_blanks = []
+        self._header = _normalize_header(header)
+        self._index_dirty = True
+        self._header_dirty = True
+        self.flush()
+
+    def compact(self):
+        """削除・移動で生じた空きスロットを詰める"""
+        slots = [self._slots[article_id][1:] for article_id in self._order]
+
+        def read_records():
+            with self.record_path.open('rb') as f:
+                for offset, capacity in slots:
+                    f.seek(offset)
+                    yield json.loads(f.read(capacity))
+
+        self.write_all(read_records(), self._header)
+
+    def flush(self):
+        """
+        インデックスとヘッダを書き込む（変更があった場合のみ）
+
+        順序は レコード → インデックス → 旧スロットの空白化。どこで中断しても
+        保存済みのインデックスが指すスロットは読める状態に保たれる。
+        """
+        if self._file is not None:
+            self._file.flush()
+
+        if self._index_dirty:
+            index = {
+                "version": STORE_VERSION,
+                "dead_bytes": self._dead_bytes,
+                "source_json": self._source_json,
+                "records": [[article_id, *self._slots[article_id]] for article_id in self._order]
+            }
+            _write_atomic(self.index_path, json.dumps(index, ensure_ascii=False, separators=(',', ':')))
+            self._index_dirty = False
+
+        if self._pending_blanks:
+            f = self._handle()
+            for offset, capacity in self._pending_blanks:
+                f.seek(offset)
+                f.write(b' ' * capacity)
+            f.flush()
+            self._pending_blanks = []
+
+        if self._header_dirty:
+            _write_atomic(self.header_path, json.dumps(self._header, ensure_ascii=False, indent=2))
+            self._header_dirty = False
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "MetadataStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # 互換エクスポート
+
+    def export_json(self, json_path: Optional[Path] = None):
+        """
+        metadata.json をストリーミングで書き出す
+
+        出力は json.dump(metadata, ensure_ascii=False, indent=2) と同一。
+
+        Args:
+            json_path: 出力先（省略時は data/corpus/metadata.json）
+        """
+        self.flush()
+        json_path = Path(json_path) if json_path else self.json_path
+        tmp_path = json_path.with_name(json_path.name + ".tmp")
+
+        with tmp_path.open('w', encoding='utf-8') as f:
+            f.write("{")
+            for i, (key, value) in enumerate(self._header.items()):
+                f.write("," if i else "")
+                f.write(f"\n  {json.dumps(key, ensure_ascii=False)}: ")
+
+                if key != "articles":
+                    f.write(_dump_indented(value, 1))
+                    continue
+
+                if not self._order:
+                    f.write("[]")
+                    continue
+
+                f.write("[")
+                for j, article in enumerate(self.iter_articles()):
+                    f.write(",\n    " if j else "\n    ")
+                    f.write(_dump_indented(article, 2))
+                f.write("\n  ]")
+            f.write("\n}")
+
+        os.replace(tmp_path, json_path)
+
+        if json_path == self.json_path:
+            self._source_json = _file_signature(self.json_path)
+            self._index_dirty = True
+            self.flush()
+
+
+def _normalize_header(header: Dict) -> Dict:
+    """エクスポート時に articles を generated_at / version の直後に置くためのプレースホルダを補う"""
+    header = dict(header)
+    if "articles" in header:
+        header["articles"] = None
+        return header
+
+    return {"generated_at": header.pop("generated_at", None),
+            "version": header.pop("version", None),
+            "articles": None, **header}
+
+
+def _merge(record: Dict, changes: Dict) -> bool:
+    """changes を record に再帰的にマージし、値が変わったかを返す"""
+    changed = False
+
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(record.get(key), dict):
+            changed |= _merge(record[key], value)
+        elif key not in record or record[key] != value:
+            record[key] = value
+            changed = True
+
+    return changed
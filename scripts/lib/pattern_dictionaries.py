@@ -0,0 +1,134 @@
+"""
+書き味パターン辞書（論理展開・感情表現・構造特徴）
+
+目的: extract-patterns.py の分析と、正規表現の計測（bench-patterns.py）で同じ定義を使う
+
+パターン名ごとの正規表現リストは re.MULTILINE で照合する。手で編集したら
+bench-patterns.py で未一致・高頻度・バックトラックの有無を確認する。
+"""
+
+
+# パターン定義
+LOGICAL_PATTERNS = {
+    "反語型": [
+        r"〜じゃないか[？?]",
+        r"〜というのはおかしいんじゃないか[？?]",
+        r"〜と思わないか[？?]",
+        r"〜なんじゃないか[？?]",
+        r"〜ではないだろうか[？?]"
+    ],
+    "極論前置き型": [
+        r"はっきり言って",
+        r"正直な話",
+        r"端的に言えば",
+        r"要するに",
+        r"結論から言うと"
+    ],
+    "段階的展開": [
+        r"まず[、,]",
+        r"次に[、,]",
+        r"最後に[、,]",
+        r"第一に",
+        r"第二に",
+        r"そして[、,]"
+    ],
+    "対比型": [
+        r"一方で[、,]",
+        r"他方で[、,]",
+        r"それに対して",
+        r"逆に[、,]",
+        r"反対に[、,]"
+    ],
+    "前提提示型": [
+        r"前提として[、,]",
+        r"そもそも[、,]",
+        r"まず前提として",
+        r"ここで重要なのは"
+    ]
+}
+
+EMOTIONAL_PATTERNS = {
+    "肯定表現": [
+        r"〜でいいじゃない[!！]",
+        r"素晴らしい",
+        r"最高だ[!！]",
+        r"これはいい[!！]",
+        r"良いもの",
+        r"気に入った"
+    ],
+    "否定表現": [
+        r"〜はクソ",
+        r"まぁ、〜だが",
+        r"残念ながら",
+        r"いまいち",
+        r"微妙",
+        r"ダメ"
+    ],
+    "驚き表現": [
+        r"マジか[!！]",
+        r"ちょ、",
+        r"おいおい[、,]",
+        r"びっくり",
+        r"驚いた",
+        r"まさか"
+    ],
+    "共感要請": [
+        r"〜だよね[？?]",
+        r"〜じゃん[!！]",
+        r"〜でしょ[？?]",
+        r"〜ですよね[？?]"
+    ],
+    "断定型": [
+        r"〜である[。.]",
+        r"〜だ[。.]",
+        r"〜に違いない",
+        r"間違いなく",
+        r"確実に"
+    ]
+}
+
+STRUCTURAL_PATTERNS = {
+    "導入部": [
+        r"^です、おはこんにちばんわ[!！]",
+        r"^さて[、,]",
+        r"^というわけで[、,]",
+        r"^今回は",
+        r"^本日は"
+    ],
+    "結論部": [
+        r"まとめると",
+        r"結論としては",
+        r"つまり[、,]",
+        r"ということで[、,]",
+        r"以上[、,]"
+    ],
+    "補足部": [
+        r"ちなみに[、,]",
+        r"余談ですが[、,]",
+        r"蛇足ながら",
+        r"ついでに言うと",
+        r"補足すると"
+    ],
+    "引用・参照": [
+        r"〜によれば[、,]",
+        r"〜の言葉を借りれば",
+        r"参考：",
+        r"引用：",
+        r"出典："
+    ],
+    "列挙型": [
+        r"[①②③④⑤⑥⑦⑧⑨⑩]",
+        r"[1-9]\.",
+        r"・",
+        r"- ",
+        r"\* "
+    ]
+}
+
+
+# パターン種別 → パターン定義辞書（extract-patterns.py の集計単位）
+PATTERN_GROUPS = {
+    "論理展開": LOGICAL_PATTERNS,
+    "感情表現": EMOTIONAL_PATTERNS,
+    "構造特徴": STRUCTURAL_PATTERNS
+}
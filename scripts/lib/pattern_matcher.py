@@ -0,0 +1,231 @@
+"""
+複数の正規表現パターンを1回の走査で照合する
+
+目的: extract-patterns.py のパターン辞書（種別 → パターン名 → 正規表現リスト）を
+      まとめてコンパイルし、本文を1回走査するだけで全パターンの出現を得る
+
+固定文字列に展開できる正規表現（文字クラス・エスケープ・行頭の ^ を含むもの）は
+Aho–Corasick オートマトン（lib/aho_corasick.py）に載せ、それ以外は残りの正規表現として
+個別に finditer する。どちらの経路でも、パターンごとの出現は re.finditer と同じ
+（左から重ならないように取った）位置になる。
+"""
+
+import re
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from lib.aho_corasick import KeywordAutomaton
+
+
+# 1つの正規表現を固定文字列に展開するときの上限（超える場合は正規表現のまま照合）
+MAX_LITERAL_EXPANSION = 64
+
+# 文字クラス外で特別な意味を持つ文字（これを含む正規表現は展開しない）
+REGEX_SPECIAL_CHARS = set(".^$*+?{}()|")
+
+
+def expand_literals(regex: str) -> Optional[Tuple[bool, List[str]]]:
+    """
+    正規表現を固定文字列の集合に展開
+
+    扱えるのは通常の文字・記号のエスケープ・文字クラス（否定なし、範囲可）・先頭の ^ のみ。
+
+    Args:
+        regex: 正規表現
+
+    Returns:
+        (行頭アンカーの有無, 固定文字列のリスト)。展開できなければ None
+    """
+    anchored = regex.startswith("^")
+    position = 1 if anchored else 0
+    alternatives = [""]
+
+    while position < len(regex):
+        char = regex[position]
+
+        if char == "\\":
+            if position + 1 >= len(regex) or regex[position + 1].isalnum():
+                return None  # \d \w \b などは展開しない
+            choices = [regex[position + 1]]
+            position += 2
+        elif char == "[":
+            parsed = _parse_char_class(regex, position)
+            if parsed is None:
+                return None
+            choices, position = parsed
+        elif char in REGEX_SPECIAL_CHARS or char == "]":
+            return None
+        else:
+            choices = [char]
+            position += 1
+
+        if len(alternatives) * len(choices) > MAX_LITERAL_EXPANSION:
+            return None
+        alternatives = [prefix + choice for prefix in alternatives for choice in choices]
+
+    if alternatives == [""]:
+        return None
+
+    return anchored, alternatives
+
+
+def _parse_char_class(regex: str, position: int) -> Optional[Tuple[List[str], int]]:
+    """[...] を文字のリストに展開し、(文字リスト, 閉じ括弧の次の位置) を返す"""
+    position += 1
+    if position < len(regex) and regex[position] == "^":
+        return None
+
+    chars = []
+    while position < len(regex) and (regex[position] != "]" or not chars):
+        char = regex[position]
+        if char == "\\":
+            if position + 1 >= len(regex) or regex[position + 1].isalnum():
+                return None
+            char = regex[position + 1]
+            position += 2
+        elif char == "[":
+            return None
+        else:
+            position += 1
+
+        if position + 1 < len(regex) and regex[position] == "-" and regex[position + 1] != "]":
+            end = regex[position + 1]
+            if end in "\\[" or ord(end) < ord(char):
+                return None
+            chars.extend(chr(code) for code in range(ord(char), ord(end) + 1))
+            position += 2
+        else:
+            chars.append(char)
+
+    if position >= len(regex):
+        return None
+
+    return list(dict.fromkeys(chars)), position + 1
+
+
+class PatternMatcher:
+    """パターン辞書全体をまとめた照合器"""
+
+    def __init__(self, pattern_groups: Dict[str, Dict[str, List[str]]], flags: int = re.MULTILINE):
+        """
+        Args:
+            pattern_groups: 種別 → パターン名 → 正規表現リスト
+            flags: 正規表現のフラグ（固定文字列に展開するのは MULTILINE 以外のフラグがない場合のみ）
+        """
+        # (種別, パターン名, 正規表現) を定義順に通し番号で持つ
+        self.patterns: List[Tuple[str, str, str]] = [
+            (pattern_type, pattern_name, regex)
+            for pattern_type, pattern_dict in pattern_groups.items()
+            for pattern_name, regexes in pattern_dict.items()
+            for regex in regexes
+        ]
+
+        literal_targets: Dict[str, List[Tuple[int, bool]]] = {}
+        self._residual: List[Tuple[int, re.Pattern]] = []
+
+        for pattern_id, (_, _, regex) in enumerate(self.patterns):
+            expanded = expand_literals(regex) if flags & ~re.MULTILINE == 0 else None
+            if expanded is None:
+                self._residual.append((pattern_id, re.compile(regex, flags)))
+                continue
+
+            anchored, literals = expanded
+            line_anchor = anchored and bool(flags & re.MULTILINE)
+            if anchored and not line_anchor:
+                # MULTILINE なしの ^ は文字列先頭のみ（固定文字列としては扱わない）
+                self._residual.append((pattern_id, re.compile(regex, flags)))
+                continue
+
+            for literal in literals:
+                literal_targets.setdefault(literal, []).append((pattern_id, line_anchor))
+
+        self._literal_targets = literal_targets
+        self._automaton = KeywordAutomaton(literal_targets)
+
+    def regex_patterns(self) -> List[Tuple[int, str]]:
+        """
+        固定文字列に展開できず、正規表現のまま照合するパターン
+
+        Returns:
+            (パターン番号, 正規表現) のリスト
+        """
+        return [(pattern_id, compiled.pattern) for pattern_id, compiled in self._residual]
+
+    def find_all(self, text: str, timings: Optional[Dict[int, float]] = None) -> List[List[Tuple[int, int]]]:
+        """
+        本文を1回走査し、パターンごとの出現位置を返す
+
+        Args:
+            text: 照合対象のテキスト
+            timings: 指定すると、正規表現のまま照合したパターンの処理時間（秒）を
+                     パターン番号ごとに書き込む（固定文字列のパターンはオートマトンの1回の走査に含まれる）
+
+        Returns:
+            パターン番号（self.patterns の添字）ごとの (開始, 終了) のリスト（開始位置順）
+        """
+        spans: List[List[Tuple[int, int]]] = [[] for _ in self.patterns]
+        last_end = [0] * len(self.patterns)
+        targets = self._literal_targets
+
+        # 同じパターンの出現は終了位置順（＝固定長なので開始位置順）に届くので、
+        # 直前の出現と重なるものを捨てれば re.finditer と同じ位置になる
+        for start, end, literal in self._automaton.iter_matches(text):
+            for pattern_id, line_anchor in targets[literal]:
+                if start < last_end[pattern_id]:
+                    continue
+                if line_anchor and start > 0 and text[start - 1] != "\n":
+                    continue
+                spans[pattern_id].append((start, end))
+                last_end[pattern_id] = end
+
+        for pattern_id, compiled in self._residual:
+            if timings is None:
+                spans[pattern_id] = [match.span() for match in compiled.finditer(text)]
+            else:
+                started = time.perf_counter()
+                spans[pattern_id] = [match.span() for match in compiled.finditer(text)]
+                timings[pattern_id] = time.perf_counter() - started
+
+        return spans
+
+    def iter_hits(self, text: str) -> Iterator[Tuple[str, str, str, int, int]]:
+        """
+        全パターンの出現を列挙
+
+        Args:
+            text: 照合対象のテキスト
+
+        Yields:
+            (種別, パターン名, 正規表現, 開始位置, 終了位置)。パターンの定義順・開始位置順
+        """
+        for pattern_id, spans in enumerate(self.find_all(text)):
+            pattern_type, pattern_name, regex = self.patterns[pattern_id]
+            for start, end in spans:
+                yield pattern_type, pattern_name, regex, start, end
+
+    def extract_examples(self, text: str, max_examples: int = 5,
+                         context_chars: int = 20) -> Dict[str, Dict[str, List[str]]]:
+        """
+        パターン名ごとに出現例（前後の文脈付き）を集める
+
+        Args:
+            text: 照合対象のテキスト
+            max_examples: パターン名ごとの最大例数
+            context_chars: 出現箇所の前後に含める文字数
+
+        Returns:
+            種別 → パターン名 → 出現例リスト（出現のないパターン名は含まない）
+        """
+        results: Dict[str, Dict[str, List[str]]] = {}
+
+        for pattern_id, spans in enumerate(self.find_all(text)):
+            if not spans:
+                continue
+
+            pattern_type, pattern_name, _ = self.patterns[pattern_id]
+            examples = results.setdefault(pattern_type, {}).setdefault(pattern_name, [])
+
+            for start, end in spans[:max_examples - len(examples)]:
+                examples.append(text[max(0, start - context_chars):end + context_chars].strip())
+
+        return results
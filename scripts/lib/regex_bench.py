@@ -0,0 +1,394 @@
+"""
+正規表現パターンの計測と安全性の確認
+
+目的: 手で編集するパターン辞書（lib/pattern_dictionaries.py・patterns.json）の正規表現ごとに、
+      コーパス全体での出現数と記事あたりの最悪処理時間を測り、バックトラックで
+      遅くなるパターンを出荷前に見つける（bench-patterns.py・extract-patterns.py で共有）
+
+- static_risks(): 構文木から、量指定子の入れ子・繰り返し内で同じ文字から始まる選択肢・
+  同じ文字を取り合う隣接した量指定子を検出する（疑いの指摘）
+- probe_backtracking(): 一致しないまま終わる入力を長さを変えて与え、子プロセスで実測する
+  （予算を超えたら打ち切るので、指数的なパターンでも止まらない）
+- time_patterns(): 記事ごと・パターンごとに finditer の時間を測る
+"""
+
+import multiprocessing
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python 3.10 以前
+    import sre_constants
+    import sre_parse
+
+
+# 実測に使う入力の長さ（短い方と長い方。比で伸び方を見る）
+PROBE_LENGTHS = (1000, 4000)
+
+# 入力を PROBE_LENGTHS の比だけ長くしたときに許す処理時間の伸び（線形なら約4倍）
+PROBE_GROWTH_LIMIT = 8.0
+
+# 伸びを判定する最小の処理時間（これより速ければ計測誤差として扱う）
+PROBE_GROWTH_FLOOR_MS = 1.0
+
+# 記事1件の処理時間がこれを超えて最悪値を更新したら測り直す（GC・割り込みによる外れ値を除く）
+RETIME_FLOOR_MS = 0.5
+
+# 測り直しの回数（最小値を採る）
+RETIME_REPEATS = 3
+
+# 文字集合の判定に使う代表文字（パターン中の文字に加える）
+SAMPLE_CHARS = "a0 \t\nあア漢。、「*-.#_"
+
+_CATEGORY_REGEXES = {
+    sre_constants.CATEGORY_DIGIT: re.compile(r"\d"),
+    sre_constants.CATEGORY_NOT_DIGIT: re.compile(r"\D"),
+    sre_constants.CATEGORY_SPACE: re.compile(r"\s"),
+    sre_constants.CATEGORY_NOT_SPACE: re.compile(r"\S"),
+    sre_constants.CATEGORY_WORD: re.compile(r"\w"),
+    sre_constants.CATEGORY_NOT_WORD: re.compile(r"\W"),
+}
+
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+_ZERO_WIDTH = (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT)
+
+
+def _accepts(op, av, char: str) -> bool:
+    """1文字にマッチする要素（LITERAL / NOT_LITERAL / ANY / IN）が char を受け付けるか"""
+    if op is sre_constants.LITERAL:
+        return ord(char) == av
+    if op is sre_constants.NOT_LITERAL:
+        return ord(char) != av
+    if op is sre_constants.ANY:
+        return char != "\n"
+    if op is sre_constants.IN:
+        negate = False
+        hit = False
+        for item_op, item_av in av:
+            if item_op is sre_constants.NEGATE:
+                negate = True
+            elif item_op is sre_constants.LITERAL:
+                hit = hit or ord(char) == item_av
+            elif item_op is sre_constants.RANGE:
+                hit = hit or item_av[0] <= ord(char) <= item_av[1]
+            elif item_op is sre_constants.CATEGORY and item_av in _CATEGORY_REGEXES:
+                hit = hit or _CATEGORY_REGEXES[item_av].fullmatch(char) is not None
+        return hit != negate
+    return False
+
+
+def _children(op, av) -> List:
+    """要素の中にある部分パターンのリスト"""
+    if op in _REPEATS or op is getattr(sre_constants, "POSSESSIVE_REPEAT", None):
+        return [av[2]]
+    if op is sre_constants.SUBPATTERN:
+        return [av[3]]
+    if op is sre_constants.BRANCH:
+        return list(av[1])
+    if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        return [av[1]]
+    if op is getattr(sre_constants, "ATOMIC_GROUP", None):
+        return [av]
+    return []
+
+
+def _is_unbounded(op, av) -> bool:
+    """バックトラックする上限なしの量指定子（*, +, {n,}）か"""
+    return op in _REPEATS and av[1] == sre_constants.MAXREPEAT
+
+
+def _nullable(op, av) -> bool:
+    """要素が空文字列にマッチしうるか"""
+    if op in _ZERO_WIDTH or op is sre_constants.GROUPREF:
+        return True
+    if op in _REPEATS or op is getattr(sre_constants, "POSSESSIVE_REPEAT", None):
+        return av[0] == 0 or all(_nullable(*item) for item in av[2])
+    if op is sre_constants.BRANCH:
+        return any(all(_nullable(*item) for item in branch) for branch in av[1])
+    if op is sre_constants.SUBPATTERN or op is getattr(sre_constants, "ATOMIC_GROUP", None):
+        return all(_nullable(*item) for child in _children(op, av) for item in child)
+    return False
+
+
+def _consumable(items, alphabet: str) -> Set[str]:
+    """部分パターンのどこかで消費されうる文字（代表文字のうち）"""
+    chars = set()
+    for op, av in items:
+        if op in _ZERO_WIDTH:
+            continue
+        children = _children(op, av)
+        if children:
+            for child in children:
+                chars |= _consumable(child, alphabet)
+        else:
+            chars |= {char for char in alphabet if _accepts(op, av, char)}
+    return chars
+
+
+def _first_chars(items, alphabet: str) -> Set[str]:
+    """部分パターンの先頭になりうる文字（代表文字のうち）"""
+    chars = set()
+    for op, av in items:
+        if op in _ZERO_WIDTH:
+            continue
+        children = _children(op, av)
+        if op is sre_constants.BRANCH:
+            for branch in children:
+                chars |= _first_chars(branch, alphabet)
+        elif children:
+            chars |= _first_chars(children[0], alphabet)
+        else:
+            chars |= {char for char in alphabet if _accepts(op, av, char)}
+        if not _nullable(op, av):
+            break
+    return chars
+
+
+def _unwrap_groups(items) -> List:
+    """グループを開いた要素の並び（グループ内の選択肢を繰り返しの直下として扱うため）"""
+    unwrapped = []
+    for op, av in items:
+        if op is sre_constants.SUBPATTERN:
+            unwrapped.extend(_unwrap_groups(av[3]))
+        else:
+            unwrapped.append((op, av))
+    return unwrapped
+
+
+def _alphabet(regex: str) -> str:
+    """判定に使う代表文字（パターン中の文字と SAMPLE_CHARS）"""
+    return "".join(dict.fromkeys(regex + SAMPLE_CHARS))
+
+
+def _parse(regex: str, flags: int):
+    return sre_parse.parse(regex, flags)
+
+
+def static_risks(regex: str, flags: int = re.MULTILINE) -> List[str]:
+    """
+    構文からバックトラックの危険がある箇所を挙げる
+
+    Args:
+        regex: 正規表現
+        flags: 正規表現のフラグ
+
+    Returns:
+        危険の説明のリスト（重複なし、なければ空）
+    """
+    alphabet = _alphabet(regex)
+    risks = []
+
+    def walk(items, inside_unbounded: bool):
+        pending: List[Set[str]] = []  # 直前から空にマッチしうる要素だけを挟んで続く量指定子の文字集合
+
+        for op, av in items:
+            unbounded = _is_unbounded(op, av)
+
+            if unbounded:
+                chars = _consumable(av[2], alphabet)
+                if inside_unbounded:
+                    risks.append("量指定子の入れ子（指数的なバックトラックの恐れ）")
+                if any(chars & previous for previous in pending):
+                    risks.append("隣接する量指定子が同じ文字を取り合う（長い行で2乗に遅くなる恐れ）")
+                for child_op, child_av in _unwrap_groups(av[2]):
+                    if child_op is sre_constants.BRANCH:
+                        firsts = [_first_chars(branch, alphabet) for branch in child_av[1]]
+                        if any(firsts[i] & firsts[j] for i in range(len(firsts)) for j in range(i)):
+                            risks.append("繰り返し内の選択肢が同じ文字から始まる（指数的なバックトラックの恐れ）")
+                pending.append(chars)
+            elif not _nullable(op, av):
+                pending = []
+
+            for child in _children(op, av):
+                walk(child, inside_unbounded or unbounded)
+
+    walk(_parse(regex, flags), False)
+    return list(dict.fromkeys(risks))
+
+
+def _minimal_text(items, alphabet: str) -> str:
+    """部分パターンにマッチする短い文字列（実測入力の前置き用、近似）"""
+    parts = []
+    for op, av in items:
+        if op in _ZERO_WIDTH:
+            continue
+        children = _children(op, av)
+        if op in _REPEATS or op is getattr(sre_constants, "POSSESSIVE_REPEAT", None):
+            parts.append(_minimal_text(av[2], alphabet) * av[0])
+        elif op is sre_constants.BRANCH:
+            parts.append(_minimal_text(children[0], alphabet))
+        elif children:
+            parts.append(_minimal_text(children[0], alphabet))
+        else:
+            parts.append(next((char for char in alphabet if _accepts(op, av, char)), ""))
+    return "".join(parts)
+
+
+def probe_inputs(regex: str, length: int, flags: int = re.MULTILINE) -> List[str]:
+    """
+    バックトラックを誘う入力を作る
+
+    上限なしの量指定子ごとに、そこまでを満たす前置き + 量指定子が消費できる文字の繰り返し +
+    どの文字クラスにも入りにくい終端文字、の形にする（最後で一致に失敗させる）。
+
+    Args:
+        regex: 正規表現
+        length: 繰り返し部分の長さ
+        flags: 正規表現のフラグ
+
+    Returns:
+        入力文字列のリスト（量指定子がなければ空）
+    """
+    alphabet = _alphabet(regex)
+    inputs = []
+
+    def walk(items, prefix: str):
+        for index, (op, av) in enumerate(items):
+            if _is_unbounded(op, av):
+                chars = sorted(_consumable(av[2], alphabet))[:3]
+                for char in chars:
+                    inputs.append(prefix + char * length + "\x00")
+                if len(chars) >= 2:
+                    inputs.append(prefix + (chars[0] + chars[1]) * (length // 2) + "\x00")
+
+            for child in _children(op, av):
+                walk(child, prefix + _minimal_text(items[:index], alphabet))
+
+    walk(_parse(regex, flags), "")
+    return list(dict.fromkeys(inputs))
+
+
+def _time_finditer(compiled: re.Pattern, text: str) -> float:
+    """finditer で全出現をたどる時間（ミリ秒）"""
+    started = time.perf_counter()
+    for _ in compiled.finditer(text):
+        pass
+    return (time.perf_counter() - started) * 1000
+
+
+def _probe_worker(regex: str, flags: int, sender):
+    """子プロセスで入力ごとの処理時間を測り、(短い入力, 長い入力) の最悪値を送る"""
+    compiled = re.compile(regex, flags)
+    short_length, long_length = PROBE_LENGTHS
+    worst = (0.0, 0.0)
+
+    for short_text, long_text in zip(probe_inputs(regex, short_length, flags),
+                                     probe_inputs(regex, long_length, flags)):
+        timings = (_time_finditer(compiled, short_text), _time_finditer(compiled, long_text))
+        if timings[1] > worst[1]:
+            worst = timings
+
+    sender.send(worst)
+    sender.close()
+
+
+def probe_backtracking(regex: str, flags: int = re.MULTILINE, budget_ms: float = 50.0,
+                       timeout: float = 1.0) -> Dict:
+    """
+    一致しない入力でパターンを実測し、バックトラックで遅くならないか確かめる
+
+    上限なしの量指定子を含むパターンだけを子プロセスで測る（timeout 秒で打ち切る）。
+
+    Args:
+        regex: 正規表現
+        flags: 正規表現のフラグ
+        budget_ms: 長い方の入力（PROBE_LENGTHS[1] 文字）1つあたりの処理時間の上限
+        timeout: 子プロセスを打ち切るまでの秒数
+
+    Returns:
+        elapsed_ms（長い入力での最悪時間。測っていなければ None）/ growth（短い入力との比）/
+        problem（問題の説明。なければ None）
+    """
+    result = {"elapsed_ms": None, "growth": None, "problem": None}
+    if not probe_inputs(regex, 1, flags):
+        return result
+
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_probe_worker, args=(regex, flags, sender), daemon=True)
+    process.start()
+    sender.close()
+
+    if not receiver.poll(timeout):
+        process.terminate()
+        process.join()
+        result["problem"] = f"{PROBE_LENGTHS[1]}文字の不一致入力で{timeout:g}秒を超えた"
+        return result
+
+    short_ms, long_ms = receiver.recv()
+    process.join()
+
+    result["elapsed_ms"] = long_ms
+    result["growth"] = long_ms / short_ms if short_ms > 0 else None
+
+    if long_ms > budget_ms:
+        result["problem"] = f"{PROBE_LENGTHS[1]}文字の不一致入力で{long_ms:.1f}ms（予算 {budget_ms:g}ms）"
+    elif long_ms >= PROBE_GROWTH_FLOOR_MS and result["growth"] and result["growth"] > PROBE_GROWTH_LIMIT:
+        ratio = PROBE_LENGTHS[1] // PROBE_LENGTHS[0]
+        result["problem"] = f"入力を{ratio}倍にすると{result['growth']:.0f}倍遅くなる（超線形）"
+
+    return result
+
+
+def time_patterns(regexes: List[str], articles: Iterable[Tuple[str, str]],
+                  flags: int = re.MULTILINE) -> Tuple[int, List[Dict]]:
+    """
+    記事ごと・パターンごとに finditer の時間とヒット数を測る
+
+    最悪値を更新する遅い計測は RETIME_REPEATS 回測り直し、最小値を採る。
+
+    Args:
+        regexes: 正規表現のリスト
+        articles: (記事ID, 本文) のイテレータ
+        flags: 正規表現のフラグ
+
+    Returns:
+        (計測した記事数, 正規表現ごとの hits / articles（出現記事数）/ total_ms / worst_ms / worst_article)
+    """
+    compiled = [re.compile(regex, flags) for regex in regexes]
+    totals = [0] * len(regexes)
+    worsts = [0] * len(regexes)
+    worst_articles: List[Optional[str]] = [None] * len(regexes)
+    hits = [0] * len(regexes)
+    hit_articles = [0] * len(regexes)
+    clock = time.perf_counter_ns
+    scanned = 0
+
+    retime_floor = RETIME_FLOOR_MS * 1e6
+
+    for article_id, text in articles:
+        scanned += 1
+        for index, pattern in enumerate(compiled):
+            count = 0
+            started = clock()
+            for _ in pattern.finditer(text):
+                count += 1
+            elapsed = clock() - started
+
+            if elapsed > worsts[index] and elapsed > retime_floor:
+                for _ in range(RETIME_REPEATS):
+                    started = clock()
+                    for _ in pattern.finditer(text):
+                        pass
+                    elapsed = min(elapsed, clock() - started)
+
+            totals[index] += elapsed
+            if elapsed > worsts[index]:
+                worsts[index] = elapsed
+                worst_articles[index] = article_id
+            if count:
+                hits[index] += count
+                hit_articles[index] += 1
+
+    return scanned, [
+        {
+            "hits": hits[index],
+            "articles": hit_articles[index],
+            "total_ms": totals[index] / 1e6,
+            "worst_ms": worsts[index] / 1e6,
+            "worst_article": worst_articles[index]
+        }
+        for index in range(len(regexes))
+    ]
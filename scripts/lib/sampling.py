@@ -0,0 +1,527 @@
+"""
+条件指定のサンプリング
+
+目的: articles から条件に合う記事・カテゴリ別の上位記事・無作為抽出の記事を取り出す問い合わせを、
+      接続を受け取る形で共有する
+      （smart-sampler.py と、常駐サーバーからの呼び出しで共有）
+
+返す列は fields で選ぶ（None なら全列）。本文（content）は絞り込み・並べ替えの問い合わせでは読まず、
+選ばれた記事の分だけ rowid で後からまとめて読む（load_contents()）。
+"""
+
+import json
+import random
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Union
+
+from lib.corpus_db import ARTICLE_COLUMNS, decompress_content
+
+
+# ORDER BY に使える列（降順）
+SAMPLE_ORDER_COLUMNS = ("rewrite_score", "elo_rating", "word_count", "date", "year")
+
+# カテゴリ別上位で、割り当て（quotas）のキーとして未分類カテゴリを表す名前
+UNCATEGORIZED = "未分類"
+
+# fields に指定できる列（articles の列順。sample_key は抽出用の内部の列なので含めない）
+SAMPLE_FIELDS = tuple(column for column in ARTICLE_COLUMNS if column != "sample_key") + ("created_at", "updated_at")
+
+# sample_key の上限（corpus_db.sample_key() は 0 以上 2^63 未満）
+SAMPLE_KEY_BITS = 63
+
+# 無作為抽出で、条件に合う記事がこの件数以下なら rowid をすべて読んで random.sample() で選ぶ
+EXACT_DRAW_MAX = 1000
+
+# それより多い場合は sample_key を区間に分けて受理・棄却で選ぶ。区間あたりの平均件数と、
+# 受理判定に使う区間あたりの上限（平均8件の区間が41件以上になる確率は 1e-16 程度）
+DRAW_BUCKET_LOAD = 8
+DRAW_BUCKET_CAPACITY = 40
+
+# 条件に合う記事数を sample_key の一部の範囲から見積もるのに使う最小件数（誤差 7% 程度）
+DRAW_ESTIMATE_MIN = 200
+
+# 層別抽出の層に指定できる条件（category は1つまたはリスト。スコア・ELO の上下限は両端を含む）
+STRATUM_FILTERS = ("category", "year_from", "year_to", "min_score", "max_score", "min_elo", "max_elo")
+
+# 本文を読み直すときの1回の rowid 数
+CONTENT_BATCH_SIZE = 500
+
+
+def field_list(fields: Optional[Union[str, Sequence[str]]] = None) -> List[str]:
+    """
+    返す列を決める
+
+    Args:
+        fields: 列名のリスト、カンマ区切りの列名、または None（全列）
+
+    Returns:
+        列名のリスト（指定順。重複は除く）
+
+    Raises:
+        ValueError: SAMPLE_FIELDS にない列がある、または列が空の場合
+    """
+    if fields is None:
+        return list(SAMPLE_FIELDS)
+    if isinstance(fields, str):
+        fields = fields.split(",")
+
+    fields = list(dict.fromkeys(field.strip() for field in fields if field.strip()))
+    unknown = [field for field in fields if field not in SAMPLE_FIELDS]
+    if unknown:
+        raise ValueError(f"未知の列です: {', '.join(unknown)}（指定できる列: {', '.join(SAMPLE_FIELDS)}）")
+    if not fields:
+        raise ValueError("列を1つ以上指定してください")
+    return fields
+
+
+def select_columns(fields: List[str], prefix: str = "") -> str:
+    """本文以外の列と rowid（article_rowid）の SELECT 句（prefix はテーブル別名）"""
+    return ", ".join([f"{prefix}rowid AS article_rowid"] +
+                     [f"{prefix}{field}" for field in fields if field != "content"])
+
+
+def load_contents(conn: sqlite3.Connection, rowids: List[int]) -> Dict[int, Optional[str]]:
+    """
+    記事の本文（平文）を rowid でまとめて読む
+
+    Args:
+        conn: データベース接続
+        rowids: articles の rowid
+
+    Returns:
+        rowid → 本文
+    """
+    contents = {}
+    for i in range(0, len(rowids), CONTENT_BATCH_SIZE):
+        chunk = rowids[i:i + CONTENT_BATCH_SIZE]
+        for rowid, content in conn.execute(f"""
+            SELECT rowid, content FROM articles WHERE rowid IN ({', '.join('?' * len(chunk))})
+        """, chunk):
+            contents[rowid] = decompress_content(content)
+    return contents
+
+
+def project_articles(conn: sqlite3.Connection, cursor: sqlite3.Cursor, fields: List[str],
+                     extra: Sequence[str] = ()) -> List[Dict]:
+    """
+    select_columns() で読んだ行を記事の辞書にする（content を含む場合はここで本文を読む）
+
+    Args:
+        conn: データベース接続
+        cursor: select_columns() の列を含む問い合わせ
+        fields: 返す列
+        extra: fields の後ろに続けて返す問い合わせの列（全文検索の rank など）
+
+    Returns:
+        記事リスト（問い合わせの順）
+    """
+    columns = [column[0] for column in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    return project_rows(conn, rows, fields, extra)
+
+
+def project_rows(conn: sqlite3.Connection, rows: List[Dict], fields: List[str],
+                 extra: Sequence[str] = ()) -> List[Dict]:
+    """project_articles() の行の辞書版（並べ替えなどを済ませた行を渡す）"""
+    contents = load_contents(conn, [row["article_rowid"] for row in rows]) if "content" in fields else {}
+    return [
+        {field: contents.get(row["article_rowid"]) if field == "content" else row[field]
+         for field in [*fields, *extra]}
+        for row in rows
+    ]
+
+
+def order_columns(order_by: Union[str, Sequence[str]]) -> List[str]:
+    """
+    並べ替えの列を決める
+
+    Args:
+        order_by: 列名、カンマ区切りの列名（例: "elo_rating,rewrite_score"）、または列名のリスト
+
+    Returns:
+        SAMPLE_ORDER_COLUMNS に含まれる列（重複と未知の列は除く。残らなければ rewrite_score）
+    """
+    if isinstance(order_by, str):
+        order_by = order_by.split(",")
+    columns = [column.strip() for column in order_by if column.strip() in SAMPLE_ORDER_COLUMNS]
+    return list(dict.fromkeys(columns)) or ["rewrite_score"]
+
+
+def order_clause(order_by: Union[str, Sequence[str]], prefix: str = "") -> str:
+    """order_columns() の列を降順に並べる ORDER BY 句の中身（prefix はテーブル別名）"""
+    return ", ".join(f"{prefix}{column} DESC" for column in order_columns(order_by))
+
+
+def sample_articles(
+    conn: sqlite3.Connection,
+    category: Optional[str] = None,
+    min_rewrite_score: Optional[float] = None,
+    min_quality_score: Optional[float] = None,
+    min_elo: Optional[int] = None,
+    rewrite_type: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    limit: int = 50,
+    order_by: str = "rewrite_score",
+    fields: Optional[Union[str, Sequence[str]]] = None
+) -> List[Dict]:
+    """
+    条件指定でサンプリング
+
+    Args:
+        conn: データベース接続（row_factory は問わない）
+        category: カテゴリ
+        min_rewrite_score: リライトスコア最小値
+        min_quality_score: 品質スコア最小値
+        min_elo: ELO最小値
+        rewrite_type: リライトタイプ
+        year_from: 開始年
+        year_to: 終了年
+        limit: 取得件数上限
+        order_by: ソート順（SAMPLE_ORDER_COLUMNS の列。カンマ区切りで複数指定可。それ以外は rewrite_score）
+        fields: 返す列（field_list() の形式。None なら全列）
+
+    Returns:
+        記事リスト
+    """
+    fields = field_list(fields)
+    where, params = sample_filters(
+        category=category,
+        min_rewrite_score=min_rewrite_score,
+        min_quality_score=min_quality_score,
+        min_elo=min_elo,
+        rewrite_type=rewrite_type,
+        year_from=year_from,
+        year_to=year_to
+    )
+    query = f"SELECT {select_columns(fields)} FROM articles WHERE 1=1{where}"
+
+    # ソート
+    query += f" ORDER BY {order_clause(order_by)} LIMIT ?"
+    params.append(limit)
+
+    return project_articles(conn, conn.execute(query, params), fields)
+
+
+def sample_filters(
+    category: Optional[str] = None,
+    min_rewrite_score: Optional[float] = None,
+    max_rewrite_score: Optional[float] = None,
+    min_quality_score: Optional[float] = None,
+    min_elo: Optional[int] = None,
+    max_elo: Optional[int] = None,
+    rewrite_type: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None
+):
+    """
+    サンプリングの絞り込み条件を組み立てる（None・空文字の条件は使わない）
+
+    Args:
+        category: カテゴリ（リストなら いずれか）
+        min_rewrite_score: リライトスコア最小値
+        max_rewrite_score: リライトスコア最大値
+        min_quality_score: 品質スコア最小値
+        min_elo: ELO最小値
+        max_elo: ELO最大値
+        rewrite_type: リライトタイプ
+        year_from: 開始年
+        year_to: 終了年
+
+    Returns:
+        (" AND ..." 形式の条件, パラメータ)
+    """
+    clauses = []
+    params = []
+
+    if isinstance(category, (list, tuple)):
+        categories = list(dict.fromkeys(value for value in category if value))
+        if categories:
+            clauses.append(f"category IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+        category = None
+
+    for clause, value in (("category = ?", category or None),
+                          ("rewrite_score >= ?", min_rewrite_score),
+                          ("rewrite_score <= ?", max_rewrite_score),
+                          ("quality_score >= ?", min_quality_score),
+                          ("elo_rating >= ?", min_elo),
+                          ("elo_rating <= ?", max_elo),
+                          ("rewrite_type = ?", rewrite_type or None),
+                          ("year >= ?", year_from or None),
+                          ("year <= ?", year_to or None)):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+
+def random_articles(
+    conn: sqlite3.Connection,
+    limit: int = 10,
+    seed: Optional[int] = None,
+    fields: Optional[Union[str, Sequence[str]]] = None,
+    **filters
+) -> List[Dict]:
+    """
+    無作為抽出（シードを指定すれば同じDBから同じ記事を選ぶ）
+
+    条件に合う記事はどれも同じ確率で選ばれる（draw_rowids()）。
+    ORDER BY RANDOM() の全件並べ替えや、条件に合う記事が多い場合のID列の全件読み込みはしない。
+
+    Args:
+        conn: データベース接続
+        limit: 取得件数
+        seed: 乱数シード（None なら毎回異なる）
+        fields: 返す列（field_list() の形式。None なら全列）
+        **filters: sample_filters() の条件
+
+    Returns:
+        記事リスト（抽出順）
+    """
+    fields = field_list(fields)
+    where, params = sample_filters(**filters)
+    rowids = draw_rowids(conn, random.Random(seed), where, params, limit)
+    return articles_by_rowid(conn, rowids, fields)
+
+
+def draw_rowids(conn: sqlite3.Connection, rng: random.Random, where: str, params: List, limit: int,
+                exclude: Optional[set] = None) -> List[int]:
+    """
+    条件に合う記事から limit 件を非復元・等確率で選ぶ
+
+    条件に合う記事が EXACT_DRAW_MAX 件以下（または limit に対して少ない）なら、rowid だけを
+    sample_key 順に読んで rng.sample() で選ぶ。それより多ければ sample_key を平均 DRAW_BUCKET_LOAD 件（見積もり）の
+    区間に分け、区間を1つ選んでその中の j 番目（j は 0 以上 DRAW_BUCKET_CAPACITY 未満の乱数）の記事を
+    受理し、なければやり直す。どの記事も1回の試行で選ばれる確率は 1 / (区間数 × DRAW_BUCKET_CAPACITY) で
+    同じ（区間の件数が上限を超えたら全件読みに切り替える）。読むのは索引の区間だけで、試行は1件あたり平均5回程度。
+
+    Args:
+        conn: データベース接続
+        rng: 乱数生成器（シード付きなら結果は再現する）
+        where: sample_filters() の条件
+        params: 条件のパラメータ
+        limit: 件数
+        exclude: 選ばない rowid（層別抽出で先に取られた記事）
+
+    Returns:
+        rowid のリスト（抽出順。条件に合う記事が足りなければその件数）
+    """
+    exclude = exclude or set()
+    if limit <= 0:
+        return []
+
+    # sample_key の先頭 1/64・1/8・全体の順に、条件に合う記事を EXACT_DRAW_MAX + 1 件まで読む。
+    # sample_key は一様なので、読めた件数とキーの範囲から条件に合う記事数を見積もれる
+    # （条件に合う記事が多ければ索引の狭い範囲だけで足り、全件を並べ替えない）
+    for shift in (6, 3, 0):
+        bound = (1 << (SAMPLE_KEY_BITS - shift)) - 1
+        rows = conn.execute(f"""
+            SELECT rowid, sample_key FROM articles
+            WHERE sample_key <= ?{where}
+            ORDER BY sample_key
+            LIMIT ?
+        """, [bound] + params + [EXACT_DRAW_MAX + 1]).fetchall()
+
+        if len(rows) > EXACT_DRAW_MAX:
+            matched = len(rows) * (1 << SAMPLE_KEY_BITS) // (rows[-1][1] + 1)
+        elif shift == 0:
+            break
+        elif len(rows) >= DRAW_ESTIMATE_MIN:
+            matched = len(rows) * (1 << SAMPLE_KEY_BITS) // (bound + 1)
+        else:
+            continue
+
+        if (limit + len(exclude)) * 4 <= matched:
+            drawn = draw_bucketed(conn, rng, where, params, limit, exclude, matched)
+            if drawn is not None:
+                return drawn
+        rows = conn.execute(f"SELECT rowid, sample_key FROM articles WHERE 1=1{where} ORDER BY sample_key",
+                            params).fetchall()
+        break
+
+    candidates = [rowid for rowid, _ in rows if rowid not in exclude]
+    return rng.sample(candidates, min(limit, len(candidates)))
+
+
+def draw_bucketed(conn: sqlite3.Connection, rng: random.Random, where: str, params: List, limit: int,
+                  exclude: set, matched: int) -> Optional[List[int]]:
+    """
+    draw_rowids() の区間ごとの受理・棄却（条件に合う記事が limit に対して十分多いとき用）
+
+    区間数は matched（条件に合う記事数の見積もり）から決める。見積もりの誤差は効率にだけ影響し、
+    区間の件数が上限に収まる限り選ばれる確率は等しい。
+
+    Returns:
+        rowid のリスト（抽出順）。区間の件数が DRAW_BUCKET_CAPACITY を超えた場合は None
+    """
+    buckets = max(1, matched // DRAW_BUCKET_LOAD)
+    width = -(-(1 << SAMPLE_KEY_BITS) // buckets)
+    drawn = []
+    chosen = set(exclude)
+
+    while len(drawn) < limit:
+        low = rng.randrange(buckets) * width
+        rows = [rowid for (rowid,) in conn.execute(f"""
+            SELECT rowid FROM articles
+            WHERE sample_key BETWEEN ? AND ?{where}
+            ORDER BY sample_key
+            LIMIT ?
+        """, [low, min(low + width, 1 << SAMPLE_KEY_BITS) - 1] + params + [DRAW_BUCKET_CAPACITY + 1])]
+        if len(rows) > DRAW_BUCKET_CAPACITY:
+            return None
+
+        index = rng.randrange(DRAW_BUCKET_CAPACITY)
+        if index < len(rows) and rows[index] not in chosen:
+            chosen.add(rows[index])
+            drawn.append(rows[index])
+
+    return drawn
+
+
+def articles_by_rowid(conn: sqlite3.Connection, rowids: List[int], fields: List[str]) -> List[Dict]:
+    """
+    rowid の順に記事を読む（500件ずつ。content を含む場合は本文も）
+
+    Args:
+        conn: データベース接続
+        rowids: articles の rowid
+        fields: 返す列（field_list() の結果）
+
+    Returns:
+        記事リスト（rowids の順）
+    """
+    articles = {}
+    for i in range(0, len(rowids), CONTENT_BATCH_SIZE):
+        chunk = rowids[i:i + CONTENT_BATCH_SIZE]
+        cursor = conn.execute(f"""
+            SELECT {select_columns(fields)} FROM articles WHERE rowid IN ({', '.join('?' * len(chunk))})
+        """, chunk)
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for row, article in zip(rows, project_rows(conn, rows, fields)):
+            articles[row["article_rowid"]] = article
+    return [articles[rowid] for rowid in rowids]
+
+
+def top_articles_by_category(
+    conn: sqlite3.Connection,
+    limit_per_category: int = 5,
+    order_by: Union[str, Sequence[str]] = "rewrite_score",
+    quotas: Optional[Dict[str, int]] = None,
+    fields: Optional[Union[str, Sequence[str]]] = None
+) -> Dict[str, List[Dict]]:
+    """
+    カテゴリ別の上位記事を1回の問い合わせで取得
+
+    カテゴリ一覧は article_stats から引き、カテゴリごとの上位は (category, 並べ替えの列) の索引を
+    上から必要な件数だけ読む。ROW_NUMBER() でカテゴリ内の順位を付け、割り当て件数で切る。
+
+    Args:
+        conn: データベース接続（row_factory は問わない）
+        limit_per_category: カテゴリごとの取得件数（quotas にないカテゴリに使う）
+        order_by: 並べ替えの列（order_columns() の形式。同順位は rowid 順）
+        quotas: カテゴリ → 取得件数（未分類カテゴリは UNCATEGORIZED。0 のカテゴリは結果に含めない）
+        fields: 返す列（field_list() の形式。None なら全列）
+
+    Returns:
+        カテゴリ名（未分類は UNCATEGORIZED）→ 記事リスト（カテゴリ名順、カテゴリ内は順位順）
+    """
+    quotas = quotas or {}
+    fields = field_list(fields)
+
+    # 索引から読む件数はカテゴリ共通の上限（割り当ての最大）にし、カテゴリごとの件数は順位で切る
+    cursor = conn.execute(f"""
+        WITH quotas(category, quota) AS (SELECT key, value FROM json_each(?))
+        SELECT r.* FROM (
+            SELECT {select_columns(fields, "a.")}, a.category AS category_key,
+                   ROW_NUMBER() OVER (PARTITION BY a.category ORDER BY {order_clause(order_by, "a.")}, a.rowid)
+                       AS category_rank
+            FROM article_stats c
+            JOIN articles a ON a.rowid IN (
+                SELECT x.rowid FROM articles x
+                WHERE x.category IS NULLIF(c.key, '')
+                ORDER BY {order_clause(order_by, "x.")}, x.rowid
+                LIMIT ?
+            )
+            WHERE c.dimension = 'category' AND c.article_count > 0
+        ) r
+        LEFT JOIN quotas q ON q.category = COALESCE(r.category_key, ?)
+        WHERE r.category_rank <= COALESCE(q.quota, ?)
+        ORDER BY r.category_key, r.category_rank
+    """, (json.dumps(quotas, ensure_ascii=False), max([limit_per_category, *quotas.values()]),
+          UNCATEGORIZED, limit_per_category))
+
+    columns = [column[0] for column in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    results: Dict[str, List[Dict]] = {}
+    for row, article in zip(rows, project_rows(conn, rows, fields)):
+        results.setdefault(row["category_key"] or UNCATEGORIZED, []).append(article)
+
+    return results
+
+
+def stratified_sample(
+    conn: sqlite3.Connection,
+    strata: List[Dict],
+    seed: Optional[int] = None,
+    fields: Optional[Union[str, Sequence[str]]] = None
+) -> List[Dict]:
+    """
+    層ごとの件数割り当てに従って無作為抽出
+
+    層は group（出力先）・STRATUM_FILTERS の条件・count（件数）を持つ。各層は random_articles() と同じく
+    条件に合う記事から count 件を等確率で選ぶ（draw_rowids()。複数カテゴリの層は category IN (...) で1つの条件にする）。
+    乱数はシードから1本だけ作り、層の順に使う。
+    同じ group の層に重なる記事は先に書いた層に割り当てる（別の group なら両方に入りうる）。
+
+    Args:
+        conn: データベース接続
+        strata: 層のリスト
+        seed: 乱数シード（同じシード・同じDBなら同じ記事を選ぶ）
+        fields: 返す列（field_list() の形式。None なら全列）
+
+    Returns:
+        層ごとの {"stratum": 層, "available": 割り当て可能な記事数（count 件に満たない場合のみ。満たせば None）,
+        "articles": 記事リスト}（strata の順）
+
+    Raises:
+        ValueError: 層の条件・件数が不正な場合
+    """
+    fields = field_list(fields)
+    rng = random.Random(seed)
+    taken: Dict[Optional[str], set] = {}
+    results = []
+
+    for index, stratum in enumerate(strata):
+        unknown = set(stratum) - set(STRATUM_FILTERS) - {"group", "count"}
+        if unknown:
+            raise ValueError(f"層 {index + 1}: 未知の条件です: {', '.join(sorted(unknown))}")
+        count = stratum.get("count")
+        if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+            raise ValueError(f"層 {index + 1}: count は0以上の整数で指定してください")
+
+        group_taken = taken.setdefault(stratum.get("group"), set())
+        where, params = sample_filters(
+            category=stratum.get("category"),
+            min_rewrite_score=stratum.get("min_score"),
+            max_rewrite_score=stratum.get("max_score"),
+            min_elo=stratum.get("min_elo"),
+            max_elo=stratum.get("max_elo"),
+            year_from=stratum.get("year_from"),
+            year_to=stratum.get("year_to")
+        )
+
+        # 同じ group で先に取られた記事は除いて選ぶ
+        rowids = draw_rowids(conn, rng, where, params, count, group_taken)
+        group_taken.update(rowids)
+
+        results.append({
+            "stratum": stratum,
+            "available": len(rowids) if len(rowids) < count else None,
+            "articles": articles_by_rowid(conn, rowids, fields)
+        })
+
+    return results
@@ -0,0 +1,186 @@
+"""
+日本語の文・段落の分割と、分割結果のキャッシュ
+
+目的: 文頭・段落単位で見る分析（構造特徴・論理展開、patterns.json の context 型ルールなど）が
+      本文を毎回分割し直さないよう、文・段落の位置を本文ハッシュごとに1回だけ求めて DB に保存する
+      （segment-articles.py で作成し、用例検索などから読む）
+
+分割の規則:
+- 段落: 空行（空白だけの行を含む）で区切る
+- 文: 。！？． と、空白・行末・全角文字が続く ! ? で区切る。直後の閉じ括弧・閉じ引用符は前の文に含める
+- 「」『』（）【】〔〕“” の内側では区切らない（「そうだ。」と言った、は1文）。括弧の対応は行ごとに数え直す
+- 改行は常に文の区切り（句点のない見出し・箇条書きの行も1文として扱う）
+- 位置は本文（articles.content を平文に戻したもの）の文字オフセットで、前後の空白を除いた (開始, 終了)
+
+保存先は text_segments（content_hash → 文・段落の位置のJSON）。本文が同じ記事は同じ行を共有し、
+本文が変われば別のハッシュになるので古い行が使われることはない。
+"""
+
+import json
+import re
+import sqlite3
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lib.corpus_db import decompress_content
+
+
+# 分割規則の版（規則を変えたら上げる。版の違う行は作り直す）
+SEGMENTER_VERSION = "1"
+
+OPEN_BRACKETS = "「『（(【〔“"
+CLOSE_BRACKETS = "」』）)】〕”"
+
+# 文末記号・括弧・改行を拾う（先頭を1つの文字クラスにして走査を速くする）。
+# 文末記号は続く文末記号と閉じ括弧までを1つにまとめ、その間の文字は読み飛ばす
+SENTENCE_TOKEN = re.compile(
+    r"[。！？．!?" + re.escape(OPEN_BRACKETS + CLOSE_BRACKETS) + r"\n]"
+    r"(?:(?<=[。！？．!?])[。！？．!?]*[" + re.escape(CLOSE_BRACKETS) + r"]*)?"
+)
+
+# ASCII の ! ? はこれが続く場合は文末としない（URL の ?id= など）
+ASCII_WORD = re.compile(r"[!-~]")
+
+# 空行（段落の区切り）
+BLANK_LINES = re.compile(r"\n[ \t　]*\n(?:[ \t　]*\n)*")
+
+WHITESPACE = " \t\r\n　"
+
+Span = Tuple[int, int]
+
+
+def _trimmed(text: str, start: int, end: int) -> Optional[Span]:
+    """前後の空白を除いた範囲（空なら None）"""
+    while start < end and text[start] in WHITESPACE:
+        start += 1
+    while end > start and text[end - 1] in WHITESPACE:
+        end -= 1
+    return (start, end) if start < end else None
+
+
+def segment_text(text: str) -> Tuple[List[Span], List[Span]]:
+    """
+    本文を文と段落に分ける
+
+    Args:
+        text: 本文
+
+    Returns:
+        (文の (開始, 終了) のリスト, 段落の (開始, 終了) のリスト)。どちらも位置順
+    """
+    sentences: List[Span] = []
+    start = 0
+    depth = 0
+
+    for token in SENTENCE_TOKEN.finditer(text):
+        value = token.group()
+        first = value[0]
+
+        if first == "\n":
+            span = _trimmed(text, start, token.start())
+            if span:
+                sentences.append(span)
+            start = token.end()
+            depth = 0
+        elif first in OPEN_BRACKETS:
+            depth += 1
+        elif first in CLOSE_BRACKETS:
+            depth = max(0, depth - 1)
+        elif value.strip("!?") == "" and ASCII_WORD.match(text, token.end()):
+            continue
+        elif depth:
+            # 括弧の内側の文末記号では区切らない（続く閉じ括弧の分だけ括弧を閉じる）
+            depth = max(0, depth - (len(value) - len(value.rstrip(CLOSE_BRACKETS))))
+        else:
+            span = _trimmed(text, start, token.end())
+            if span:
+                sentences.append(span)
+            start = token.end()
+
+    span = _trimmed(text, start, len(text))
+    if span:
+        sentences.append(span)
+
+    paragraphs: List[Span] = []
+    start = 0
+    for blank in BLANK_LINES.finditer(text):
+        span = _trimmed(text, start, blank.start())
+        if span:
+            paragraphs.append(span)
+        start = blank.end()
+    span = _trimmed(text, start, len(text))
+    if span:
+        paragraphs.append(span)
+
+    return sentences, paragraphs
+
+
+def encode_spans(spans: List[Span]) -> str:
+    """位置のリストを保存用のJSONにする（article_pattern_hits.offsets と同じ形）"""
+    return json.dumps(spans, separators=(",", ":"))
+
+
+def load_segments(conn: sqlite3.Connection, content_hashes: Iterable[str]) -> Dict[str, Tuple[List[Span], List[Span]]]:
+    """
+    保存済みの文・段落の位置を読む
+
+    Args:
+        conn: データベース接続
+        content_hashes: 本文ハッシュ
+
+    Returns:
+        本文ハッシュ → (文の位置, 段落の位置)。未保存・版の違うものは含まない
+    """
+    content_hashes = [content_hash for content_hash in dict.fromkeys(content_hashes) if content_hash]
+    segments = {}
+
+    for i in range(0, len(content_hashes), 500):
+        chunk = content_hashes[i:i + 500]
+        for content_hash, sentences, paragraphs in conn.execute(f"""
+            SELECT content_hash, sentences, paragraphs FROM text_segments
+            WHERE content_hash IN ({', '.join('?' * len(chunk))}) AND segmenter_version = ?
+        """, chunk + [SEGMENTER_VERSION]):
+            segments[content_hash] = (
+                [tuple(span) for span in json.loads(sentences)],
+                [tuple(span) for span in json.loads(paragraphs)]
+            )
+
+    return segments
+
+
+def article_segments(conn: sqlite3.Connection, article_id: str) -> Optional[Tuple[List[Span], List[Span]]]:
+    """
+    記事の文・段落の位置（保存済みならそれを、なければ本文から求める。保存はしない）
+
+    Args:
+        conn: データベース接続
+        article_id: 記事ID
+
+    Returns:
+        (文の位置, 段落の位置)。記事がなければ None
+    """
+    row = conn.execute("SELECT content_hash, content FROM articles WHERE id = ?", (article_id,)).fetchone()
+    if row is None:
+        return None
+
+    cached = load_segments(conn, [row[0]]) if row[0] else {}
+    if row[0] in cached:
+        return cached[row[0]]
+    return segment_text(decompress_content(row[1]) or "")
+
+
+def containing_span(spans: List[Span], position: int) -> Optional[Span]:
+    """
+    位置を含む文（段落）を二分探索で探す
+
+    Args:
+        spans: segment_text() の文または段落の位置
+        position: 本文中の位置
+
+    Returns:
+        位置を含む (開始, 終了)。文と文の間の空白などで含むものがなければ None
+    """
+    index = bisect_right(spans, (position, float("inf"))) - 1
+    if index >= 0 and position < spans[index][1]:
+        return spans[index]
+    return None
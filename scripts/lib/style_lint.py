@@ -0,0 +1,214 @@
+"""
+書き味ルール（patterns.json）による原稿の検査
+
+目的: patterns.json の regex / keywords / literal ルールを1つの照合器にまとめてコンパイルし、
+      note / zenn の原稿を保存のたびに検査できる速さで、行・列・ルールID・重要度を返す
+      （lint-style.py と、常駐サーバーからの呼び出しで共有）
+
+- ルールは PatternMatcher（lib/pattern_matcher.py）で1つにまとめる。keywords / literal は
+  Aho–Corasick オートマトン、regex は個別の finditer で、原稿は1回の走査で済む
+- コンパイル済みのルールセットは patterns.json の version（と検出定義のハッシュ）をキーに
+  プロセス内でキャッシュし、ファイルの更新時刻が変わらなければ読み直しもしない
+- frontmatter とコードブロックは検査しない（位置を保ったまま空白に置き換える）
+- check_absence のルールは、原稿中にどれも現れない場合に1件として報告する
+"""
+
+import hashlib
+import json
+import re
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from lib.article_parser import FRONTMATTER_CLOSE, FRONTMATTER_OPEN
+from lib.pattern_matcher import PatternMatcher
+from lib.style_rules import load_style_rules
+
+
+# 重要度の順（--min-severity の判定用）
+SEVERITY_LEVELS = {"info": 0, "warning": 1, "error": 2}
+
+# 行頭位置の計算用
+NEWLINE = re.compile("\n")
+
+# コードブロックの区切り（行頭、字下げ可）の行
+CODE_FENCE_LINE = re.compile(r"^[ \t]*(?:```|~~~).*$\n?", re.MULTILINE)
+
+# 空白に置き換える文字（改行以外）
+NON_NEWLINE = re.compile(r"[^\n]")
+
+# ルールセットのキャッシュ（キャッシュキー → ルールセット）と、ファイルごとの (更新時刻, キャッシュキー)
+_rulesets: Dict[str, "StyleRuleset"] = {}
+_loaded: Dict[Path, Tuple[int, str]] = {}
+
+
+class StyleRuleset:
+    """コンパイル済みの書き味ルール"""
+
+    def __init__(self, style_rules: Dict):
+        """
+        Args:
+            style_rules: load_style_rules() の結果
+        """
+        self.version = style_rules["version"]
+        self.rules: List[Dict] = style_rules["rules"]
+        self.key = ruleset_key(style_rules)
+
+        rules_by_id = {rule["id"]: rule for rule in self.rules}
+        self.matcher = PatternMatcher({
+            "style": {rule["id"]: rule["regexes"] for rule in self.rules if rule["regexes"]}
+        })
+        # PatternMatcher のパターン番号 → ルール
+        self._pattern_rules = [rules_by_id[rule_id] for _, rule_id, _ in self.matcher.patterns]
+
+    def lint(self, text: str, platform: Optional[str] = None, min_severity: str = "info") -> List[Dict]:
+        """
+        原稿を検査する
+
+        Args:
+            text: 原稿（frontmatter付きでもよい）
+            platform: note / zenn など（platform 指定のあるルールは一致する場合だけ使う）
+            min_severity: 報告する最低の重要度
+
+        Returns:
+            line / column（1始まり）/ rule / severity / match / message の辞書のリスト（位置順）
+        """
+        masked = mask_non_prose(text)
+        line_starts = None
+        threshold = SEVERITY_LEVELS.get(min_severity, 0)
+
+        spans_by_rule: Dict[str, List[Tuple[int, int]]] = {}
+        for pattern_id, spans in enumerate(self.matcher.find_all(masked)):
+            if spans:
+                spans_by_rule.setdefault(self._pattern_rules[pattern_id]["id"], []).extend(spans)
+
+        findings = []
+        for rule in self.rules:
+            if SEVERITY_LEVELS.get(rule["severity"], 0) < threshold:
+                continue
+            if rule["platform"] and rule["platform"] != platform:
+                continue
+
+            spans = spans_by_rule.get(rule["id"], [])
+
+            if rule["check_absence"]:
+                if not spans:
+                    findings.append(_finding(rule, 1, 1, "", f"{rule['description']}（該当する表現がない）"))
+                continue
+
+            # 同じルールの語が重なる場合（「べきです」と「すべきです」など）は先に始まる長い方だけ
+            last_end = -1
+            for start, end in sorted(spans, key=lambda span: (span[0], -span[1])):
+                if start < last_end:
+                    continue
+                last_end = end
+                if line_starts is None:
+                    line_starts = [0] + [match.end() for match in NEWLINE.finditer(text)]
+                line = bisect_right(line_starts, start)
+                findings.append(_finding(rule, line, start - line_starts[line - 1] + 1,
+                                         text[start:end], rule["description"]))
+
+        findings.sort(key=lambda finding: (finding["line"], finding["column"], finding["rule"]))
+        return findings
+
+
+def _finding(rule: Dict, line: int, column: int, match: str, message: str) -> Dict:
+    return {
+        "line": line,
+        "column": column,
+        "rule": rule["id"],
+        "severity": rule["severity"],
+        "match": match,
+        "message": message
+    }
+
+
+def mask_non_prose(text: str) -> str:
+    """
+    frontmatter とコードブロックを空白に置き換える（改行と文字位置は保つ）
+
+    Args:
+        text: 原稿
+
+    Returns:
+        同じ長さの文字列
+    """
+    masked_ranges = []
+
+    if text.startswith(FRONTMATTER_OPEN):
+        end = text.find(FRONTMATTER_CLOSE, len(FRONTMATTER_OPEN))
+        if end != -1:
+            masked_ranges.append((0, end + len(FRONTMATTER_CLOSE)))
+
+    # 区切りの行だけを正規表現で拾う（ほとんどの原稿は行ごとのループを通らない）
+    fence_start = None
+    for fence in CODE_FENCE_LINE.finditer(text):
+        if fence_start is None:
+            fence_start = fence.start()
+        else:
+            masked_ranges.append((fence_start, fence.end()))
+            fence_start = None
+    if fence_start is not None:
+        masked_ranges.append((fence_start, len(text)))
+
+    if not masked_ranges:
+        return text
+
+    pieces = []
+    position = 0
+    for start, end in masked_ranges:
+        if end <= position:
+            continue
+        start = max(start, position)
+        pieces.append(text[position:start])
+        pieces.append(NON_NEWLINE.sub(" ", text[start:end]))
+        position = end
+    pieces.append(text[position:])
+    return "".join(pieces)
+
+
+def ruleset_key(style_rules: Dict) -> str:
+    """
+    ルールセットのキャッシュキー
+
+    version に加えて検出定義のハッシュを含め、version を上げ忘れた編集でも古いルールを使わない。
+
+    Args:
+        style_rules: load_style_rules() の結果
+
+    Returns:
+        「version:ハッシュ」
+    """
+    digest = hashlib.sha1(
+        json.dumps(style_rules["rules"], ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:12]
+    return f"{style_rules['version']}:{digest}"
+
+
+def load_ruleset(path: Path) -> StyleRuleset:
+    """
+    patterns.json のルールセットを返す（プロセス内でキャッシュ）
+
+    ファイルの更新時刻が前回と同じなら読み直さない。読み直した場合も
+    キャッシュキー（version とハッシュ）が同じならコンパイル済みのものを使う。
+
+    Args:
+        path: patterns.json のパス
+
+    Returns:
+        StyleRuleset
+    """
+    path = Path(path).resolve()
+    mtime = path.stat().st_mtime_ns
+
+    loaded = _loaded.get(path)
+    if loaded and loaded[0] == mtime and loaded[1] in _rulesets:
+        return _rulesets[loaded[1]]
+
+    style_rules = load_style_rules(path)
+    key = ruleset_key(style_rules)
+    if key not in _rulesets:
+        _rulesets[key] = StyleRuleset(style_rules)
+
+    _loaded[path] = (mtime, key)
+    return _rulesets[key]
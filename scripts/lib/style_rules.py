@@ -0,0 +1,79 @@
+"""
+書き味ルール（data/corpus/style_patterns/patterns.json）の読み込み
+
+目的: patterns.json の detection のうち機械的に照合できるもの（regex / keywords / literal）を
+      正規表現のリストにそろえて返す（正規表現の計測などで共有）
+
+context 型は文脈の判断が必要なため対象外。正規表現は re.MULTILINE で照合する
+（見出しの ^#{2,4} などは行頭の意味で書かれている）。
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List
+
+
+# プロジェクトルートからの patterns.json の位置
+STYLE_PATTERNS_PATH = Path("data") / "corpus" / "style_patterns" / "patterns.json"
+
+# 正規表現として照合できる detection.type
+MATCHABLE_TYPES = ("regex", "keywords", "literal")
+
+
+def detection_regexes(detection: Dict) -> List[str]:
+    """
+    detection 定義を正規表現のリストにする
+
+    Args:
+        detection: patterns.json の detection
+
+    Returns:
+        正規表現のリスト（keywords は語ごと、literal はエスケープ済み）
+    """
+    detection_type = detection.get("type")
+
+    if detection_type == "regex":
+        return [detection["pattern"]]
+    if detection_type == "literal":
+        return [re.escape(detection["pattern"])]
+    if detection_type == "keywords":
+        return [re.escape(keyword) for keyword in detection.get("keywords", [])]
+
+    return []
+
+
+def load_style_rules(path: Path) -> Dict:
+    """
+    patterns.json から照合できるルールを読み込む
+
+    Args:
+        path: patterns.json のパス
+
+    Returns:
+        version と rules（id / group / name / type / severity / regexes / check_absence / platform の辞書のリスト、
+        ファイルの定義順。id は「グループ/ルール名」）
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    rules = []
+    for group, group_rules in data.get("patterns", {}).items():
+        for name, rule in group_rules.items():
+            detection = rule.get("detection") or {}
+            if detection.get("type") not in MATCHABLE_TYPES:
+                continue
+
+            rules.append({
+                "id": f"{group}/{name}",
+                "group": group,
+                "name": name,
+                "type": detection["type"],
+                "severity": detection.get("severity", "info"),
+                "regexes": detection_regexes(detection),
+                "check_absence": bool(detection.get("check_absence")),
+                "platform": detection.get("platform"),
+                "description": rule.get("description", "")
+            })
+
+    return {"version": data.get("version"), "rules": rules}
@@ -0,0 +1,220 @@
+"""
+計測用の合成コーパスを生成する共有処理
+
+目的: 実コーパス（約660件）では差が出にくい処理を、10万件規模の
+      FC2形式の記事で計測できるようにする
+
+本文にはパターン辞書（lib/pattern_dictionaries.py）と patterns.json の語句・
+行頭の書き出し・箇条書き・見出しを混ぜ、パターン照合の一致側の経路も計測できるようにする。
+"""
+
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from lib.pattern_dictionaries import PATTERN_GROUPS
+from lib.pattern_matcher import expand_literals
+from lib.style_rules import STYLE_PATTERNS_PATH, load_style_rules
+
+
+# タイトルに付けるカテゴリ（None はカテゴリなし）
+CATEGORIES = [
+    "徒然", "レビュー", "報告", "東方二次創作", "考察", "告知",
+    "速報", "生存報告", "TRPG", "募集", "通知", "連絡", None
+]
+
+# 本文を組み立てる文の断片（口調・記号は実コーパスに寄せる）
+SENTENCES = [
+    "と、言うわけで今日の更新です（^^；）",
+    "最近は仕事が忙しくてなかなか更新できませんでした。",
+    "昨日のイベントでは新刊を無事に頒布できました！",
+    "正直なところ、この展開は予想していませんでした。",
+    "ちなみに次回のセッションは来週の土曜日を予定しています。",
+    "何がどういう訳かは色々ありますが、とりあえず書き連ねていこうかと。",
+    "詳しくは追記にて。",
+    "感想をいただけると励みになります。",
+    "ところで、皆さんはどう思いますか？",
+    "これは個人的な意見ですが、もう少し丁寧に描写してほしかったところです。",
+    "今回のシナリオはかなり難易度が高めでした。",
+    "また来週もよろしくお願いします。",
+    "体調を崩していましたが、なんとか生きています。",
+    "気が向いたら続きを書きます。",
+    "いやはや、時間が経つのは早いものですね。",
+]
+
+# 固定文字列に展開できない patterns.json の正規表現に当たる行・文（見出し・強調・注記）
+HEADING_LINES = [
+    "## 1. 準備", "### 2）当日の流れ", "## Step 1: 環境を整える", "### ステップ2 下ごしらえ",
+    "## はじめに", "## まとめ", "### おわりに", "## 今回のセッションについて",
+]
+MARKUP_SENTENCES = [
+    "**ポイント：**ここだけは押さえておきたいところ。",
+    "**大事なこと**を先に書いておきます。",
+    "※詳しくは追記にて。",
+    "今日は晴れです。明日も晴れの予報です。週末は久々の雨の予報です。",
+]
+
+# 箇条書きの行頭
+LIST_MARKERS = ["・", "- ", "* ", "1. ", "①"]
+
+# 語句・書き出し・箇条書き・見出し・強調を混ぜる割合
+PHRASE_RATE = 0.15       # 文ごと: パターン辞書の語句を前に置く
+OPENER_RATE = 0.5        # 記事ごと: 最初の段落を行頭の書き出しで始める
+LIST_RATE = 0.15         # 段落ごと: 箇条書きのブロックにする
+HEADING_RATE = 0.08      # 段落ごと: 前に見出しを置く
+MARKUP_RATE = 0.05       # 段落ごと: 強調・注記の文を足す
+
+TITLE_WORDS = [
+    "日常", "近況", "新作", "感想", "イベント", "セッション", "更新", "お知らせ",
+    "雑記", "考察", "レポート", "反省会", "備忘録", "振り返り", "予告"
+]
+
+
+def pattern_phrases(style_path: Optional[Path] = None) -> Dict[str, List[List[str]]]:
+    """
+    パターン辞書と patterns.json から、本文に混ぜる語句を集める
+
+    固定文字列に展開できる正規表現ごとに、展開した語句の候補を1組とする（定義順）。
+
+    Args:
+        style_path: patterns.json（省略時はリポジトリのもの。なければ辞書だけ）
+
+    Returns:
+        {"inline": 文中に置く語句の組, "line_start": 行頭に置く語句の組}
+    """
+    regexes = [regex for pattern_dict in PATTERN_GROUPS.values() for regexes in pattern_dict.values()
+               for regex in regexes]
+
+    style_path = style_path or Path(__file__).resolve().parent.parent.parent / STYLE_PATTERNS_PATH
+    if style_path.exists():
+        regexes += [regex for rule in load_style_rules(style_path)["rules"] for regex in rule["regexes"]]
+
+    phrases = {"inline": [], "line_start": []}
+    for regex in dict.fromkeys(regexes):
+        expanded = expand_literals(regex)
+        if expanded is not None:
+            anchored, literals = expanded
+            phrases["line_start" if anchored else "inline"].append(literals)
+
+    return phrases
+
+
+def synthetic_body(rng: random.Random, phrases: Dict[str, List[List[str]]]) -> str:
+    """
+    合成記事の本文を組み立てる
+
+    Args:
+        rng: 乱数生成器
+        phrases: pattern_phrases() の結果
+
+    Returns:
+        本文（段落は空行区切り）
+    """
+    def phrase(kind: str) -> str:
+        return rng.choice(rng.choice(phrases[kind])) if phrases[kind] else ""
+
+    blocks = []
+    for index in range(rng.randint(2, 12)):
+        if rng.random() < HEADING_RATE:
+            blocks.append(rng.choice(HEADING_LINES) if rng.random() < 0.5 else f"## {rng.choice(TITLE_WORDS)}")
+
+        if rng.random() < LIST_RATE:
+            marker = rng.choice(LIST_MARKERS)
+            blocks.append("\n".join(f"{marker}{rng.choice(TITLE_WORDS)}" for _ in range(rng.randint(2, 5))))
+            continue
+
+        sentences = []
+        for _ in range(rng.randint(1, 6)):
+            sentence = rng.choice(SENTENCES)
+            if rng.random() < PHRASE_RATE:
+                sentence = phrase("inline") + sentence
+            sentences.append(sentence)
+        if rng.random() < MARKUP_RATE:
+            sentences.append(rng.choice(MARKUP_SENTENCES))
+
+        paragraph = "".join(sentences)
+        if index == 0 and rng.random() < OPENER_RATE:
+            paragraph = phrase("line_start") + paragraph
+        blocks.append(paragraph)
+
+    return "\n\n".join(blocks)
+
+
+def synthetic_article(rng: random.Random, index: int, start: date, days: int,
+                      phrases: Dict[str, List[List[str]]]) -> Tuple[str, str]:
+    """
+    合成記事を1件生成
+
+    Args:
+        rng: 乱数生成器
+        index: 通し番号（original_id とファイル名の一意化に使う）
+        start: 投稿日の開始日
+        days: 投稿日を散らす日数
+        phrases: pattern_phrases() の結果
+
+    Returns:
+        (fc2_extracted からの相対パス, ファイル内容)
+    """
+    posted = start + timedelta(days=rng.randrange(days))
+    category = rng.choice(CATEGORIES)
+    words = "・".join(rng.sample(TITLE_WORDS, rng.randint(1, 3)))
+    title = f"【{category}】{words}{index}" if category else f"{words}{index}"
+
+    text = (
+        "---\n"
+        f"title: \"{title}\"\n"
+        f"date: {posted.isoformat()}\n"
+        f"original_id: {index}\n"
+        "---\n\n"
+        + synthetic_body(rng, phrases)
+        + "\n"
+    )
+
+    relative_path = f"{posted.year}/{posted.month:02d}/{posted.isoformat()}_{words}{index}.md"
+
+    return relative_path, text
+
+
+def write_synthetic_corpus(fc2_dir: Path, count: int, seed: int = 0) -> List[Path]:
+    """
+    合成記事を fc2_extracted と同じ構成で書き出す
+
+    同じ count / seed なら同じ内容になる。
+
+    Args:
+        fc2_dir: 出力先（data/raw/fc2_extracted に相当）
+        count: 記事数
+        seed: 乱数シード
+
+    Returns:
+        書き出したファイルパス（ソート済み）
+    """
+    rng = random.Random(seed)
+    phrases = pattern_phrases()
+    start = date(2008, 1, 1)
+    days = (date(2024, 12, 31) - start).days
+
+    created_dirs = set()
+    paths = []
+
+    for index in range(1, count + 1):
+        relative_path, text = synthetic_article(rng, index, start, days, phrases)
+        path = fc2_dir / relative_path
+
+        if path.parent not in created_dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            created_dirs.add(path.parent)
+
+        path.write_text(text, encoding="utf-8")
+        paths.append(path)
+
+    return sorted(paths)
+
+
+def corpus_summary(paths: List[Path]) -> Dict[str, int]:
+    """書き出した合成コーパスの件数と合計バイト数"""
+    return {
+        "articles": len(paths),
+        "bytes": sum(path.stat().st_size for path in paths)
+    }
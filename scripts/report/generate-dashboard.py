@@ -5,11 +5,20 @@
 目的: metadata.jsonから統計情報を抽出し、docs/dashboard.mdを生成
 使い方: python3 generate-dashboard.py
 出力: docs/dashboard.md
+
+writing-corpus.db があれば、記事単位の集計は集計テーブル（article_stats）から読み、
+記事を走査しない。
 """
 
-import json
+import sqlite3
+import sys
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.corpus import open_corpus
+from lib.metadata_store import MetadataStore
 
 
 def format_statistics(metadata: dict) -> str:
@@ -55,13 +64,44 @@ def format_statistics(metadata: dict) -> str:
     return md
 
 
-def format_corpus_stats(articles: list) -> str:
-    """AI学習用コーパス統計をフォーマット"""
+def load_db_statistics(db_path: Path) -> Optional[Dict]:
+    """
+    writing-corpus.db の集計テーブルから全体統計を取得
+
+    Args:
+        db_path: データベースファイルパス
+
+    Returns:
+        article_stats の全体行（DBや集計テーブルがなければNone）
+    """
+    if not db_path.exists():
+        return None
+
+    with open_corpus(db_path).reader() as conn:
+        conn.row_factory = sqlite3.Row
+
+        try:
+            row = conn.execute("SELECT * FROM article_stats WHERE dimension = 'total'").fetchone()
+        except sqlite3.OperationalError:
+            row = None
+
+    return dict(row) if row else None
+
+
+def format_corpus_stats(articles, db_stats: Optional[Dict] = None) -> str:
+    """AI学習用コーパス統計をフォーマット（集計テーブルがなければ articles を1回だけ走査する）"""
     md = "## AI学習用コーパス統計\n\n"
 
     # サンプリング済み記事数
-    sampled_count = sum(1 for a in articles if a['corpus_metadata']['sampled'])
-    reference_count = sum(1 for a in articles if a['corpus_metadata']['reference_article'])
+    if db_stats is not None:
+        sampled_count = db_stats['sampled_count']
+        reference_count = db_stats['reference_count']
+    else:
+        sampled_count = 0
+        reference_count = 0
+        for a in articles:
+            sampled_count += bool(a['corpus_metadata']['sampled'])
+            reference_count += bool(a['corpus_metadata']['reference_article'])
 
     md += f"- **サンプリング済み**: {sampled_count}件\n"
     md += f"- **参照記事**: {reference_count}件\n"
@@ -115,12 +155,12 @@ def format_recent_changes(metadata: dict) -> str:
     return md
 
 
-def generate_dashboard(metadata_path: Path, output_path: Path):
+def generate_dashboard(corpus_dir: Path, output_path: Path, db_path: Optional[Path] = None):
     """ダッシュボードを生成"""
-    with metadata_path.open('r', encoding='utf-8') as f:
-        metadata = json.load(f)
+    store = MetadataStore.open(corpus_dir)
+    db_stats = load_db_statistics(db_path) if db_path else None
 
-    articles = metadata['articles']
+    metadata = store.header
     stats = metadata['statistics']
 
     # Markdownコンテンツ生成
@@ -129,8 +169,8 @@ def generate_dashboard(metadata_path: Path, output_path: Path):
     md += "---\n\n"
 
     md += format_statistics(metadata)
-    md += format_corpus_stats(articles)
-    md += format_rewrite_progress(articles, stats)
+    md += format_corpus_stats(store, db_stats)
+    md += format_rewrite_progress(store, stats)
     md += format_recent_changes(metadata)
 
     md += "---\n\n"
@@ -143,19 +183,22 @@ def generate_dashboard(metadata_path: Path, output_path: Path):
     with output_path.open('w', encoding='utf-8') as f:
         f.write(md)
 
+    store.close()
+
     print(f"✅ ダッシュボードを生成しました: {output_path}")
 
 
 def main():
     project_root = Path(__file__).parent.parent.parent
-    metadata_path = project_root / "data" / "corpus" / "metadata.json"
+    corpus_dir = project_root / "data" / "corpus"
+    metadata_path = corpus_dir / "metadata.json"
     output_path = project_root / "docs" / "dashboard.md"
 
-    if not metadata_path.exists():
+    if not metadata_path.exists() and not MetadataStore(corpus_dir).exists():
         print(f"❌ metadata.jsonが見つかりません: {metadata_path}")
         return
 
-    generate_dashboard(metadata_path, output_path)
+    generate_dashboard(corpus_dir, output_path, corpus_dir / "writing-corpus.db")
 
 
 if __name__ == "__main__":
@@ -5,14 +5,29 @@
 目的: AI学習用に最適な記事をサンプリング
 使い方: python3 smart-sampler.py --category 徒然 --min-score 60 --limit 10
 出力: 標準出力またはJSONファイル
+
+読む列は出力形式で決まる（simple / markdown は表示する列だけ、json は全列）。--fields で指定もできる。
+本文（content）は列に含まれる場合だけ、選ばれた記事の分を後から読む。
 """
 
-import sqlite3
 import json
 import argparse
+import sys
 from pathlib import Path
 from typing import List, Dict, Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.corpus import open_corpus
+from lib.sampling import (field_list, project_articles, random_articles, sample_articles, select_columns,
+                          top_articles_by_category)
+
+
+# 出力形式ごとに読む列（json は全列）
+FORMAT_FIELDS = {
+    "simple": ["id", "title", "rewrite_score"],
+    "markdown": ["id", "title", "category", "rewrite_score", "rewrite_type"]
+}
+
 
 def sample_by_criteria(
     db_path: Path,
@@ -24,7 +39,8 @@ def sample_by_criteria(
     year_from: Optional[int] = None,
     year_to: Optional[int] = None,
     limit: int = 50,
-    order_by: str = "rewrite_score"
+    order_by: str = "rewrite_score",
+    fields: Optional[List[str]] = None
 ) -> List[Dict]:
     """
     条件指定でサンプリング
@@ -40,63 +56,30 @@ def sample_by_criteria(
         year_to: 終了年
         limit: 取得件数上限
         order_by: ソート順（rewrite_score, elo_rating, word_count等）
+        fields: 返す列（None の場合は全列）
 
     Returns:
         記事リスト
     """
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-
-    query = "SELECT * FROM articles WHERE 1=1"
-    params = []
-
-    if category:
-        query += " AND category = ?"
-        params.append(category)
-
-    if min_rewrite_score is not None:
-        query += " AND rewrite_score >= ?"
-        params.append(min_rewrite_score)
-
-    if min_quality_score is not None:
-        query += " AND quality_score >= ?"
-        params.append(min_quality_score)
-
-    if min_elo is not None:
-        query += " AND elo_rating >= ?"
-        params.append(min_elo)
-
-    if rewrite_type:
-        query += " AND rewrite_type = ?"
-        params.append(rewrite_type)
-
-    if year_from:
-        query += " AND year >= ?"
-        params.append(year_from)
-
-    if year_to:
-        query += " AND year <= ?"
-        params.append(year_to)
-
-    # ソート
-    valid_order_by = ["rewrite_score", "elo_rating", "word_count", "date", "year"]
-    if order_by in valid_order_by:
-        query += f" ORDER BY {order_by} DESC"
-    else:
-        query += " ORDER BY rewrite_score DESC"
-
-    query += " LIMIT ?"
-    params.append(limit)
-
-    cursor = conn.execute(query, params)
-    results = [dict(row) for row in cursor.fetchall()]
-
-    conn.close()
+    with open_corpus(db_path).reader() as conn:
+        results = sample_articles(
+            conn,
+            category=category,
+            min_rewrite_score=min_rewrite_score,
+            min_quality_score=min_quality_score,
+            min_elo=min_elo,
+            rewrite_type=rewrite_type,
+            year_from=year_from,
+            year_to=year_to,
+            limit=limit,
+            order_by=order_by,
+            fields=fields
+        )
 
     return results
 
 
-def search_full_text(db_path: Path, keyword: str, limit: int = 50) -> List[Dict]:
+def search_full_text(db_path: Path, keyword: str, limit: int = 50, fields: Optional[List[str]] = None) -> List[Dict]:
     """
     全文検索
 
@@ -104,66 +87,75 @@ def search_full_text(db_path: Path, keyword: str, limit: int = 50) -> List[Dict]
         db_path: データベースファイルパス
         keyword: 検索キーワード
         limit: 取得件数上限
+        fields: 返す列（None の場合は全列。どちらの場合も rank を付ける）
 
     Returns:
         記事リスト
     """
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-
-    query = """
-        SELECT articles.*, rank
-        FROM articles_fts
-        JOIN articles ON articles.rowid = articles_fts.rowid
-        WHERE articles_fts MATCH ?
-        ORDER BY rank
-        LIMIT ?
-    """
-
-    cursor = conn.execute(query, (keyword, limit))
-    results = [dict(row) for row in cursor.fetchall()]
+    fields = field_list(fields)
+
+    with open_corpus(db_path).reader() as conn:
+        query = f"""
+            SELECT {select_columns(fields, "articles.")}, rank
+            FROM articles_fts
+            JOIN articles ON articles.rowid = articles_fts.rowid
+            WHERE articles_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """
 
-    conn.close()
+        results = project_articles(conn, conn.execute(query, (keyword, limit)), fields, extra=("rank",))
 
     return results
 
 
-def get_top_articles_by_category(db_path: Path, limit_per_category: int = 5) -> Dict[str, List[Dict]]:
+def get_top_articles_by_category(
+    db_path: Path,
+    limit_per_category: int = 5,
+    order_by: str = "rewrite_score",
+    quotas: Optional[Dict[str, int]] = None,
+    fields: Optional[List[str]] = None
+) -> Dict[str, List[Dict]]:
     """
     カテゴリ別のトップ記事を取得
 
     Args:
         db_path: データベースファイルパス
         limit_per_category: カテゴリごとの取得件数
+        order_by: ソート順（カンマ区切りで複数指定可）
+        quotas: カテゴリ別の取得件数（limit_per_category より優先）
+        fields: 返す列（None の場合は全列）
 
     Returns:
         カテゴリ別記事辞書
     """
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    with open_corpus(db_path).reader() as conn:
+        results = top_articles_by_category(conn, limit_per_category, order_by, quotas, fields)
 
-    # カテゴリ一覧取得
-    cursor = conn.execute("SELECT DISTINCT category FROM articles ORDER BY category")
-    categories = [row[0] for row in cursor.fetchall()]
+    return results
 
-    results = {}
 
-    for category in categories:
-        query = """
-            SELECT * FROM articles
-            WHERE category = ?
-            ORDER BY rewrite_score DESC
-            LIMIT ?
-        """
-        cursor = conn.execute(query, (category, limit_per_category))
-        results[category or "未分類"] = [dict(row) for row in cursor.fetchall()]
+def parse_quotas(values: List[str]) -> Dict[str, int]:
+    """
+    --quota の「カテゴリ=件数」を辞書にする
 
-    conn.close()
+    Args:
+        values: 「カテゴリ=件数」のリスト
 
-    return results
+    Returns:
+        カテゴリ → 件数
+    """
+    quotas = {}
+    for value in values:
+        category, _, count = value.rpartition("=")
+        if not category or not count.isdigit():
+            raise ValueError(f"--quota は「カテゴリ=件数」で指定してください: {value}")
+        quotas[category] = int(count)
+    return quotas
 
 
-def get_random_sample(db_path: Path, limit: int = 10, seed: Optional[int] = None) -> List[Dict]:
+def get_random_sample(db_path: Path, limit: int = 10, seed: Optional[int] = None,
+                      fields: Optional[List[str]] = None, **filters) -> List[Dict]:
     """
     ランダムサンプリング
 
@@ -171,35 +163,32 @@ def get_random_sample(db_path: Path, limit: int = 10, seed: Optional[int] = None
         db_path: データベースファイルパス
         limit: 取得件数
         seed: 乱数シード（再現性のため）
+        fields: 返す列（None の場合は全列）
+        **filters: 絞り込み条件（category, min_elo, year_from 等。lib/sampling.py の sample_filters()）
 
     Returns:
         記事リスト
     """
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-
-    if seed is not None:
-        # SQLiteのRANDOMはシード固定できないので、Pythonで実装
-        import random
-        random.seed(seed)
+    with open_corpus(db_path).reader() as conn:
+        results = random_articles(conn, limit, seed, fields, **filters)
 
-        cursor = conn.execute("SELECT id FROM articles")
-        all_ids = [row[0] for row in cursor.fetchall()]
-
-        sampled_ids = random.sample(all_ids, min(limit, len(all_ids)))
+    return results
 
-        placeholders = ','.join('?' * len(sampled_ids))
-        query = f"SELECT * FROM articles WHERE id IN ({placeholders})"
-        cursor = conn.execute(query, sampled_ids)
-    else:
-        query = "SELECT * FROM articles ORDER BY RANDOM() LIMIT ?"
-        cursor = conn.execute(query, (limit,))
 
-    results = [dict(row) for row in cursor.fetchall()]
+def output_fields(format_type: str, fields: Optional[str] = None) -> Optional[List[str]]:
+    """
+    読む列を決める（simple / markdown は表示する列を必ず含める）
 
-    conn.close()
+    Args:
+        format_type: 出力形式（json, simple, markdown）
+        fields: --fields のカンマ区切りの列名（None の場合は出力形式の既定）
 
-    return results
+    Returns:
+        列名のリスト（None は全列）
+    """
+    if fields is None:
+        return FORMAT_FIELDS.get(format_type)
+    return list(dict.fromkeys(FORMAT_FIELDS.get(format_type, []) + field_list(fields)))
 
 
 def format_output(articles: List[Dict], format_type: str = "json") -> str:
@@ -249,19 +238,31 @@ def main():
 
     # 検索モード
     parser.add_argument("--search", help="全文検索キーワード")
-    parser.add_argument("--random", action="store_true", help="ランダムサンプリング")
+    parser.add_argument("--random", action="store_true", help="ランダムサンプリング（検索条件に合う記事から等確率で選ぶ）")
     parser.add_argument("--top-by-category", action="store_true", help="カテゴリ別トップ記事")
 
     # オプション
+    parser.add_argument("--seed", type=int, help="--random の乱数シード（同じシード・同じ記事集合なら同じ記事を選ぶ）")
     parser.add_argument("--limit", type=int, default=50, help="取得件数上限（デフォルト: 50）")
-    parser.add_argument("--order-by", default="rewrite_score", help="ソート順（デフォルト: rewrite_score）")
+    parser.add_argument("--order-by", default="rewrite_score",
+                        help="ソート順（カンマ区切りで複数指定可。デフォルト: rewrite_score）")
+    parser.add_argument("--quota", action="append", default=[], metavar="カテゴリ=件数",
+                        help="--top-by-category のカテゴリ別件数（複数指定可。未分類は 未分類=件数）")
     parser.add_argument("--format", choices=["json", "simple", "markdown"], default="simple", help="出力形式")
+    parser.add_argument("--fields", help="出力する列（カンマ区切り。例: id,title,elo_rating。content を含めると本文も読む）")
     parser.add_argument("--output", help="出力ファイルパス（指定しない場合は標準出力）")
+    parser.add_argument("--root", help="プロジェクトルート（合成コーパスでの計測用）")
 
     args = parser.parse_args()
 
+    try:
+        quotas = parse_quotas(args.quota)
+        fields = output_fields(args.format, args.fields)
+    except ValueError as e:
+        parser.error(str(e))
+
     # データベースパス
-    project_root = Path(__file__).parent.parent.parent
+    project_root = Path(args.root) if args.root else Path(__file__).parent.parent.parent
     db_path = project_root / "data" / "corpus" / "writing-corpus.db"
 
     if not db_path.exists():
@@ -271,15 +272,27 @@ def main():
 
     # サンプリング実行
     if args.search:
-        articles = search_full_text(db_path, args.search, args.limit)
+        articles = search_full_text(db_path, args.search, args.limit, fields)
         print(f"全文検索: '{args.search}' → {len(articles)}件")
 
     elif args.random:
-        articles = get_random_sample(db_path, args.limit)
+        articles = get_random_sample(
+            db_path,
+            args.limit,
+            seed=args.seed,
+            fields=fields,
+            category=args.category,
+            min_rewrite_score=args.min_score,
+            min_quality_score=args.min_quality,
+            min_elo=args.min_elo,
+            rewrite_type=args.type,
+            year_from=args.year_from,
+            year_to=args.year_to
+        )
         print(f"ランダムサンプリング: {len(articles)}件")
 
     elif args.top_by_category:
-        category_articles = get_top_articles_by_category(db_path, args.limit)
+        category_articles = get_top_articles_by_category(db_path, args.limit, args.order_by, quotas, fields)
         # フラット化
         articles = []
         for category, arts in category_articles.items():
@@ -297,7 +310,8 @@ def main():
             year_from=args.year_from,
             year_to=args.year_to,
             limit=args.limit,
-            order_by=args.order_by
+            order_by=args.order_by,
+            fields=fields
         )
         print(f"条件検索: {len(articles)}件")
 
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+層別サンプリング: カテゴリ × 年 × スコア・ELO帯ごとの件数割り当てで参考記事を抽出
+
+目的: article-creation の参考記事（技術は 考察/TRPG から10件、エッセイは 徒然/報告 から10件 など）を、
+      sample_by_criteria を何度も呼んでつなぎ合わせず、1回のコマンドで再現可能に作り直す
+使い方: python3 stratified-sampler.py [--spec FILE] [--seed N] [--output-dir DIR] [--dry-run] [--root DIR]
+出力: 出力先ごとの samples-<名前>.json（smart-sampler.py --format json と同じ形）。層ごとの充足状況を表示
+      （--root 指定時は <root>/integration/article-creation/ に書き、リポジトリの samples-*.json は変えない）
+
+割り当て表（JSON、PyYAML があれば YAML も可）:
+    {
+      "seed": 20080101,
+      "defaults": {"min_score": 50},
+      "outputs": {
+        "tech": [{"category": ["考察", "TRPG"], "count": 10}],
+        "essay": [{"category": ["徒然", "報告"], "year_from": 2008, "year_to": 2010, "count": 5}, ...]
+      }
+    }
+    層の条件は category（1つまたはリスト）/ year_from / year_to / min_score / max_score / min_elo / max_elo と
+    count（件数）。defaults は全層に適用され、層の指定が優先する。
+    同じ出力先の層に重なる記事は先に書いた層に割り当てる。
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.corpus import open_corpus
+from lib.sampling import STRATUM_FILTERS, stratified_sample
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+# 割り当て表の既定の場所（プロジェクトルートからの相対パス）
+DEFAULT_SPEC_PATH = Path("integration") / "article-creation" / "sample-strata.json"
+
+
+def load_spec(spec_path: Path) -> Dict:
+    """
+    割り当て表を読む
+
+    Args:
+        spec_path: 割り当て表（.json / .yaml / .yml）
+
+    Returns:
+        割り当て表の辞書
+
+    Raises:
+        ValueError: 形式が不正な場合、または YAML で PyYAML がない場合
+    """
+    text = spec_path.read_text(encoding="utf-8")
+    if spec_path.suffix in (".yaml", ".yml"):
+        if yaml is None:
+            raise ValueError("YAML の割り当て表には PyYAML が必要です（pip install pyyaml）。JSON なら不要です")
+        spec = yaml.safe_load(text)
+    else:
+        spec = json.loads(text)
+
+    if not isinstance(spec, dict) or not isinstance(spec.get("outputs"), dict) or not spec["outputs"]:
+        raise ValueError("割り当て表には outputs（出力先の名前 → 層のリスト）が必要です")
+
+    unknown = set(spec.get("defaults") or {}) - set(STRATUM_FILTERS)
+    if unknown:
+        raise ValueError(f"defaults に未知の条件があります: {', '.join(sorted(unknown))}")
+
+    return spec
+
+
+def build_strata(spec: Dict) -> List[Dict]:
+    """
+    割り当て表を lib/sampling.py の stratified_sample() の層のリストにする
+
+    Args:
+        spec: load_spec() の結果
+
+    Returns:
+        層のリスト（group に出力先の名前を入れる）
+    """
+    defaults = spec.get("defaults") or {}
+    strata = []
+
+    for name, layers in spec["outputs"].items():
+        if not isinstance(layers, list):
+            raise ValueError(f"outputs.{name} は層のリストで指定してください")
+        for layer in layers:
+            if not isinstance(layer, dict):
+                raise ValueError(f"outputs.{name} の層は条件のオブジェクトで指定してください")
+            strata.append({**defaults, **layer, "group": name})
+
+    return strata
+
+
+def describe(stratum: Dict) -> str:
+    """層の条件を1行で表す"""
+    parts = []
+    category = stratum.get("category")
+    if category:
+        parts.append("/".join(category) if isinstance(category, list) else category)
+    if stratum.get("year_from") or stratum.get("year_to"):
+        parts.append(f"{stratum.get('year_from') or ''}〜{stratum.get('year_to') or ''}年")
+    if stratum.get("min_score") is not None or stratum.get("max_score") is not None:
+        parts.append(f"スコア {stratum.get('min_score') or ''}〜{stratum.get('max_score') or ''}")
+    if stratum.get("min_elo") is not None or stratum.get("max_elo") is not None:
+        parts.append(f"ELO {stratum.get('min_elo') or ''}〜{stratum.get('max_elo') or ''}")
+    return " ".join(parts) or "全記事"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="層別サンプリング: 件数割り当てで参考記事を抽出")
+
+    parser.add_argument("--spec", help=f"割り当て表（デフォルト: {DEFAULT_SPEC_PATH}）")
+    parser.add_argument("--seed", type=int, help="乱数シード（割り当て表の seed より優先）")
+    parser.add_argument("--output-dir",
+                        help="samples-*.json の出力先（デフォルト: 割り当て表と同じディレクトリ。"
+                             "--root 指定時は <root>/integration/article-creation）")
+    parser.add_argument("--fields", help="出力する列（カンマ区切り。デフォルト: 全列）")
+    parser.add_argument("--dry-run", action="store_true", help="充足状況の表示だけ行い、ファイルは書かない")
+    parser.add_argument("--root", help="プロジェクトルート（合成コーパスでの計測用）")
+
+    args = parser.parse_args()
+
+    # データベースパス
+    project_root = Path(args.root) if args.root else Path(__file__).parent.parent.parent
+    db_path = project_root / "data" / "corpus" / "writing-corpus.db"
+    spec_path = Path(args.spec) if args.spec else project_root / DEFAULT_SPEC_PATH
+    if not args.spec and not spec_path.exists():
+        # 合成コーパスのルートには割り当て表がないのでリポジトリのものを使う
+        spec_path = Path(__file__).resolve().parent.parent.parent / DEFAULT_SPEC_PATH
+
+    # --root 指定時はリポジトリの samples-*.json を合成コーパスの記事で上書きしないよう、ルート側に書き出す
+    if args.output_dir:
+        output_dir = Path(args.output_dir)
+    elif args.root:
+        output_dir = project_root / DEFAULT_SPEC_PATH.parent
+    else:
+        output_dir = spec_path.parent
+
+    if not db_path.exists():
+        print(f"❌ データベースが見つかりません: {db_path}")
+        print("   先に migrate-to-sqlite.py を実行してください")
+        return
+
+    try:
+        spec = load_spec(spec_path)
+        strata = build_strata(spec)
+        seed = args.seed if args.seed is not None else spec.get("seed")
+
+        started = time.perf_counter()
+        with open_corpus(db_path).reader() as conn:
+            results = stratified_sample(conn, strata, seed=seed, fields=args.fields)
+        elapsed = time.perf_counter() - started
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    outputs: Dict[str, List[Dict]] = {name: [] for name in spec["outputs"]}
+    underfilled = 0
+
+    print(f"📊 層別サンプリング（シード: {seed}、{elapsed * 1000:.0f}ms）")
+    for result in results:
+        stratum = result["stratum"]
+        outputs[stratum["group"]].extend(result["articles"])
+
+        line = f"{stratum['group']}: {describe(stratum)} → {len(result['articles'])}/{stratum['count']}件"
+        if result["available"] is not None:
+            underfilled += 1
+            print(f"⚠️  {line}（割り当てられる記事は {result['available']}件）")
+        else:
+            print(f"   {line}")
+
+    if args.dry_run:
+        print("（--dry-run のためファイルは書き出していません）")
+    else:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for name, articles in outputs.items():
+            output_file = output_dir / f"samples-{name}.json"
+            output_file.write_text(json.dumps(articles, ensure_ascii=False, indent=2), encoding="utf-8")
+            print(f"✅ 出力完了: {output_file}（{len(articles)}件）")
+
+    if underfilled:
+        print(f"⚠️  割り当てに満たない層: {underfilled}件（条件を緩めるか count を減らしてください）")
+
+
+if __name__ == "__main__":
+    main()
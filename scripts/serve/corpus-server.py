@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+常駐サーバー: 書き味ルール・パターン辞書・DB接続を温めたまま、エディタからの問い合わせに答える
+
+目的: エディタの保存・入力のたびに lint-style.py などを起動し直す（インタプリタ起動・DB接続・
+      パターンのコンパイル）コストをなくし、検査・パターン照合・サンプリングを10ms未満で返す
+使い方: python3 corpus-server.py [--socket PATH] [--log PATH] [--root DIR]
+        （--socket を省略すると標準入出力で応答する）
+出力: 1行1件の JSON-RPC 2.0 応答（標準出力または Unix ソケット）。--log で要求ごとの処理時間を JSONL に追記
+
+メソッド（params は名前付き）:
+    lint          text, platform, min_severity             → lib/style_lint.py の指摘
+    match         text, types, max_hits                    → extract-patterns.py の辞書による出現位置
+    sample        category, min_elo, ... limit, fields     → lib/sampling.py の記事（content は include_content で）
+    kwic          pattern / phrase, type, window, page ... → lib/concordance.py の用例
+    stats                                                  → メソッドごとの件数・p50 / p99（直近1000件）
+    ping                                                   → 稼働確認
+
+例:
+    echo '{"jsonrpc": "2.0", "id": 1, "method": "lint", "params": {"text": "結論から言うと"}}' \\
+        | python3 scripts/serve/corpus-server.py
+"""
+
+import argparse
+import inspect
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union, get_args, get_origin, get_type_hints
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.concordance import pattern_kwic, phrase_kwic
+from lib.corpus import Corpus, open_corpus
+from lib.pattern_dictionaries import PATTERN_GROUPS
+from lib.pattern_matcher import PatternMatcher
+from lib.sampling import field_list, sample_articles
+from lib.style_lint import NEWLINE, SEVERITY_LEVELS, load_ruleset
+from lib.style_rules import STYLE_PATTERNS_PATH
+
+
+# JSON-RPC 2.0 のエラーコード
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+# stats で集計する直近の要求数（メソッドごと）
+LATENCY_WINDOW = 1000
+
+# sample の件数上限（エディタへの応答を小さく保つ）
+MAX_SAMPLE_LIMIT = 200
+
+
+def percentile(values: List[float], ratio: float) -> Optional[float]:
+    """昇順に並べた値の ratio 分位（最近傍）"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+def type_matches(value, annotation) -> bool:
+    """params の値がメソッドの型注釈（str / int / float / bool / List[str] / Optional[...]）に合うか"""
+    if get_origin(annotation) is Union:
+        return any(type_matches(value, arg) for arg in get_args(annotation))
+    if annotation is type(None):
+        return value is None
+    if get_origin(annotation) is list:
+        item_type = (get_args(annotation) or (object,))[0]
+        return isinstance(value, list) and all(type_matches(item, item_type) for item in value)
+    if annotation is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if annotation is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, annotation)
+
+
+def check_param_types(handler, params: Dict):
+    """
+    params の型をメソッドの型注釈で検査する
+
+    Raises:
+        TypeError: 型の合わない引数がある場合（INVALID_PARAMS として返す）
+    """
+    hints = get_type_hints(handler)
+    for name, value in params.items():
+        if name in hints and not type_matches(value, hints[name]):
+            raise TypeError(f"{name} の型が不正です: {json.dumps(value, ensure_ascii=False)}")
+
+
+class CorpusServer:
+    """温めた照合器とDB接続で JSON-RPC の要求に答える"""
+
+    def __init__(self, project_root: Path, log_path: Optional[Path] = None):
+        """
+        Args:
+            project_root: プロジェクトルート（writing-corpus.db の場所）
+            log_path: 要求ごとの処理時間を追記する JSONL（None なら記録しない）
+        """
+        self.rules_path = project_root / STYLE_PATTERNS_PATH
+        if not self.rules_path.exists():
+            # 合成コーパスのルートには patterns.json がないのでリポジトリのものを使う
+            self.rules_path = Path(__file__).resolve().parent.parent.parent / STYLE_PATTERNS_PATH
+        self.db_path = project_root / "data" / "corpus" / "writing-corpus.db"
+
+        # 起動時にコンパイル・接続しておく（patterns.json は更新時刻を見て読み直す）
+        load_ruleset(self.rules_path)
+        self.matcher = PatternMatcher(PATTERN_GROUPS)
+        # 読み取り専用接続のプール（Unix ソケットの接続ごとのスレッドが1本ずつ借りる）
+        self.corpus = open_corpus(self.db_path) if self.db_path.exists() else None
+        if self.corpus:
+            with self.corpus.reader():
+                pass
+
+        self.log_lock = threading.Lock()
+        self.log_file = open(log_path, "a", encoding="utf-8") if log_path else None
+        self.latencies: Dict[str, deque] = {}
+        self.started_at = time.time()
+
+        self.methods = {
+            "lint": self.rpc_lint,
+            "match": self.rpc_match,
+            "sample": self.rpc_sample,
+            "kwic": self.rpc_kwic,
+            "stats": self.rpc_stats,
+            "ping": self.rpc_ping
+        }
+
+    def require_db(self) -> Corpus:
+        if self.corpus is None:
+            raise LookupError(f"データベースが見つかりません: {self.db_path}")
+        return self.corpus
+
+    # --- メソッド ---
+
+    def rpc_lint(self, text: str, platform: Optional[str] = None, min_severity: str = "info") -> Dict:
+        if min_severity not in SEVERITY_LEVELS:
+            raise ValueError(f"min_severity は {' / '.join(SEVERITY_LEVELS)} のいずれかです")
+        ruleset = load_ruleset(self.rules_path)
+        return {"version": ruleset.version, "findings": ruleset.lint(text, platform, min_severity)}
+
+    def rpc_match(self, text: str, types: Optional[List[str]] = None, max_hits: int = 1000) -> Dict:
+        line_starts = None
+        hits = []
+        for pattern_type, pattern_name, _, start, end in self.matcher.iter_hits(text):
+            if types and pattern_type not in types:
+                continue
+            if len(hits) >= max_hits:
+                break
+            if line_starts is None:
+                line_starts = [0] + [match.end() for match in NEWLINE.finditer(text)]
+            line = bisect_right(line_starts, start)
+            hits.append({
+                "type": pattern_type,
+                "name": pattern_name,
+                "line": line,
+                "column": start - line_starts[line - 1] + 1,
+                "start": start,
+                "end": end,
+                "match": text[start:end]
+            })
+        return {"hits": hits}
+
+    def rpc_sample(self, category: Optional[str] = None, min_rewrite_score: Optional[float] = None,
+                   min_quality_score: Optional[float] = None, min_elo: Optional[int] = None,
+                   rewrite_type: Optional[str] = None, year_from: Optional[int] = None,
+                   year_to: Optional[int] = None, limit: int = 10, order_by: str = "rewrite_score",
+                   include_content: bool = False, fields: Optional[Union[str, List[str]]] = None) -> Dict:
+        # 本文は include_content の場合だけ読む（fields の指定より優先）
+        fields = [field for field in field_list(fields) if field != "content"]
+        if include_content:
+            fields.append("content")
+
+        with self.require_db().reader() as conn:
+            articles = sample_articles(
+                conn,
+                category=category,
+                min_rewrite_score=min_rewrite_score,
+                min_quality_score=min_quality_score,
+                min_elo=min_elo,
+                rewrite_type=rewrite_type,
+                year_from=year_from,
+                year_to=year_to,
+                limit=max(0, min(limit, MAX_SAMPLE_LIMIT)),
+                order_by=order_by,
+                fields=fields
+            )
+        return {"articles": articles}
+
+    def rpc_kwic(self, pattern: Optional[str] = None, phrase: Optional[str] = None, type: Optional[str] = None,
+                 window: int = 20, page: int = 1, per_page: int = 20, total: bool = True, sentence: bool = False,
+                 category: Optional[str] = None, year: Optional[int] = None,
+                 min_elo: Optional[int] = None, max_elo: Optional[int] = None) -> Dict:
+        if bool(pattern) == bool(phrase):
+            raise ValueError("pattern と phrase のどちらか一方を指定してください")
+
+        filters = {"category": category, "year": year, "min_elo": min_elo, "max_elo": max_elo}
+        offset = max(0, page - 1) * per_page
+        with self.require_db().reader() as conn:
+            if pattern:
+                return pattern_kwic(conn, pattern, type, window=window, offset=offset,
+                                    limit=per_page, sentences=sentence, **filters)
+            return phrase_kwic(conn, phrase, window=window, offset=offset, limit=per_page,
+                               count_total=total, sentences=sentence, **filters)
+
+    def rpc_stats(self) -> Dict:
+        # ソケットの各スレッドが record() で追記するので、ロック内で写しを取ってから集計する
+        with self.log_lock:
+            snapshot = {method: list(latencies) for method, latencies in self.latencies.items()}
+
+        methods = {}
+        for method, latencies in snapshot.items():
+            ordered = sorted(latencies)
+            methods[method] = {
+                "count": len(ordered),
+                "p50_ms": percentile(ordered, 0.50),
+                "p99_ms": percentile(ordered, 0.99),
+                "max_ms": ordered[-1]
+            }
+        return {"uptime_s": time.time() - self.started_at, "methods": methods}
+
+    def rpc_ping(self) -> Dict:
+        return {"ok": True}
+
+    # --- JSON-RPC ---
+
+    def handle_line(self, line: str) -> Optional[str]:
+        """
+        1行の要求を処理して応答行を返す
+
+        Args:
+            line: JSON-RPC 2.0 の要求（1行）
+
+        Returns:
+            応答の JSON 文字列（通知＝id のない要求には None）
+        """
+        started = time.perf_counter()
+        request_id = None
+        method = None
+        error = None
+        result = None
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            request = None
+            error = (PARSE_ERROR, f"JSONとして読めません: {e}")
+
+        if request is not None:
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                error = (INVALID_REQUEST, "method がありません")
+            else:
+                request_id = request.get("id")
+                method = request["method"]
+                error, result = self.dispatch(method, request.get("params") or {})
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.record(method, request_id, elapsed_ms, error)
+
+        if request is not None and isinstance(request, dict) and "id" not in request:
+            return None
+
+        response = {"jsonrpc": "2.0", "id": request_id}
+        if error:
+            response["error"] = {"code": error[0], "message": error[1]}
+        else:
+            response["result"] = result
+        return json.dumps(response, ensure_ascii=False)
+
+    def dispatch(self, method: str, params: Dict):
+        """メソッドを呼び出し、(エラー, 結果) を返す"""
+        handler = self.methods.get(method)
+        if handler is None:
+            return (METHOD_NOT_FOUND, f"未知のメソッドです: {method}"), None
+        if not isinstance(params, dict):
+            return (INVALID_PARAMS, "params は名前付き（オブジェクト）で指定してください"), None
+
+        try:
+            inspect.signature(handler).bind(**params)
+            check_param_types(handler, params)
+        except TypeError as e:
+            return (INVALID_PARAMS, str(e)), None
+
+        try:
+            return None, handler(**params)
+        except (ValueError, LookupError) as e:
+            return (INVALID_PARAMS, str(e)), None
+        except Exception as e:
+            return (INTERNAL_ERROR, f"{type(e).__name__}: {e}"), None
+
+    def record(self, method: Optional[str], request_id, elapsed_ms: float, error):
+        """処理時間を集計し、--log があれば1行追記する"""
+        key = method if method in self.methods else "(invalid)"
+        entry = None
+        if self.log_file:
+            entry = {
+                "at": datetime.now().isoformat(timespec="milliseconds"),
+                "method": method,
+                "id": request_id,
+                "ms": round(elapsed_ms, 3),
+                "ok": error is None
+            }
+            if error:
+                entry["error"] = error[0]
+
+        with self.log_lock:
+            self.latencies.setdefault(key, deque(maxlen=LATENCY_WINDOW)).append(elapsed_ms)
+            if entry:
+                self.log_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self.log_file.flush()
+
+    def close(self):
+        if self.corpus is not None:
+            self.corpus.close()
+        if self.log_file:
+            self.log_file.close()
+
+
+def serve_stdio(server: CorpusServer):
+    """標準入力の1行1要求に標準出力で応答する（EOF で終了）"""
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        response = server.handle_line(line)
+        if response is not None:
+            sys.stdout.write(response + "\n")
+            sys.stdout.flush()
+
+
+def serve_socket(server: CorpusServer, socket_path: Path):
+    """Unix ソケットで待ち受ける（接続ごとのスレッドで1行1要求に応答）"""
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                line = raw.decode("utf-8")
+                if not line.strip():
+                    continue
+                response = server.handle_line(line)
+                if response is not None:
+                    self.wfile.write((response + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    if socket_path.exists():
+        socket_path.unlink()
+
+    # kill（SIGTERM）でもソケットファイルを片付けて終わる
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    with Server(str(socket_path), Handler) as unix_server:
+        os.chmod(socket_path, 0o600)
+        print(f"✅ 待ち受け開始: {socket_path}", file=sys.stderr)
+        try:
+            unix_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            socket_path.unlink(missing_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常駐サーバー: 検査・パターン照合・サンプリング")
+
+    parser.add_argument("--socket", help="Unix ソケットのパス（省略時は標準入出力）")
+    parser.add_argument("--log", help="要求ごとの処理時間を追記する JSONL ファイル")
+    parser.add_argument("--root", help="プロジェクトルート（合成コーパスでの計測用）")
+
+    args = parser.parse_args()
+
+    project_root = Path(args.root) if args.root else Path(__file__).parent.parent.parent
+
+    started = time.perf_counter()
+    server = CorpusServer(project_root, Path(args.log) if args.log else None)
+    # 標準出力は応答専用なので、状況表示は標準エラーへ
+    print(f"📊 準備完了（{(time.perf_counter() - started) * 1000:.0f}ms）", file=sys.stderr)
+    if server.corpus is None:
+        print(f"⚠️  データベースが見つかりません（sample / kwic は使えません）: {server.db_path}", file=sys.stderr)
+
+    try:
+        if args.socket:
+            serve_socket(server, Path(args.socket))
+        else:
+            serve_stdio(server)
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+rawツリーの監視: data/raw/ の記事変更を writing-corpus.db に差分反映する
+
+目的: metadata_extractor.py → migrate-to-sqlite.py の全件再構築を待たずに、
+      作成・更新・削除された記事だけを articles / articles_fts に反映する
+使い方: python3 watch-raw-to-db.py [--source DIR ...] [--debounce SEC] [--interval SEC] [--polling] [--once]
+出力: writing-corpus.db の articles / articles_fts、data/corpus/metadata.*（メタデータストア・互換用 metadata.json）、
+      data/corpus/extract-manifest.json を更新
+
+watchdog パッケージがあればファイルシステムイベント（inotify等）で監視し、
+なければ --interval 秒ごとのポーリングで監視する。
+連続したイベントは --debounce 秒静かになるまでまとめ、1トランザクションで反映する。
+反映した記事はメタデータストアと抽出マニフェストにも書き込むため、
+metadata_extractor.py を実行し直さなくても metadata.json と DB は一致する。
+"""
+
+import argparse
+import queue
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from extract.metadata_extractor import (
+    cached_sha256, extract_article_metadata, generate_statistics, load_manifest, merge_downstream_fields, save_manifest
+)
+from lib.article_parser import parse_article
+from lib.corpus_db import article_row, connect, create_schema, delete_articles, upsert_source_rows
+from lib.metadata_store import MetadataStore
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+# 記事として取り込む frontmatter の date（記事IDと year の元になる）
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def scan_tree(root: Path) -> Dict[Path, Tuple[int, int]]:
+    """
+    ディレクトリ配下の記事ファイルを列挙
+
+    Args:
+        root: 監視ルート（またはその配下のディレクトリ）
+
+    Returns:
+        ファイルパス → (size, mtime_ns)
+    """
+    entries = {}
+
+    for md_file in root.glob("**/*.md"):
+        try:
+            stat = md_file.stat()
+        except FileNotFoundError:
+            continue
+        entries[md_file] = (stat.st_size, stat.st_mtime_ns)
+
+    return entries
+
+
+class TreeSnapshot:
+    """監視ルート配下の (size, mtime_ns) を保持し、差分を検出する"""
+
+    def __init__(self, roots: List[Path]):
+        self.roots = roots
+        self.entries: Dict[Path, Tuple[int, int]] = {}
+        for root in roots:
+            self.entries.update(scan_tree(root))
+
+    def refresh(self, dirty_paths: Optional[Iterable[Path]] = None) -> Dict[Path, str]:
+        """
+        スナップショットを更新して変更を返す
+
+        Args:
+            dirty_paths: 変更のあったパス（ファイルまたはディレクトリ）。
+                         None の場合は全ルートを走査し直す（ポーリング）
+
+        Returns:
+            ファイルパス → created / modified / removed
+        """
+        targets = self.roots if dirty_paths is None else set(dirty_paths)
+        changes = {}
+
+        for target in targets:
+            if target.suffix == ".md" and not target.is_dir():
+                current = scan_file(target)
+                scope = [target] if target in self.entries else []
+            else:
+                current = scan_tree(target) if target.is_dir() else {}
+                scope = [path for path in self.entries if target in path.parents]
+
+            for path in scope:
+                if path not in current:
+                    del self.entries[path]
+                    changes[path] = "removed"
+
+            for path, signature in current.items():
+                previous = self.entries.get(path)
+                if previous is None:
+                    changes[path] = "created"
+                elif previous != signature:
+                    changes[path] = "modified"
+                self.entries[path] = signature
+
+        return changes
+
+
+def scan_file(md_file: Path) -> Dict[Path, Tuple[int, int]]:
+    try:
+        stat = md_file.stat()
+    except FileNotFoundError:
+        return {}
+    return {md_file: (stat.st_size, stat.st_mtime_ns)}
+
+
+class DirtyPathHandler(FileSystemEventHandler):
+    """watchdog のイベントを変更パスとしてキューに積む"""
+
+    def __init__(self, dirty_queue: queue.Queue):
+        super().__init__()
+        self.dirty_queue = dirty_queue
+
+    def on_any_event(self, event):
+        for attr in ("src_path", "dest_path"):
+            path = getattr(event, attr, None)
+            if path:
+                path = Path(path)
+                if event.is_directory or path.suffix == ".md":
+                    self.dirty_queue.put(path)
+
+
+def load_project_manifest(project_root: Path) -> Dict[Path, Dict]:
+    """
+    抽出マニフェスト（extract-manifest.json）をファイルパスをキーにして読み込む
+
+    Args:
+        project_root: プロジェクトルート
+
+    Returns:
+        ファイルパス → フィンガープリント
+    """
+    fc2_dir = project_root / "data" / "raw" / "fc2_extracted"
+    manifest_file = project_root / "data" / "corpus" / "extract-manifest.json"
+    return {fc2_dir / relative_path: entry for relative_path, entry in load_manifest(manifest_file).items()}
+
+
+def initial_changes(conn: sqlite3.Connection, snapshot: TreeSnapshot, project_root: Path) -> Dict[Path, str]:
+    """
+    起動時点のファイルとDBを突き合わせる
+
+    DBにないファイルは created、sha256 がDBの content_hash と異なるファイルは modified、
+    監視ルート配下でファイルが消えた行は removed とする。
+    mtime は比較に使わない（rsync・cp -p・git checkout は古い mtime を保つため）。
+    抽出マニフェストの size / mtime が一致するファイルはその sha256 を使い、読み込まない。
+
+    Args:
+        conn: データベース接続
+        snapshot: 起動時のスナップショット
+        project_root: プロジェクトルート
+
+    Returns:
+        ファイルパス → created / modified / removed
+    """
+    stored = {}
+    for file_path, content_hash in conn.execute("SELECT file_path, content_hash FROM articles"):
+        stored[project_root / file_path] = content_hash
+
+    manifest = load_project_manifest(project_root)
+    changes = {}
+
+    for path in snapshot.entries:
+        if path not in stored:
+            changes[path] = "created"
+            continue
+
+        content_hash = cached_sha256(path, manifest.get(path))
+        if content_hash is not None and content_hash != stored[path]:
+            changes[path] = "modified"
+
+    for path in stored:
+        if path not in snapshot.entries and any(root in path.parents for root in snapshot.roots):
+            changes[path] = "removed"
+
+    return changes
+
+
+def build_article(md_file: Path, project_root: Path) -> Tuple[Dict, str, Dict]:
+    """
+    記事ファイルからメタデータ・本文・フィンガープリントを組み立てる
+
+    Args:
+        md_file: 記事ファイルのパス
+        project_root: プロジェクトルート
+
+    Returns:
+        (記事メタデータ, 本文, size / mtime_ns / sha256)
+
+    Raises:
+        ValueError: frontmatter の date / original_id が不正な場合
+    """
+    stat = md_file.stat()
+    parsed = parse_article(md_file)
+    article = extract_article_metadata(md_file, md_file.parent, parsed)
+
+    # date / original_id のないファイル（README など）は記事IDも year も決まらない
+    if not DATE_PATTERN.match(article["date"]) or article["year"] is None:
+        raise ValueError(f"frontmatter の date が YYYY-MM-DD 形式ではありません: {article['date']!r}")
+    if "original_id" not in parsed["frontmatter"]:
+        raise ValueError("frontmatter に original_id がありません")
+
+    # fc2_extracted 以外の取り込み元も扱えるよう、プロジェクトルートからの相対パスにする
+    article["corpus_metadata"]["source_path"] = md_file.relative_to(project_root).as_posix()
+
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": parsed["sha256"]}
+    return article, parsed["body"].strip(), fingerprint
+
+
+def apply_changes(conn: sqlite3.Connection, changes: Dict[Path, str], project_root: Path) -> Dict[str, int]:
+    """
+    変更を1トランザクションでDBに反映し、メタデータストアと抽出マニフェストにも書き込む
+
+    metadata.json（と extract-manifest.json）も更新するので、score-articles.py や
+    migrate-to-sqlite.py --incremental からも監視で取り込んだ記事が見える。
+    既存記事の rewrite_status と評価系フィールドはストアの値を引き継ぐ
+    （metadata_extractor.py --incremental と同じ）。
+    メタデータストアも metadata.json もない場合はDBだけを更新する。
+
+    Args:
+        conn: データベース接続
+        changes: ファイルパス → created / modified / removed
+        project_root: プロジェクトルート
+
+    Returns:
+        inserted / updated / unchanged / deleted / errors の件数
+    """
+    summary = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "errors": 0}
+
+    corpus_dir = project_root / "data" / "corpus"
+    fc2_dir = project_root / "data" / "raw" / "fc2_extracted"
+    manifest_file = corpus_dir / "extract-manifest.json"
+
+    store = None
+    if MetadataStore(corpus_dir).exists() or (corpus_dir / "metadata.json").exists():
+        store = MetadataStore.open(corpus_dir)
+    source_ids = store.source_paths() if store is not None else {}
+    manifest = load_manifest(manifest_file)
+
+    rows = []
+    articles = []
+    stale_ids = []
+    removed_ids = []
+
+    for path in sorted(changes):
+        file_path = path.relative_to(project_root).as_posix()
+        existing_ids = [row[0] for row in conn.execute("SELECT id FROM articles WHERE file_path = ?", (file_path,))]
+        previous_id = source_ids.get(file_path)
+        manifest_key = path.relative_to(fc2_dir).as_posix() if fc2_dir in path.parents else None
+
+        if changes[path] == "removed":
+            stale_ids.extend(existing_ids)
+            if previous_id:
+                removed_ids.append(previous_id)
+            if manifest_key:
+                manifest.pop(manifest_key, None)
+            continue
+
+        try:
+            article, body, fingerprint = build_article(path, project_root)
+        except Exception as e:
+            print(f"  ⚠️ 読み込みエラー: {path} - {e}")
+            summary["errors"] += 1
+            if manifest_key:
+                # 一致しないフィンガープリントを残し、次回の差分抽出で再試行させる
+                manifest[manifest_key] = {"size": -1, "mtime_ns": -1, "sha256": None}
+            continue
+
+        if previous_id:
+            article = merge_downstream_fields(article, store.get(previous_id))
+
+        # frontmatter の変更で記事IDが変わった場合は旧IDの行を消す
+        stale_ids.extend(article_id for article_id in existing_ids if article_id != article["id"])
+        rows.append(article_row(article, body, fingerprint["sha256"]))
+        articles.append((previous_id, article))
+        if manifest_key:
+            manifest[manifest_key] = fingerprint
+
+    with conn:
+        summary["deleted"] = delete_articles(conn, stale_ids)
+        summary.update(upsert_source_rows(conn, rows))
+
+    if store is None:
+        return summary
+
+    for previous_id in removed_ids:
+        store.delete(previous_id)
+    for previous_id, article in articles:
+        if previous_id and previous_id != article["id"]:
+            store.delete(previous_id)
+        store.put(article)
+
+    store.update_header(generated_at=datetime.now().isoformat(), statistics=generate_statistics(store))
+    store.export_json()
+    store.close()
+    save_manifest(manifest_file, manifest)
+
+    return summary
+
+
+def report(summary: Dict[str, int], elapsed: float):
+    print(
+        f"[{datetime.now().strftime('%H:%M:%S')}] 反映: "
+        f"追加 {summary['inserted']}件 / 更新 {summary['updated']}件 / "
+        f"変更なし {summary['unchanged']}件 / 削除 {summary['deleted']}件 / "
+        f"エラー {summary['errors']}件 ({elapsed * 1000:.0f}ms)"
+    )
+
+
+def apply_batch(conn: sqlite3.Connection, changes: Dict[Path, str], project_root: Path) -> bool:
+    """
+    apply_changes() を実行して結果を表示する（失敗しても例外を外に出さない）
+
+    失敗したバッチはDB側がロールバックされる。監視は続け、次の起動時の突き合わせで取り込み直す。
+
+    Args:
+        conn: データベース接続
+        changes: ファイルパス → created / modified / removed
+        project_root: プロジェクトルート
+
+    Returns:
+        反映できたか
+    """
+    started = time.perf_counter()
+    try:
+        summary = apply_changes(conn, changes, project_root)
+    except Exception as e:
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] ❌ 反映に失敗しました（{len(changes)}件）: {e}")
+        return False
+
+    report(summary, time.perf_counter() - started)
+    return True
+
+
+def watch(conn: sqlite3.Connection, snapshot: TreeSnapshot, project_root: Path,
+          debounce: float, interval: float, use_polling: bool):
+    """
+    監視ループ
+
+    Args:
+        conn: データベース接続
+        snapshot: 監視開始時のスナップショット
+        project_root: プロジェクトルート
+        debounce: 最後のイベントからこの秒数経過したら反映する
+        interval: ポーリング間隔（秒）
+        use_polling: True の場合は watchdog があってもポーリングする
+    """
+    observer = None
+    dirty_queue = queue.Queue()
+
+    if Observer is not None and not use_polling:
+        observer = Observer()
+        handler = DirtyPathHandler(dirty_queue)
+        for root in snapshot.roots:
+            observer.schedule(handler, str(root), recursive=True)
+        observer.start()
+        print("監視モード: ファイルシステムイベント（watchdog）")
+        tick = min(0.2, debounce)
+    else:
+        print(f"監視モード: ポーリング（{interval}秒間隔）")
+        tick = interval
+
+    pending = {}
+    last_event = 0.0
+
+    try:
+        while True:
+            if observer is not None:
+                dirty = set()
+                try:
+                    dirty.add(dirty_queue.get(timeout=tick))
+                    while True:
+                        dirty.add(dirty_queue.get_nowait())
+                except queue.Empty:
+                    pass
+                changes = snapshot.refresh(dirty) if dirty else {}
+            else:
+                time.sleep(tick)
+                changes = snapshot.refresh()
+
+            if changes:
+                pending.update(changes)
+                last_event = time.monotonic()
+
+            if pending and time.monotonic() - last_event >= debounce:
+                apply_batch(conn, pending, project_root)
+                pending = {}
+    except KeyboardInterrupt:
+        print("\n監視を終了します")
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="rawツリーの変更をwriting-corpus.dbに差分反映")
+
+    parser.add_argument("--source", action="append",
+                        help="監視するディレクトリ（複数指定可、デフォルト: data/raw）")
+    parser.add_argument("--db", help="データベースパス（デフォルト: data/corpus/writing-corpus.db）")
+    parser.add_argument("--debounce", type=float, default=1.0, help="反映までの待機秒数（デフォルト: 1.0）")
+    parser.add_argument("--interval", type=float, default=2.0, help="ポーリング間隔（デフォルト: 2.0秒）")
+    parser.add_argument("--polling", action="store_true", help="watchdogがあってもポーリングで監視する")
+    parser.add_argument("--once", action="store_true", help="起動時の突き合わせだけ行って終了する")
+
+    args = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parent.parent.parent
+    db_path = Path(args.db) if args.db else project_root / "data" / "corpus" / "writing-corpus.db"
+    roots = [Path(source).resolve() for source in args.source] if args.source else [project_root / "data" / "raw"]
+
+    if not db_path.exists():
+        print(f"❌ データベースが見つかりません: {db_path}")
+        print("   先に migrate-to-sqlite.py を実行してください")
+        return
+
+    for root in roots:
+        if root != project_root and project_root not in root.parents:
+            print(f"❌ プロジェクト外のディレクトリは監視できません: {root}")
+            return
+
+    conn = connect(db_path)
+
+    try:
+        # 旧スキーマのDBにも articles_fts 追従トリガー等を追加する
+        create_schema(conn)
+
+        snapshot = TreeSnapshot(roots)
+        print(f"監視対象: {', '.join(str(root) for root in roots)}（{len(snapshot.entries)}件）")
+
+        # 起動前の変更を取り込む
+        changes = initial_changes(conn, snapshot, project_root)
+        if changes:
+            apply_batch(conn, changes, project_root)
+        else:
+            print("起動時の差分: なし")
+
+        if not args.once:
+            watch(conn, snapshot, project_root, args.debounce, args.interval, args.polling)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()